@@ -0,0 +1,243 @@
+"""OCR accuracy and speed regression suite on synthetic documents.
+
+Every preprocessing/engine configuration OCRs the same generated pages; for
+each one the suite records pages/sec, per-page latency, mean per-stage
+preprocessing time, peak traced memory and character error rate (CER)
+against the ground truth. Results are written as JSON so runs on different
+commits can be compared. Run from the OCR-Text-Scanner directory:
+
+    python benchmarks/bench_ocr.py --output bench-main.json
+    python benchmarks/bench_ocr.py --suite full --engines tesserocr --configs default,clahe+adaptive
+    python benchmarks/bench_ocr.py --output bench-new.json --compare bench-main.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+
+import numpy as np
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "benchmarks"))
+
+from ocr_core import OCRProcessor  # noqa: E402
+from synthetic_docs import generate_document, suite  # noqa: E402
+
+CONFIGS = {
+    "none": None,
+    "default": {},
+    "clahe+adaptive": {"clahe": True, "adaptive_threshold": True},
+    "rescale+deskew": {"rescale": True, "deskew": True},
+}
+
+
+def normalize_text(text):
+    """Collapse runs of spaces and drop blank lines so layout noise is not counted"""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance, one numpy row per reference character"""
+    if not reference:
+        return len(hypothesis)
+    if not hypothesis:
+        return len(reference)
+    hyp = np.frombuffer(hypothesis.encode("utf-32-le"), np.uint32)
+    steps = np.arange(len(hyp) + 1)
+    row = steps.copy()
+    for i, code in enumerate(np.frombuffer(reference.encode("utf-32-le"), np.uint32), 1):
+        new = np.empty_like(row)
+        new[0] = i
+        # deletion from the row above, substitution from the diagonal
+        new[1:] = np.minimum(row[1:] + 1, row[:-1] + (hyp != code))
+        # insertions chain along the row: new[j] = min_k(new[k] + j - k)
+        row = np.minimum.accumulate(new - steps) + steps
+    return int(row[-1])
+
+
+def char_error_rate(reference, hypothesis):
+    """Edits needed to turn the OCR text into the ground truth, per ground-truth character"""
+    reference, hypothesis = normalize_text(reference), normalize_text(hypothesis)
+    return edit_distance(reference, hypothesis) / float(max(1, len(reference)))
+
+
+def run_config(documents, preprocess_options, engine, psm=6, lang="eng"):
+    """OCR every page with one configuration and summarize speed, memory and accuracy"""
+    pipeline = None
+    if preprocess_options is not None:
+        pipeline = OCRProcessor.get_pipeline(**preprocess_options)
+        pipeline.totals.clear()
+        pipeline.runs = 0
+
+    latencies, errors, characters = [], 0, 0
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for pages in documents:
+        for image, truth in pages:
+            page_start = time.perf_counter()
+            text, result = OCRProcessor.ocr(image, preprocess_options=preprocess_options,
+                                            psm=psm, lang=lang, engine=engine)
+            latencies.append(time.perf_counter() - page_start)
+            if result is None:
+                raise RuntimeError(text)
+            reference = normalize_text(truth)
+            errors += edit_distance(reference, normalize_text(text))
+            characters += len(reference)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "pages": len(latencies),
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "latency_ms": {
+            "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "stage_ms": {name: round(seconds * 1000, 3)
+                     for name, seconds in (pipeline.mean_timings() if pipeline else {}).items()},
+        "peak_traced_mb": round(peak / 2 ** 20, 2),
+        "cer": round(errors / float(max(1, characters)), 5),
+    }
+
+
+def run_suite(specs, configs, engines, psm=6, lang="eng", log=None):
+    """Benchmark every (engine, config) pair on the documents rendered from ``specs``
+
+    ``engines`` maps a label to an OCREngine. Results are per document and per
+    configuration, so a regression can be traced to the kind of page it hit.
+    """
+    documents = {spec.name: generate_document(spec) for spec in specs}
+    results = []
+    for engine_name, engine in engines.items():
+        for config_name, options in configs.items():
+            for spec in specs:
+                entry = run_config([documents[spec.name]], options, engine, psm=psm, lang=lang)
+                entry.update({"engine": engine_name, "config": config_name, "document": spec.name})
+                results.append(entry)
+                if log:
+                    log(f"{engine_name:<12} {config_name:<16} {spec.name:<44} "
+                        f"{entry['pages_per_sec']:7.2f} p/s  CER {entry['cer']:.4f}")
+    return {
+        "meta": run_metadata(),
+        "documents": [dict(asdict(spec), name=spec.name) for spec in specs],
+        "results": results,
+    }
+
+
+def run_metadata():
+    import cv2
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import pytesseract
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "tesseract": tesseract,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(current, baseline, cer_tolerance=0.005, speed_tolerance=0.10):
+    """Lines describing regressions of ``current`` against ``baseline``
+
+    A result regresses when its CER rises by more than ``cer_tolerance``
+    (absolute) or its pages/sec drops by more than ``speed_tolerance``
+    (relative). Pairs present in only one run are ignored.
+    """
+    def index(run):
+        return {(r["engine"], r["config"], r["document"]): r for r in run["results"]}
+
+    old = index(baseline)
+    regressions = []
+    for key, new in sorted(index(current).items()):
+        before = old.get(key)
+        if before is None:
+            continue
+        label = "/".join(key)
+        if new["cer"] > before["cer"] + cer_tolerance:
+            regressions.append(f"{label}: CER {before['cer']:.4f} -> {new['cer']:.4f}")
+        if before["pages_per_sec"] and new["pages_per_sec"] < before["pages_per_sec"] * (1 - speed_tolerance):
+            regressions.append(f"{label}: {before['pages_per_sec']:.2f} -> {new['pages_per_sec']:.2f} pages/sec")
+    return regressions
+
+
+def main():
+    from ocr_engines import create_engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", default="quick", choices=["quick", "full"])
+    parser.add_argument("--engines", default="pytesseract,tesserocr",
+                        help="Comma-separated backends; unavailable ones are skipped")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="Comma-separated preprocessing configs")
+    parser.add_argument("--psm", type=int, default=6)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON; exit 1 on regressions")
+    parser.add_argument("--cer-tolerance", type=float, default=0.005)
+    parser.add_argument("--speed-tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    configs = {name: CONFIGS[name] for name in args.configs.split(",")}
+    engines = {}
+    for backend in args.engines.split(","):
+        try:
+            engines[backend] = create_engine(backend, args.lang)
+        except Exception as e:
+            print(f"Skipping {backend}: {e}", file=sys.stderr)
+    if not engines:
+        parser.error("no OCR engine available")
+
+    try:
+        report = run_suite(suite(args.suite), configs, engines, psm=args.psm, lang=args.lang, log=print)
+    finally:
+        for engine in engines.values():
+            engine.close()
+    try:
+        import resource  # Unix only; Windows runs just leave peak RSS out
+    except ImportError:
+        resource = None
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        report["meta"]["max_rss_kb"] = {"self": usage, "children": children}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.cer_tolerance, args.speed_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regressions against {baseline['meta'].get('commit') or args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
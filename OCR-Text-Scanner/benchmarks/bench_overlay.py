@@ -0,0 +1,85 @@
+"""Compare per-word overlay drawing with the columnar, display-sized overlay layer.
+
+Run from the OCR-Text-Scanner directory:
+
+    python benchmarks/bench_overlay.py --words 5000 --repeat 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+
+from ocr_core import OCRResult, OCRWord  # noqa: E402
+from overlay import render_overlay  # noqa: E402
+
+
+def dense_result(count, width, height, seed=0):
+    """A page of ``count`` word boxes laid out in rows, like a dense scan"""
+    rng = np.random.default_rng(seed)
+    words = []
+    x, y, line = 20, 20, 1
+    for _ in range(count):
+        w = int(rng.integers(30, 120))
+        if x + w > width - 20:
+            x, y, line = 20, y + 28, line + 1
+        words.append(OCRWord("word", float(rng.uniform(0, 100)), x, y % (height - 30), w, 22, 1, 1, line))
+        x += w + 10
+    return OCRResult.from_words(words)
+
+
+def legacy_overlay(image, result):
+    """What show_text_overlay used to do: copy the full image and draw word by word"""
+    overlay_image = image.copy()
+    for word in result.words:
+        if word.conf > 30:
+            x, y, w, h = word.box
+            cv2.rectangle(overlay_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(overlay_image, word.text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    return overlay_image
+
+
+def columnar_overlay(result, source_size, display_size):
+    scale = min(display_size[0] / source_size[0], display_size[1] / source_size[1])
+    size = (int(source_size[0] * scale), int(source_size[1] * scale))
+    columns = result.columns().filter(min_conf=30)
+    return render_overlay(columns, size, (scale, scale))
+
+
+def timed(function, repeat):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--source", default="4960x3508", help="Page size in pixels (A4 at 600 DPI)")
+    parser.add_argument("--display", default="1000x700", help="Label size the page is shown in")
+    args = parser.parse_args()
+
+    source = tuple(int(v) for v in args.source.split("x"))
+    display = tuple(int(v) for v in args.display.split("x"))
+    image = np.full((source[1], source[0], 3), 255, np.uint8)
+    result = dense_result(args.words, *source)
+
+    legacy = timed(lambda: legacy_overlay(image, result), args.repeat)
+    result.columns()  # built once per OCR result and reused by every redraw
+    layer = timed(lambda: columnar_overlay(result, source, display), args.repeat)
+    print(f"{args.words} words on {source[0]}x{source[1]}, shown at {display[0]}x{display[1]}")
+    print(f"  per-word draw on full-size copy  {legacy:8.1f} ms")
+    print(f"  columnar layer at display size   {layer:8.1f} ms  (re-rendered only on resize or new results)")
+
+
+if __name__ == "__main__":
+    main()
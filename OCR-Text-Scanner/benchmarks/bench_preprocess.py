@@ -0,0 +1,103 @@
+"""Time the preprocessing pipeline per stage on sample and generated pages.
+
+Run from the OCR-Text-Scanner directory:
+
+    python benchmarks/bench_preprocess.py --repeat 20
+    python benchmarks/bench_preprocess.py --ocr   # also time Tesseract with/without rescale
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+
+from preprocessing import PreprocessPipeline, opencl_available  # noqa: E402
+
+CONFIGS = {
+    "legacy (equalize+median+otsu)": {},
+    "clahe+adaptive": {"clahe": True, "adaptive_threshold": True},
+    "rescale+deskew+default": {"rescale": True, "deskew": True},
+}
+
+
+def generated_pages():
+    """Synthetic pages: small text, skewed scan, large camera frame with shading"""
+    rng = np.random.default_rng(0)
+    lines = ["The quick brown fox jumps over the lazy dog", "0123456789 invoice total due",
+             "Optical character recognition benchmark page"]
+
+    small = np.full((1100, 850, 3), 255, np.uint8)
+    for i in range(30):
+        cv2.putText(small, lines[i % 3], (40, 40 + i * 34), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 0, 0), 1)
+
+    skewed = cv2.warpAffine(small, cv2.getRotationMatrix2D((425, 550), 3.0, 1.0), (850, 1100),
+                            borderValue=(255, 255, 255))
+
+    camera = np.full((1080, 1920, 3), 200, np.uint8)
+    shading = np.linspace(0.6, 1.1, 1920, dtype=np.float32)[None, :, None]
+    for i in range(12):
+        cv2.putText(camera, lines[i % 3], (80, 100 + i * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (30, 30, 30), 3)
+    camera = np.clip(camera * shading + rng.normal(0, 6, camera.shape), 0, 255).astype(np.uint8)
+
+    return [("generated/small-text", small), ("generated/skewed", skewed), ("generated/camera-1080p", camera)]
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(PROJECT_DIR, "assets", "*"))):
+        image = cv2.imread(path)
+        if image is not None:
+            pages.append((os.path.relpath(path, PROJECT_DIR), image))
+    return pages + generated_pages()
+
+
+def bench(pipeline, image, repeat):
+    pipeline.run(image)  # warm up buffers and OpenCL kernels
+    pipeline.totals.clear()
+    pipeline.runs = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = pipeline.run(image)
+    return (time.perf_counter() - start) / repeat, pipeline.mean_timings(), output
+
+
+def time_ocr(image, repeat=3):
+    import pytesseract
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = pytesseract.image_to_string(image, config="--psm 6")
+    return (time.perf_counter() - start) / repeat, len(text.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--ocr", action="store_true", help="Also time Tesseract on the outputs")
+    args = parser.parse_args()
+
+    backends = [False] + ([True] if opencl_available() else [])
+    print(f"OpenCL available: {opencl_available()}")
+    for name, image in load_pages():
+        print(f"\n{name} {image.shape[1]}x{image.shape[0]}")
+        for label, options in CONFIGS.items():
+            for use_opencl in backends:
+                pipeline = PreprocessPipeline.from_options(use_opencl=use_opencl, **options)
+                seconds, stages, output = bench(pipeline, image, args.repeat)
+                device = "UMat" if use_opencl else "numpy"
+                breakdown = "  ".join(f"{stage}={ms * 1000:.1f}" for stage, ms in stages.items())
+                print(f"  {label:<32} {device:<5} {seconds * 1000:7.1f} ms  [{breakdown}]")
+                if args.ocr and not use_opencl:
+                    ocr_seconds, words = time_ocr(output)
+                    print(f"  {'':<32} OCR   {ocr_seconds * 1000:7.1f} ms  {words} words "
+                          f"on {output.shape[1]}x{output.shape[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure cold-start time of the OCR modules, CLIs and launcher.
+
+Run from the OCR-Text-Scanner directory:
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC_DIR = os.path.join(PROJECT_DIR, "src")
+
+CASES = [
+    ("import ocr_core", [sys.executable, "-c", "import ocr_core"]),
+    ("import batch_ocr (worker spawn)", [sys.executable, "-c", "import batch_ocr"]),
+    ("batch_ocr --help", [sys.executable, os.path.join(SRC_DIR, "batch_ocr.py"), "--help"]),
+    ("import main (GUI)", [sys.executable, "-c", "import main"]),
+    ("run_scanner dependency check", [sys.executable, "-c",
+                                      "import sys; sys.path.insert(0, '..'); "
+                                      "import run_scanner; run_scanner.check_dependencies()"]),
+    ("eager PyQt5+cv2+PIL.ImageQt+pytesseract", [sys.executable, "-c",
+                                                 "import PyQt5.QtWidgets, cv2, PIL.ImageQt, pytesseract"]),
+]
+
+
+def time_command(command, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SRC_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.repeat)
+    print(f"{'interpreter only':<40} {baseline * 1000:8.1f} ms")
+    for name, command in CASES:
+        seconds = time_command(command, args.repeat)
+        print(f"{name:<40} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load-test a running OCR service (src/ocr_service.py).
+
+Start the service, then run from the OCR-Text-Scanner directory:
+
+    python src/ocr_service.py --workers 4 &
+    python benchmarks/load_test_service.py --concurrency 16 --requests 200
+    python benchmarks/load_test_service.py --image assets/page.png --url http://127.0.0.1:8765
+
+Each client thread keeps one connection open and posts the image back to
+back. Rejections (503) are counted separately and retried after Retry-After.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import cv2
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "benchmarks"))
+
+from bench_preprocess import generated_pages  # noqa: E402
+
+
+def load_body(path):
+    if path:
+        with open(path, "rb") as handle:
+            return handle.read()
+    _, page = generated_pages()[0]
+    return cv2.imencode(".png", page)[1].tobytes()
+
+
+def client(url, body, query, count, latencies, rejected, errors, lock):
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=120)
+    done = 0
+    while done < count:
+        start = time.perf_counter()
+        try:
+            connection.request("POST", f"/ocr?{query}", body=body)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            with lock:
+                errors[0] += 1
+            done += 1
+            continue
+        if response.status == 503:
+            with lock:
+                rejected[0] += 1
+            time.sleep(float(response.getheader("Retry-After", "1")))
+            continue
+        with lock:
+            if response.status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[0] += 1
+        done += 1
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--image", help="Image to post (default: a generated page)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Total successful requests")
+    parser.add_argument("--query", default="psm=6", help="Query string sent to /ocr")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    body = load_body(args.image)
+    latencies, rejected, errors, lock = [], [0], [0], threading.Lock()
+    per_client = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(url, body, args.query, n, latencies, rejected, errors, lock))
+               for n in per_client]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float("nan")
+
+    print(f"{len(latencies)} ok, {rejected[0]} rejected (503), {errors[0]} errors in {elapsed:.2f} s "
+          f"with {args.concurrency} clients")
+    print(f"throughput {len(latencies) / elapsed:.2f} req/s")
+    print(f"latency ms  p50={percentile(0.5):.1f}  p95={percentile(0.95):.1f}  p99={percentile(0.99):.1f}")
+
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+    connection.request("GET", "/metrics")
+    print("server", json.dumps(json.loads(connection.getresponse().read()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
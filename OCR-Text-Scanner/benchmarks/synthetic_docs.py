@@ -0,0 +1,152 @@
+"""Synthetic documents with ground truth for OCR benchmarks.
+
+A DocSpec describes how a document looks (font, size, resolution, rotation,
+noise, page count); generate_document() renders it deterministically from the
+spec's seed, so the same spec always gives the same pixels and text.
+
+    python benchmarks/synthetic_docs.py --out /tmp/docs --suite quick
+"""
+
+import argparse
+import itertools
+import json
+import os
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_DIRS = ["/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/TTF", "/Library/Fonts",
+             "/System/Library/Fonts", "C:/Windows/Fonts"]
+FONT_FILES = {
+    "sans": ["DejaVuSans.ttf", "Arial.ttf", "arial.ttf"],
+    "serif": ["DejaVuSerif.ttf", "Times New Roman.ttf", "times.ttf"],
+    "mono": ["DejaVuSansMono.ttf", "Courier New.ttf", "cour.ttf"],
+}
+WORDS = ("invoice total amount due date customer account number payment received order "
+         "shipping address reference balance quantity price description tax subtotal the of "
+         "and to for with from page report summary quarterly revenue growth market").split()
+
+
+@dataclass(frozen=True)
+class DocSpec:
+    """How a synthetic document is rendered; ``font_size`` is in points"""
+
+    font: str = "sans"
+    font_size: int = 11
+    dpi: int = 200
+    rotation: float = 0.0
+    noise: float = 0.0
+    blur: int = 0
+    pages: int = 1
+    page_inches: tuple = (8.5, 5.5)
+    seed: int = 0
+
+    @property
+    def name(self):
+        return (f"{self.font}-{self.font_size}pt-{self.dpi}dpi-rot{self.rotation:g}"
+                f"-noise{self.noise:g}-blur{self.blur}-{self.pages}p")
+
+
+def load_font(font, pixels):
+    """A TrueType font by family name, or Pillow's built-in font if none is installed"""
+    for directory in FONT_DIRS:
+        for filename in FONT_FILES.get(font, [font]):
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                return ImageFont.truetype(path, pixels)
+    return ImageFont.load_default(size=pixels)
+
+
+def random_line(rng, max_width, font, draw):
+    words = []
+    while True:
+        if rng.random() < 0.15:
+            word = f"{rng.integers(1, 99999)}"
+        elif rng.random() < 0.1:
+            word = f"{rng.integers(1, 999)}.{rng.integers(0, 99):02d}"
+        else:
+            word = str(rng.choice(WORDS))
+            if rng.random() < 0.2:
+                word = word.capitalize()
+        candidate = " ".join(words + [word])
+        if words and draw.textlength(candidate, font=font) > max_width:
+            return " ".join(words)
+        words.append(word)
+
+
+def render_page(spec, rng):
+    """Render one page; returns (BGR image, ground-truth text with one line per row)"""
+    width, height = (int(round(inches * spec.dpi)) for inches in spec.page_inches)
+    pixels = max(6, int(round(spec.font_size * spec.dpi / 72.0)))
+    font = load_font(spec.font, pixels)
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+
+    margin = spec.dpi // 2
+    line_height = int(pixels * 1.5)
+    lines = []
+    y = margin
+    while y + line_height < height - margin:
+        line = random_line(rng, width - 2 * margin, font, draw)
+        draw.text((margin, y), line, fill=0, font=font)
+        lines.append(line)
+        y += line_height
+
+    image = np.asarray(page)
+    if spec.rotation:
+        matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), spec.rotation, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=255)
+    if spec.blur:
+        image = cv2.GaussianBlur(image, (2 * spec.blur + 1, 2 * spec.blur + 1), 0)
+    if spec.noise:
+        image = np.clip(image + rng.normal(0, spec.noise, image.shape), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), "\n".join(lines)
+
+
+def generate_document(spec):
+    """Render every page of ``spec``; returns a list of (BGR image, ground truth)"""
+    rng = np.random.default_rng(spec.seed)
+    return [render_page(spec, rng) for _ in range(spec.pages)]
+
+
+def suite(name="quick"):
+    """Named grids of DocSpecs: ``quick`` for every commit, ``full`` for sweeps"""
+    if name == "quick":
+        return [
+            DocSpec(),
+            DocSpec(font="serif", font_size=8, dpi=300),
+            DocSpec(font="mono", rotation=2.5, noise=12.0),
+            DocSpec(font_size=14, dpi=100, blur=1, pages=3, seed=1),
+        ]
+    if name == "full":
+        grid = itertools.product(["sans", "serif", "mono"], [8, 11, 14], [100, 200, 300],
+                                 [0.0, 3.0], [0.0, 15.0])
+        return [DocSpec(font=font, font_size=size, dpi=dpi, rotation=rotation, noise=noise, seed=i)
+                for i, (font, size, dpi, rotation, noise) in enumerate(grid)]
+    raise ValueError(f"Unknown suite: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="Directory for PNG pages and ground truth")
+    parser.add_argument("--suite", default="quick", choices=["quick", "full"])
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = []
+    for spec in suite(args.suite):
+        for number, (image, text) in enumerate(generate_document(spec), 1):
+            stem = os.path.join(args.out, f"{spec.name}-s{spec.seed}-page{number}")
+            cv2.imwrite(stem + ".png", image)
+            with open(stem + ".gt.txt", "w", encoding="utf-8") as handle:
+                handle.write(text + "\n")
+            manifest.append({"image": stem + ".png", "spec": asdict(spec), "page": number})
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    print(f"Wrote {len(manifest)} pages to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Launcher script for OCR Text Scanner
 This script provides an easy way to start the application with proper error handling.
 """
 
+import importlib.util
 import sys
 import os
 import subprocess
@@ -12,30 +13,22 @@ def check_dependencies():
     """Check if required dependencies are installed"""
     print("Checking dependencies...")
     
-    required_packages = [
-        'PyQt5',
-        'pytesseract', 
-        'opencv-python',
-        'Pillow',
-        'numpy'
-    ]
+    # Look the packages up without importing them: the GUI process started
+    # below imports them anyway, so importing here would pay for Qt twice
+    required_packages = {
+        'PyQt5': 'PyQt5',
+        'pytesseract': 'pytesseract',
+        'opencv-python': 'cv2',
+        'Pillow': 'PIL',
+        'numpy': 'numpy',
+    }
     
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            if package == 'opencv-python':
-                import cv2
-            elif package == 'PyQt5':
-                import PyQt5
-            elif package == 'pytesseract':
-                import pytesseract
-            elif package == 'Pillow':
-                from PIL import Image
-            elif package == 'numpy':
-                import numpy
+    for package, module in required_packages.items():
+        if importlib.util.find_spec(module) is not None:
             print(f"✓ {package}")
-        except ImportError:
+        else:
             print(f"✗ {package}")
             missing_packages.append(package)
     
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Headless batch OCR over image folders, multi-page TIFFs and PDFs.
+
+Pages are OCRed in a process pool with one single-threaded Tesseract per
+worker, and results are streamed to JSONL, plain text or hOCR as they finish.
+
+    python src/batch_ocr.py scans/ --output results.jsonl --workers 8 --resume
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import ocr_metrics
+from ocr_core import DEFAULT_TILE_PIXELS, OCRProcessor
+from ocr_cache import OCRCache
+from ocr_engines import create_engine
+
+# OpenCV, NumPy and Pillow are imported where pages are decoded, so --help
+# and argument errors return without loading them
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif')
+PDF_EXTENSIONS = ('.pdf',)
+OUTPUT_SUFFIXES = {'text': '.txt', 'hocr': '.hocr'}
+
+
+def find_documents(inputs):
+    """Expand files and directories into a sorted list of supported documents"""
+    documents = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS + PDF_EXTENSIONS):
+                        documents.append(os.path.join(root, name))
+        elif path.lower().endswith(IMAGE_EXTENSIONS + PDF_EXTENSIONS):
+            documents.append(path)
+    return sorted(documents)
+
+
+def count_pages(path):
+    """Number of pages in an image, multi-page TIFF or PDF"""
+    from PIL import Image
+    if path.lower().endswith(PDF_EXTENSIONS):
+        try:
+            from pdf2image import pdfinfo_from_path
+        except ImportError:
+            raise RuntimeError("PDF input needs pdf2image and poppler: pip install pdf2image")
+        return int(pdfinfo_from_path(path)['Pages'])
+    with Image.open(path) as image:
+        return getattr(image, 'n_frames', 1)
+
+
+def load_page(path, page, dpi=300):
+    """Load one page as a BGR numpy array"""
+    import cv2
+    import numpy as np
+    from PIL import Image, ImageSequence
+    if path.lower().endswith(PDF_EXTENSIONS):
+        from pdf2image import convert_from_path
+        image = convert_from_path(path, dpi=dpi, first_page=page + 1, last_page=page + 1)[0]
+        return cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    with Image.open(path) as image:
+        if getattr(image, 'n_frames', 1) > 1:
+            image = ImageSequence.Iterator(image)[page]
+        return cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+
+def page_pixels(path, page, dpi=300):
+    """Pixel count of a page without decoding it"""
+    from PIL import Image
+    if path.lower().endswith(PDF_EXTENSIONS):
+        from pdf2image import pdfinfo_from_path
+        width, height = (float(v) for v in pdfinfo_from_path(path)['Page size'].split()[:3:2])
+        return int(width * dpi / 72.0) * int(height * dpi / 72.0)  # page size is in points
+    with Image.open(path) as image:
+        if getattr(image, 'n_frames', 1) > 1:
+            image.seek(page)
+        return image.width * image.height
+
+
+def load_large_page(path, page, dpi=300):
+    """Load a page for tiled OCR as grayscale, memory-mapped for single images"""
+    import cv2
+    from tiling import load_gray_memmap
+    if not path.lower().endswith(PDF_EXTENSIONS) and count_pages(path) == 1:
+        return load_gray_memmap(path)
+    return cv2.cvtColor(load_page(path, page, dpi), cv2.COLOR_BGR2GRAY)
+
+
+def page_output_path(output, path, page, output_format):
+    """Output file for one page in text/hOCR mode
+    
+    The readable stem drops leading dots, so a hash of the absolute path keeps
+    e.g. ``../a/x.png`` and ``a/x.png`` apart.
+    """
+    stem = os.path.splitext(os.path.relpath(path))[0].replace(os.sep, '__').lstrip('.')
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output, f"{stem}_{digest}_p{page + 1:04d}{OUTPUT_SUFFIXES[output_format]}")
+
+
+def completed_pages(output, output_format):
+    """Pages already present in a previous run's output"""
+    done = set()
+    if output_format == 'jsonl':
+        if os.path.isfile(output):
+            with open(output, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    if 'error' not in record:
+                        done.add((record['path'], record['page']))
+    return done
+
+
+def truncate_torn_line(path):
+    """Cut a JSONL file back to its last complete line before appending"""
+    with open(path, 'rb+') as handle:
+        end = handle.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 65536)
+            handle.seek(start)
+            newline = handle.read(pos - start).rfind(b'\n')
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos < end:
+            handle.truncate(pos)
+
+
+_worker_engine = None
+_worker_cache = None
+_worker_metrics = False
+
+
+def _init_worker(backend='auto', cache_dir=None, collect_metrics=False):
+    """Keep each worker to one Tesseract thread and one persistent engine"""
+    import cv2
+    global _worker_engine, _worker_cache, _worker_metrics
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    cv2.setNumThreads(1)
+    _worker_engine = create_engine(backend)
+    # Workers share the on-disk store; the memory level only helps repeats within a worker
+    _worker_cache = OCRCache(max_entries=32, disk_dir=cache_dir) if cache_dir else None
+    # Timings are sent back with each record and merged in the parent
+    _worker_metrics = collect_metrics
+
+
+def _ocr_page(job):
+    """OCR a single page inside a worker process"""
+    path, page, output_format, dpi, tile_pixels = job
+    start = time.perf_counter()
+    record = {'path': path, 'page': page}
+    try:
+        if output_format == 'hocr':
+            import pytesseract
+            processed = OCRProcessor.preprocess_image(load_page(path, page, dpi))
+            record['hocr'] = pytesseract.image_to_pdf_or_hocr(processed, extension='hocr').decode('utf-8')
+        else:
+            if tile_pixels and page_pixels(path, page, dpi) > tile_pixels:
+                # Bands keep Tesseract's working set small on huge scans
+                text, result = OCRProcessor.extract_text_tiled(
+                    load_large_page(path, page, dpi), preprocess_options={},
+                    engine=_worker_engine, cache=_worker_cache,
+                )
+                record['tiled'] = True
+            else:
+                text, result = OCRProcessor.extract_text(load_page(path, page, dpi), engine=_worker_engine,
+                                                         cache=_worker_cache)
+            if result is None:
+                record['error'] = text
+            else:
+                record['text'] = text
+                record['words'] = len(result.words)
+    except Exception as e:
+        record['error'] = str(e)
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    if _worker_metrics:
+        ocr_metrics.observe('page', record['seconds'])
+        record['metrics'] = ocr_metrics.registry.snapshot()
+        ocr_metrics.registry.reset()
+    return record
+
+
+class ResultWriter:
+    """Stream page results to JSONL, or to one text/hOCR file per page"""
+
+    def __init__(self, output, output_format, append):
+        self.output = output
+        self.output_format = output_format
+        self.handle = None
+        if output_format == 'jsonl':
+            parent = os.path.dirname(os.path.abspath(output))
+            os.makedirs(parent, exist_ok=True)
+            if append and os.path.isfile(output):
+                truncate_torn_line(output)  # completed_pages() skipped it, so it is redone
+            self.handle = open(output, 'a' if append else 'w', encoding='utf-8')
+        else:
+            os.makedirs(output, exist_ok=True)
+
+    def write(self, record):
+        if self.output_format == 'jsonl':
+            self.handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.handle.flush()
+        elif 'error' not in record:
+            path = page_output_path(self.output, record['path'], record['page'], self.output_format)
+            content = record['hocr'] if self.output_format == 'hocr' else record['text']
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                handle.write(content)
+            os.replace(tmp_path, path)
+
+    def close(self):
+        if self.handle:
+            self.handle.close()
+
+
+def run_batch(inputs, output, output_format='jsonl', workers=None, resume=False, dpi=300, progress=True,
+              backend='auto', cache_dir=None, tile_pixels=DEFAULT_TILE_PIXELS, metrics=False,
+              profile=None, profile_mode='cprofile'):
+    """OCR every page under ``inputs`` and return a summary dict
+    
+    With ``metrics`` the summary includes per-stage timings merged from all
+    workers. With ``profile`` (a file path) the first page is OCRed in this
+    process under the profiler and the raw profile is saved there.
+    """
+    documents = find_documents(inputs)
+    done = completed_pages(output, output_format) if resume else set()
+
+    jobs = []
+    skipped = 0
+    for path in documents:
+        try:
+            pages = count_pages(path)
+        except Exception as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        for page in range(pages):
+            if (path, page) in done or (resume and output_format != 'jsonl' and
+                                        os.path.exists(page_output_path(output, path, page, output_format))):
+                skipped += 1
+                continue
+            jobs.append((path, page, output_format, dpi, tile_pixels))
+
+    writer = ResultWriter(output, output_format, append=resume)
+    workers = workers or os.cpu_count() or 1
+    processed = errors = 0
+    start = time.perf_counter()
+    try:
+        profiled = []
+        if profile and jobs:
+            _init_worker(backend, None, metrics)
+            record, report = ocr_metrics.profile_call(_ocr_page, jobs[0], mode=profile_mode, output=profile)
+            print(report, file=sys.stderr)
+            profiled, jobs = [record], jobs[1:]
+        with Pool(processes=workers, initializer=_init_worker, initargs=(backend, cache_dir, metrics)) as pool:
+            for record in itertools.chain(profiled, pool.imap_unordered(_ocr_page, jobs)):
+                if 'metrics' in record:
+                    ocr_metrics.registry.merge(record.pop('metrics'))
+                writer.write(record)
+                processed += 1
+                if 'error' in record:
+                    errors += 1
+                    print(f"Error on {record['path']} page {record['page'] + 1}: {record['error']}",
+                          file=sys.stderr)
+                if progress and processed % 10 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{processed}/{len(jobs) + len(profiled)} pages, {processed / elapsed:.2f} pages/sec",
+                          file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'pages': processed,
+        'skipped': skipped,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(processed / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+    if metrics:
+        summary['metrics'] = ocr_metrics.registry.summary()
+    return summary
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Batch OCR images, multi-page TIFFs and PDFs")
+    parser.add_argument('inputs', nargs='+', help="Files or directories to OCR")
+    parser.add_argument('--output', required=True,
+                        help="JSONL file, or a directory for text/hOCR output")
+    parser.add_argument('--format', dest='output_format', choices=['jsonl', 'text', 'hocr'], default='jsonl')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--dpi', type=int, default=300, help="Rasterization DPI for PDFs")
+    parser.add_argument('--resume', action='store_true', help="Skip pages already in the output")
+    parser.add_argument('--backend', choices=['auto', 'tesserocr', 'pytesseract'], default='auto',
+                        help="OCR engine (auto prefers in-process tesserocr)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Reuse OCR results for identical pages from this directory")
+    parser.add_argument('--tile-pixels', type=int, default=DEFAULT_TILE_PIXELS,
+                        help="OCR pages larger than this many pixels in bands (0 disables)")
+    parser.add_argument('--metrics', default=None,
+                        help="Write per-stage timings here (Prometheus text for .prom, JSON otherwise)")
+    parser.add_argument('--profile', default=None,
+                        help="Profile the first page in-process and save the profile here")
+    parser.add_argument('--profile-mode', choices=['cprofile', 'sample'], default='cprofile',
+                        help="cProfile (exact) or stack sampling (low overhead)")
+    args = parser.parse_args()
+
+    summary = run_batch(args.inputs, args.output, args.output_format, args.workers, args.resume, args.dpi,
+                        backend=args.backend, cache_dir=args.cache_dir,
+                        tile_pixels=args.tile_pixels, metrics=bool(args.metrics),
+                        profile=args.profile, profile_mode=args.profile_mode)
+    if args.metrics:
+        ocr_metrics.registry.dump(args.metrics)
+    print(f"OCRed {summary['pages']} pages in {summary['seconds']}s "
+          f"({summary['pages_per_sec']} pages/sec), {summary['skipped']} resumed, "
+          f"{summary['errors']} errors")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
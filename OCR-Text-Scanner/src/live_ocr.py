@@ -0,0 +1,141 @@
+"""
+Live OCR scheduling for camera frames.
+
+Decides which frames are worth OCRing (only after the scene changes and the
+camera has settled), throttles OCR to a share of one CPU core, and stabilizes
+the text by voting over several OCR passes of the same scene.
+"""
+
+import time
+from collections import Counter, deque
+
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+    """Frame differencing on small grayscale thumbnails"""
+
+    def __init__(self, thumb_size=32, change_threshold=8.0, motion_threshold=4.0, stable_frames=3):
+        self.thumb_size = thumb_size
+        self.change_threshold = change_threshold
+        self.motion_threshold = motion_threshold
+        self.stable_frames = stable_frames
+        self.reference = None
+        self.previous = None
+        self.stable_count = 0
+
+    def thumbnail(self, image):
+        """Downscale to a float32 grayscale thumbnail"""
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(image, (self.thumb_size, self.thumb_size), interpolation=cv2.INTER_AREA)
+        return thumb.astype(np.float32)
+
+    @staticmethod
+    def difference(a, b):
+        """Mean absolute difference between two thumbnails in gray levels"""
+        return float(np.mean(np.abs(a - b)))
+
+    def update(self, image):
+        """Feed a frame; returns (scene_changed, settled) for it"""
+        thumb = self.thumbnail(image)
+        moving = self.previous is not None and self.difference(thumb, self.previous) > self.motion_threshold
+        self.previous = thumb
+        self.stable_count = 0 if moving else self.stable_count + 1
+        changed = self.reference is None or self.difference(thumb, self.reference) > self.change_threshold
+        return changed, self.stable_count >= self.stable_frames
+
+    def mark_reference(self):
+        """Treat the last frame fed to update() as the scene that was OCRed"""
+        self.reference = self.previous
+
+    def reset(self):
+        """Forget the reference scene so the next settled frame is OCRed"""
+        self.reference = None
+        self.previous = None
+        self.stable_count = 0
+
+
+class TextVoter:
+    """Stabilize OCR text by per-line majority vote over recent passes"""
+
+    def __init__(self, window=5):
+        self.results = deque(maxlen=window)
+
+    def add(self, text):
+        """Add one OCR pass and return the voted text"""
+        self.results.append([line for line in text.splitlines() if line.strip()])
+        return self.text
+
+    @property
+    def text(self):
+        if not self.results:
+            return ""
+        line_count = Counter(len(lines) for lines in self.results).most_common(1)[0][0]
+        voted = []
+        for i in range(line_count):
+            candidates = Counter(lines[i] for lines in self.results if len(lines) > i)
+            voted.append(candidates.most_common(1)[0][0])
+        return "\n".join(voted)
+
+    def __len__(self):
+        return len(self.results)
+
+    def clear(self):
+        self.results.clear()
+
+
+class LiveOCRController:
+    """Schedule live OCR: on scene change, a few voting passes, then idle
+
+    ``cpu_share`` bounds OCR to that fraction of wall time: after a pass that
+    took ``t`` seconds, the next one waits ``t * (1 / cpu_share - 1)``.
+    """
+
+    def __init__(self, votes_per_scene=3, cpu_share=0.5, detector=None, voter=None):
+        self.votes_per_scene = votes_per_scene
+        self.cpu_share = cpu_share
+        self.detector = detector or FrameChangeDetector()
+        self.voter = voter or TextVoter(window=votes_per_scene)
+        self.busy = False
+        self.next_allowed = 0.0
+        self.ocr_seconds = None
+        self._submitted_at = None
+
+    def offer(self, image, now=None):
+        """Feed a camera frame; True if it should be OCRed now"""
+        now = time.monotonic() if now is None else now
+        changed, settled = self.detector.update(image)
+        if changed and settled and len(self.voter):
+            # A new scene: earlier votes belong to the old one
+            self.voter.clear()
+        if self.busy or now < self.next_allowed or not settled:
+            return False
+        return changed or len(self.voter) < self.votes_per_scene
+
+    def submitted(self, now=None):
+        """Call when the offered frame has been handed to an OCR worker"""
+        self.busy = True
+        self._submitted_at = time.monotonic() if now is None else now
+        self.detector.mark_reference()
+
+    def completed(self, text, now=None):
+        """Record an OCR result; returns the stabilized text"""
+        now = time.monotonic() if now is None else now
+        self.busy = False
+        if self._submitted_at is not None:
+            seconds = now - self._submitted_at
+            self.ocr_seconds = seconds if self.ocr_seconds is None else 0.7 * self.ocr_seconds + 0.3 * seconds
+            self.next_allowed = now + self.ocr_seconds * (1.0 / self.cpu_share - 1.0)
+        return self.voter.add(text)
+
+    def failed(self):
+        """Call when the submitted OCR did not produce a result"""
+        self.busy = False
+
+    def reset(self):
+        self.detector.reset()
+        self.voter.clear()
+        self.busy = False
+        self.next_allowed = 0.0
@@ -1,18 +1,48 @@
 import sys
+import tempfile
+import threading
+import time
 import cv2
 import numpy as np
-import pytesseract
-from PIL import Image, ImageQt
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QPushButton, QLabel, QTextEdit, QFileDialog, 
-                             QSplitter, QGroupBox, QCheckBox, QSlider, QSpinBox,
-                             QComboBox, QProgressBar, QMessageBox, QTabWidget)
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QRect
+                             QSplitter, QGroupBox, QCheckBox, QProgressBar, QMessageBox,
+                             QTabWidget)
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QRect, QObject,
+                          QRunnable, QThreadPool, QTimer)
 from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QFont
 import os
 
+import ocr_metrics
+from live_ocr import LiveOCRController
+from ocr_cache import OCRCache
+# Re-exported: the OCR types used to live in this module
+from ocr_core import OCRBlock, OCRLine, OCRProcessor, OCRResult, OCRWord  # noqa: F401
+
+def bgr_to_qimage(image):
+    """Wrap a BGR (or grayscale) uint8 array as a QImage without converting colours
+    
+    The QImage shares the array's memory: keep the array alive, or copy()
+    the QImage, for as long as it is used.
+    """
+    image = np.ascontiguousarray(image)
+    h, w = image.shape[:2]
+    if image.ndim == 2:
+        return QImage(image.data, w, h, image.strides[0], QImage.Format_Grayscale8)
+    if hasattr(QImage, 'Format_BGR888'):  # Qt 5.14+
+        return QImage(image.data, w, h, image.strides[0], QImage.Format_BGR888)
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return QImage(rgb.data, w, h, rgb.strides[0], QImage.Format_RGB888).copy()
+
 class ImageLabel(QLabel):
-    """Custom QLabel for image display with ROI selection capability"""
+    """Custom QLabel for image display with ROI selection capability
+    
+    The ROI is stored in source-image pixels, so it stays put across camera
+    frames and window resizes. It is painted on top of the pixmap in
+    paintEvent; dragging never re-renders the image. OCR word boxes are a
+    separate transparent layer at display resolution, rendered when the
+    words or the display size change and composited in paintEvent.
+    """
     
     def __init__(self):
         super().__init__()
@@ -24,101 +54,160 @@ class ImageLabel(QLabel):
         # ROI selection variables
         self.roi_start = None
         self.roi_end = None
-        self.roi_rect = None
+        self.roi = None  # (x, y, w, h) in source pixels
         self.drawing = False
         self.original_pixmap = None
+        self.source_size = None
+        self.overlay = None  # OCRColumns in source pixels
+        self._overlay_layer = None  # (size, QImage, pixel buffer)
+        
+    def set_image(self, pixmap, source_size=None, prescaled=False):
+        """Set image and store original for ROI operations
         
-    def set_image(self, pixmap):
-        """Set image and store original for ROI operations"""
+        ``source_size`` is the (width, height) of the image the pixmap shows,
+        when the pixmap is a downscaled preview of it. ``prescaled`` pixmaps
+        were already sized for the label and are shown without rescaling.
+        The ROI is kept while the source size stays the same.
+        """
+        source_size = source_size or (pixmap.width(), pixmap.height())
+        if source_size != self.source_size:
+            self.roi = None
+            self.overlay = self._overlay_layer = None
         self.original_pixmap = pixmap
-        self.setPixmap(pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.source_size = source_size
+        if prescaled:
+            self.setPixmap(pixmap)
+        else:
+            self.setPixmap(pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            
+    def pixmap_rect(self):
+        """Where the displayed pixmap is drawn, in widget coordinates"""
+        pixmap = self.pixmap()
+        if pixmap is None or pixmap.isNull():
+            return None
+        rect = QRect(0, 0, pixmap.width(), pixmap.height())
+        rect.moveCenter(self.contentsRect().center())
+        return rect
+        
+    def widget_to_source(self, point):
+        """Map a widget position to source pixels, clamped to the image"""
+        rect = self.pixmap_rect()
+        source_width, source_height = self.source_size
+        x = (point.x() - rect.x()) * source_width / rect.width()
+        y = (point.y() - rect.y()) * source_height / rect.height()
+        return (min(max(x, 0.0), source_width), min(max(y, 0.0), source_height))
+        
+    def source_to_widget(self, roi):
+        """Map a source-pixel (x, y, w, h) box to a widget QRect"""
+        rect = self.pixmap_rect()
+        source_width, source_height = self.source_size
+        sx, sy = rect.width() / source_width, rect.height() / source_height
+        x, y, w, h = roi
+        return QRect(rect.x() + round(x * sx), rect.y() + round(y * sy), round(w * sx), round(h * sy))
+        
+    def set_overlay(self, columns):
+        """Show OCRColumns (boxes in source pixels) over the image, or None to hide"""
+        self.overlay = columns
+        self._overlay_layer = None
+        self.update()
+        
+    def overlay_image(self, rect):
+        """The overlay rendered for a pixmap drawn at ``rect``, cached per size"""
+        from overlay import render_overlay
+        size = (rect.width(), rect.height())
+        if self._overlay_layer is None or self._overlay_layer[0] != size:
+            source_width, source_height = self.source_size
+            scale = (rect.width() / source_width, rect.height() / source_height)
+            with ocr_metrics.timer('overlay'):
+                layer = render_overlay(self.overlay, size, scale)
+            # Drawing on a zeroed BGRA array gives premultiplied ARGB32 on little-endian hosts
+            image = QImage(layer.data, size[0], size[1], layer.strides[0], QImage.Format_ARGB32_Premultiplied)
+            self._overlay_layer = (size, image, layer)
+        return self._overlay_layer[1]
         
     def mousePressEvent(self, event):
         """Start ROI selection"""
         if event.button() == Qt.LeftButton and self.original_pixmap:
             self.roi_start = event.pos()
+            self.roi_end = event.pos()
             self.drawing = True
             
     def mouseMoveEvent(self, event):
         """Update ROI selection"""
         if self.drawing and self.roi_start:
             self.roi_end = event.pos()
-            self.update_roi_display()
+            self.update()  # repaint only the overlay; the pixmap is unchanged
             
     def mouseReleaseEvent(self, event):
         """Finish ROI selection"""
         if event.button() == Qt.LeftButton and self.drawing:
             self.roi_end = event.pos()
             self.drawing = False
-            self.update_roi_display()
+            (x0, y0), (x1, y1) = self.widget_to_source(self.roi_start), self.widget_to_source(self.roi_end)
+            x, y = int(min(x0, x1)), int(min(y0, y1))
+            w, h = int(round(max(x0, x1))) - x, int(round(max(y0, y1))) - y
+            self.roi = (x, y, w, h) if w >= 2 and h >= 2 else None
+            self.roi_start = self.roi_end = None
+            self.update()
             
-    def update_roi_display(self):
-        """Update display with ROI rectangle"""
-        if not self.original_pixmap or not self.roi_start or not self.roi_end:
+    def paintEvent(self, event):
+        """Draw the pixmap, the OCR overlay, then the ROI or the rectangle being dragged"""
+        super().paintEvent(event)
+        rect = self.pixmap_rect()
+        if rect is None:
             return
-            
-        # Create a copy of the original pixmap
-        pixmap_copy = self.original_pixmap.copy()
-        painter = QPainter(pixmap_copy)
-        
-        # Draw ROI rectangle
-        pen = QPen(Qt.red, 3)
-        painter.setPen(pen)
-        
-        # Calculate rectangle coordinates
-        x1, y1 = self.roi_start.x(), self.roi_start.y()
-        x2, y2 = self.roi_end.x(), self.roi_end.y()
-        
-        # Ensure proper rectangle coordinates
-        left = min(x1, x2)
-        top = min(y1, y2)
-        width = abs(x2 - x1)
-        height = abs(y2 - y1)
-        
-        self.roi_rect = QRect(left, top, width, height)
-        painter.drawRect(self.roi_rect)
+        painter = QPainter(self)
+        if self.overlay is not None and len(self.overlay):
+            painter.drawImage(rect.topLeft(), self.overlay_image(rect))
+        painter.setPen(QPen(Qt.red, 2))
+        if self.drawing and self.roi_start and self.roi_end:
+            painter.drawRect(QRect(self.roi_start, self.roi_end).normalized())
+        elif self.roi:
+            painter.drawRect(self.source_to_widget(self.roi))
         painter.end()
         
-        # Display the updated pixmap
-        self.setPixmap(pixmap_copy.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        
     def get_roi_coordinates(self):
         """Get ROI coordinates relative to original image"""
-        if not self.roi_rect or not self.original_pixmap:
+        if not self.roi or not self.original_pixmap:
             return None
-            
-        # Calculate scaling factors
-        label_size = self.size()
-        pixmap_size = self.original_pixmap.size()
-        
-        scale_x = pixmap_size.width() / label_size.width()
-        scale_y = pixmap_size.height() / label_size.height()
-        
-        # Convert ROI coordinates to original image coordinates
-        x = int(self.roi_rect.x() * scale_x)
-        y = int(self.roi_rect.y() * scale_y)
-        w = int(self.roi_rect.width() * scale_x)
-        h = int(self.roi_rect.height() * scale_y)
-        
-        return (x, y, w, h)
+        return self.roi
         
     def clear_roi(self):
         """Clear ROI selection"""
         self.roi_start = None
         self.roi_end = None
-        self.roi_rect = None
-        if self.original_pixmap:
-            self.setPixmap(self.original_pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.roi = None
+        self.update()
 
 class CameraThread(QThread):
-    """Thread for handling camera input"""
+    """Thread for handling camera input
     
-    frame_ready = pyqtSignal(np.ndarray)
+    Frames are scaled to the display size and wrapped as QImages here, so the
+    GUI thread only turns them into pixmaps. Only the newest frame is kept:
+    ``frame_ready`` fires when one is waiting, the GUI collects it with
+    take_frame(), and frames arriving before then replace it (counted in
+    ``dropped``) instead of queueing up behind a busy GUI.
+    """
+    
+    frame_ready = pyqtSignal()
     
     def __init__(self):
         super().__init__()
         self.camera = None
         self.running = False
+        self.display_size = None
+        self.roi = None
+        self.dropped = 0
+        self._latest = None
+        self._lock = threading.Lock()
+        
+    def set_display_size(self, width, height):
+        """Size previews are scaled to fit (aspect ratio kept)"""
+        self.display_size = (max(1, width), max(1, height))
+        
+    def set_roi(self, roi):
+        """Crop this (x, y, w, h) region out of each frame for OCR, or None"""
+        self.roi = roi
         
     def start_camera(self):
         """Start camera capture"""
@@ -140,60 +229,96 @@ class CameraThread(QThread):
         while self.running and self.camera and self.camera.isOpened():
             ret, frame = self.camera.read()
             if ret:
-                self.frame_ready.emit(frame)
+                self.publish(frame)
             self.msleep(30)  # ~30 FPS
-
-class OCRProcessor:
-    """Class for handling OCR operations"""
-    
-    @staticmethod
-    def preprocess_image(image, enhance_contrast=True, denoise=True, threshold=True):
-        """Preprocess image for better OCR results"""
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-            
-        # Enhance contrast
-        if enhance_contrast:
-            gray = cv2.equalizeHist(gray)
-            
-        # Denoise
-        if denoise:
-            gray = cv2.medianBlur(gray, 3)
             
-        # Threshold
-        if threshold:
-            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    def preview(self, frame):
+        """Scale a frame to fit the display size and wrap it as a QImage"""
+        h, w = frame.shape[:2]
+        if self.display_size:
+            scale = min(self.display_size[0] / w, self.display_size[1] / h)
+            if abs(scale - 1.0) > 0.01:
+                size = (max(1, int(w * scale)), max(1, int(h * scale)))
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                frame = cv2.resize(frame, size, interpolation=interpolation)
+        # Own the pixels: the array may be a view into the captured frame
+        return bgr_to_qimage(frame).copy()
+        
+    def publish(self, frame):
+        """Offer a captured frame to the GUI, replacing any it has not taken yet"""
+        image = self.preview(frame)
+        roi, region = self.roi, None
+        if roi:
+            # A compact copy, so OCR and change detection touch only the ROI
+            x, y, w, h = roi
+            region = np.ascontiguousarray(frame[y:y+h, x:x+w])
+        with self._lock:
+            pending = self._latest is not None
+            if pending:
+                self.dropped += 1
+                ocr_metrics.inc('camera_frames_dropped')
+            self._latest = (frame, image, roi, region)
+        if not pending:
+            self.frame_ready.emit()
             
-        return gray
+    def take_frame(self):
+        """Return the newest (frame, preview QImage, roi, roi pixels), or None if already taken"""
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+class OCRTaskSignals(QObject):
+    """Signals used by OCRTask to report back to the GUI thread"""
+    
+    finished = pyqtSignal(int, str, object)  # request id, text, OCRResult
+    failed = pyqtSignal(int, str)  # request id, error message
+    profiled = pyqtSignal(str)  # path of the saved profile
+
+class OCRTask(QRunnable):
+    """Preprocess and OCR one image on a QThreadPool worker
+    
+    Cancellation is cooperative: the flag is checked before and after OCR, so
+    a cancelled task never emits, but a Tesseract pass already running finishes.
+    """
+    
+    def __init__(self, request_id, image, roi=None, preprocess_options=None,
+                 detect_regions=False, cache=None, profile=None):
+        super().__init__()
+        self.request_id = request_id
+        self.image = image
+        self.roi = roi
+        # PreprocessPipeline.from_options() keywords; None skips preprocessing
+        self.preprocess_options = preprocess_options
+        self.detect_regions = detect_regions
+        self.cache = cache
+        # With a path, the OCR call is run under cProfile and saved there
+        self.profile = profile
+        self.signals = OCRTaskSignals()
+        self.cancelled = threading.Event()
+        
+    def cancel(self):
+        """Ask the task to stop at the next stage boundary"""
+        self.cancelled.set()
         
-    @staticmethod
-    def extract_text(image, roi=None, preprocess=True):
-        """Extract text from image using PyTesseract"""
+    def run(self):
+        """Worker thread entry point"""
         try:
-            # Apply ROI if specified
-            if roi:
-                x, y, w, h = roi
-                image = image[y:y+h, x:x+w]
-                
-            # Preprocess image
-            if preprocess:
-                processed_image = OCRProcessor.preprocess_image(image)
+            if self.cancelled.is_set():
+                return
+            args = (self.image, self.roi, self.preprocess_options, self.detect_regions)
+            if self.profile:
+                (text, ocr_result), report = ocr_metrics.profile_call(OCRProcessor.ocr, *args,
+                                                                      output=self.profile)
+                with open(self.profile + '.txt', 'w', encoding='utf-8') as handle:
+                    handle.write(report)
+                self.signals.profiled.emit(self.profile)
             else:
-                processed_image = image
-                
-            # Extract text
-            text = pytesseract.image_to_string(processed_image, config='--psm 6')
-            
-            # Get bounding boxes for overlay
-            data = pytesseract.image_to_data(processed_image, output_type=pytesseract.Output.DICT)
-            
-            return text.strip(), data
-            
+                text, ocr_result = OCRProcessor.ocr(*args, cache=self.cache)
+            if not self.cancelled.is_set():
+                self.signals.finished.emit(self.request_id, text, ocr_result)
         except Exception as e:
-            return f"OCR Error: {str(e)}", None
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(self.request_id, str(e))
 
 class MainWindow(QMainWindow):
     """Main application window"""
@@ -208,6 +333,24 @@ class MainWindow(QMainWindow):
         self.camera_thread = CameraThread()
         self.camera_active = False
         
+        # Background OCR: only the newest request is allowed to report back
+        self.ocr_pool = QThreadPool()
+        self.ocr_pool.setMaxThreadCount(1)
+        self.ocr_request_id = 0
+        self.ocr_task = None
+        self.ocr_roi = None
+        self.ocr_live = False
+        self.live_ocr = LiveOCRController()
+        # Re-running OCR on the same pixels and settings is answered from here;
+        # set OCR_CACHE_DIR to also keep results on disk between sessions
+        self.ocr_cache = OCRCache(disk_dir=os.environ.get('OCR_CACHE_DIR'))
+        
+        # Status bar readout of recent per-stage timings and display FPS
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_frames = 0
+        self.stats_time = time.perf_counter()
+        
         # Setup UI
         self.setup_ui()
         self.setup_connections()
@@ -251,6 +394,8 @@ class MainWindow(QMainWindow):
         self.camera_button = QPushButton("Start Camera")
         self.clear_roi_button = QPushButton("Clear ROI")
         self.ocr_button = QPushButton("Run OCR")
+        self.cancel_ocr_button = QPushButton("Cancel OCR")
+        self.cancel_ocr_button.setEnabled(False)
         
         # Style buttons
         button_style = """
@@ -272,7 +417,8 @@ class MainWindow(QMainWindow):
             }
         """
         
-        for button in [self.load_button, self.camera_button, self.clear_roi_button, self.ocr_button]:
+        for button in [self.load_button, self.camera_button, self.clear_roi_button, self.ocr_button,
+                       self.cancel_ocr_button]:
             button.setStyleSheet(button_style)
             button_layout.addWidget(button)
             
@@ -325,6 +471,21 @@ class MainWindow(QMainWindow):
         self.threshold_cb.setChecked(True)
         preprocess_layout.addWidget(self.threshold_cb)
         
+        self.clahe_cb = QCheckBox("Local Contrast (CLAHE)")
+        self.clahe_cb.setToolTip("Replaces global contrast enhancement; better under uneven lighting")
+        preprocess_layout.addWidget(self.clahe_cb)
+        
+        self.adaptive_threshold_cb = QCheckBox("Adaptive Threshold")
+        self.adaptive_threshold_cb.setToolTip("Replaces the global threshold; copes with shadows")
+        preprocess_layout.addWidget(self.adaptive_threshold_cb)
+        
+        self.deskew_cb = QCheckBox("Deskew")
+        preprocess_layout.addWidget(self.deskew_cb)
+        
+        self.rescale_cb = QCheckBox("Rescale Text to ~300 DPI")
+        self.rescale_cb.setToolTip("Resize so text is the size Tesseract reads best and fastest")
+        preprocess_layout.addWidget(self.rescale_cb)
+        
         settings_layout.addWidget(preprocess_group)
         
         # OCR options
@@ -334,12 +495,30 @@ class MainWindow(QMainWindow):
         self.roi_only_cb = QCheckBox("Process ROI Only")
         ocr_layout.addWidget(self.roi_only_cb)
         
+        self.detect_regions_cb = QCheckBox("Auto-detect Text Regions")
+        ocr_layout.addWidget(self.detect_regions_cb)
+        
         self.show_overlay_cb = QCheckBox("Show Text Overlay")
         self.show_overlay_cb.setChecked(True)
         ocr_layout.addWidget(self.show_overlay_cb)
         
+        self.live_ocr_cb = QCheckBox("Live OCR on Camera")
+        ocr_layout.addWidget(self.live_ocr_cb)
+        
         settings_layout.addWidget(ocr_group)
         
+        # Diagnostics
+        diagnostics_group = QGroupBox("Diagnostics")
+        diagnostics_layout = QVBoxLayout(diagnostics_group)
+        
+        self.show_timings_cb = QCheckBox("Show Timings in Status Bar")
+        diagnostics_layout.addWidget(self.show_timings_cb)
+        
+        self.profile_next_cb = QCheckBox("Profile Next OCR Run")
+        diagnostics_layout.addWidget(self.profile_next_cb)
+        
+        settings_layout.addWidget(diagnostics_group)
+        
         settings_layout.addStretch()
         
         tab_widget.addTab(settings_tab, "Settings")
@@ -352,6 +531,10 @@ class MainWindow(QMainWindow):
         self.camera_button.clicked.connect(self.toggle_camera)
         self.clear_roi_button.clicked.connect(self.clear_roi)
         self.ocr_button.clicked.connect(self.run_ocr)
+        self.cancel_ocr_button.clicked.connect(self.cancel_ocr)
+        self.live_ocr_cb.toggled.connect(self.toggle_live_ocr)
+        self.show_timings_cb.toggled.connect(self.toggle_timings)
+        self.stats_timer.timeout.connect(self.update_status_timings)
         
         # Camera thread connection
         self.camera_thread.frame_ready.connect(self.update_camera_frame)
@@ -367,26 +550,21 @@ class MainWindow(QMainWindow):
             # Load image with OpenCV
             self.current_image = cv2.imread(file_path)
             if self.current_image is not None:
+                self.image_label.set_overlay(None)
                 self.display_image(self.current_image)
             else:
                 QMessageBox.warning(self, "Error", "Could not load image file.")
                 
     def display_image(self, cv_image):
         """Display OpenCV image in QLabel"""
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
-        
-        # Convert to QImage
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        
-        # Convert to QPixmap and display
-        pixmap = QPixmap.fromImage(qt_image)
-        self.image_label.set_image(pixmap)
+        with ocr_metrics.timer('display'):
+            # QPixmap.fromImage copies, so the QImage may borrow the array's memory
+            pixmap = QPixmap.fromImage(bgr_to_qimage(cv_image))
+            self.image_label.set_image(pixmap)
         
     def toggle_camera(self):
         """Toggle camera on/off"""
+        self.image_label.set_overlay(None)
         if not self.camera_active:
             if self.camera_thread.start_camera():
                 self.camera_active = True
@@ -398,95 +576,187 @@ class MainWindow(QMainWindow):
             self.camera_active = False
             self.camera_button.setText("Start Camera")
             
-    def update_camera_frame(self, frame):
-        """Update display with new camera frame"""
+    def update_camera_frame(self):
+        """Update display with the newest camera frame"""
+        latest = self.camera_thread.take_frame()
+        if latest is None:
+            return
+        frame, preview, roi, region = latest
         self.current_image = frame
-        self.display_image(frame)
+        with ocr_metrics.timer('display'):
+            self.image_label.set_image(QPixmap.fromImage(preview), (frame.shape[1], frame.shape[0]),
+                                       prescaled=True)
+            if self.image_label.overlay is not None:
+                self.image_label.set_overlay(None)  # word boxes belong to an older frame
+        self.stats_frames += 1
+        # Follow label resizes and ROI edits for the next frames
+        self.camera_thread.set_display_size(self.image_label.width(), self.image_label.height())
+        self.camera_thread.set_roi(self.image_label.get_roi_coordinates() if self.roi_only_cb.isChecked() else None)
+        
+        if self.live_ocr_cb.isChecked() and (self.ocr_task is None or self.ocr_live):
+            if region is None:
+                roi, region = None, frame
+            if region.size and self.live_ocr.offer(region):
+                self.start_ocr_task(region, roi, live=True, cropped=True)
+                self.live_ocr.submitted()
         
     def clear_roi(self):
         """Clear ROI selection"""
         self.image_label.clear_roi()
         
     def run_ocr(self):
-        """Run OCR on current image"""
+        """Start OCR on current image in the background"""
         if self.current_image is None:
             QMessageBox.warning(self, "Error", "No image loaded.")
             return
             
-        # Show progress
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
-        
         # Get ROI if selected
         roi = None
         if self.roi_only_cb.isChecked():
             roi = self.image_label.get_roi_coordinates()
             if roi is None:
                 QMessageBox.warning(self, "Error", "No ROI selected. Please select a region or uncheck 'Process ROI Only'.")
-                self.progress_bar.setVisible(False)
                 return
                 
-        # Get preprocessing options
-        enhance_contrast = self.enhance_contrast_cb.isChecked()
-        denoise = self.denoise_cb.isChecked()
-        threshold = self.threshold_cb.isChecked()
-        
-        # Process image
-        image_copy = self.current_image.copy()
-        
-        # Apply preprocessing
-        if enhance_contrast or denoise or threshold:
-            processed_image = OCRProcessor.preprocess_image(
-                image_copy, enhance_contrast, denoise, threshold
-            )
-        else:
-            processed_image = image_copy
-            
-        # Extract text
-        text, ocr_data = OCRProcessor.extract_text(processed_image, roi, preprocess=False)
+        self.start_ocr_task(self.current_image, roi)
+        
+        # Show progress
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)  # Indeterminate progress
+        self.cancel_ocr_button.setEnabled(True)
         
+    def start_ocr_task(self, image, roi=None, live=False, cropped=False):
+        """Submit an OCR request, superseding any earlier one
+        
+        With ``cropped`` the image already holds just the ROI pixels; ``roi``
+        then only places the results on the full frame.
+        """
+        # Newest request wins: drop anything queued or running
+        self.cancel_ocr()
+        if not live:
+            self.image_label.set_overlay(None)  # boxes from the previous run would be stale
+        self.ocr_request_id += 1
+        self.ocr_roi = roi
+        self.ocr_live = live
+        
+        # Frames and loaded images are replaced, never modified in place, so
+        # the worker can read them without a copy
+        profile = None
+        if self.profile_next_cb.isChecked():
+            # One-shot: profile this request only (the cache is bypassed so OCR really runs)
+            self.profile_next_cb.setChecked(False)
+            profile = os.path.join(tempfile.gettempdir(), time.strftime("ocr-profile-%Y%m%d-%H%M%S.prof"))
+        task = OCRTask(
+            self.ocr_request_id, image, None if cropped else roi,
+            self.preprocess_options(),
+            self.detect_regions_cb.isChecked(),
+            cache=self.ocr_cache,
+            profile=profile,
+        )
+        task.signals.finished.connect(self.on_ocr_finished)
+        task.signals.failed.connect(self.on_ocr_failed)
+        task.signals.profiled.connect(self.on_ocr_profiled)
+        self.ocr_task = task
+        self.ocr_pool.start(task)
+        
+    def preprocess_options(self):
+        """Preprocessing stages selected in Settings, or None for none"""
+        options = {
+            'enhance_contrast': self.enhance_contrast_cb.isChecked(),
+            'clahe': self.clahe_cb.isChecked(),
+            'denoise': self.denoise_cb.isChecked(),
+            'threshold': self.threshold_cb.isChecked(),
+            'adaptive_threshold': self.adaptive_threshold_cb.isChecked(),
+            'deskew': self.deskew_cb.isChecked(),
+            'rescale': self.rescale_cb.isChecked(),
+        }
+        return options if any(options.values()) else None
+        
+    def cancel_ocr(self):
+        """Cancel the pending OCR request, if any"""
+        self.ocr_pool.clear()
+        if self.ocr_task is not None:
+            self.ocr_task.cancel()
+            self.ocr_task = None
+            if self.ocr_live:
+                self.live_ocr.failed()
+        self.ocr_request_id += 1
+        self.progress_bar.setVisible(False)
+        self.cancel_ocr_button.setEnabled(False)
+        
+    def on_ocr_finished(self, request_id, text, ocr_result):
+        """Show results from a background OCR task"""
+        if request_id != self.ocr_request_id:
+            return  # superseded by a newer request
+        self.ocr_task = None
+        self.progress_bar.setVisible(False)
+        self.cancel_ocr_button.setEnabled(False)
+        
+        if self.ocr_live:
+            # Live results are voted across passes; frames redraw too often for an overlay
+            self.text_output.setPlainText(self.live_ocr.completed(text))
+            return
+            
         # Display results
         self.text_output.setPlainText(text)
         
         # Show overlay if enabled
-        if self.show_overlay_cb.isChecked() and ocr_data:
-            self.show_text_overlay(ocr_data, roi)
+        if self.show_overlay_cb.isChecked() and ocr_result:
+            self.show_text_overlay(ocr_result, self.ocr_roi)
             
-        # Hide progress
-        self.progress_bar.setVisible(False)
-        
-    def show_text_overlay(self, ocr_data, roi=None):
-        """Show text overlay on image"""
-        if not self.current_image is not None:
+    def on_ocr_failed(self, request_id, message):
+        """Report an error from a background OCR task"""
+        if request_id != self.ocr_request_id:
             return
+        self.ocr_task = None
+        self.progress_bar.setVisible(False)
+        self.cancel_ocr_button.setEnabled(False)
+        if self.ocr_live:
+            self.live_ocr.failed()
+        self.text_output.setPlainText(f"OCR Error: {message}")
+        
+    def on_ocr_profiled(self, path):
+        """Point at a saved OCR profile"""
+        self.statusBar().showMessage(f"Profile saved to {path} (summary in {path}.txt)", 10000)
+        
+    def toggle_timings(self, enabled):
+        """Start or stop the status bar timing readout"""
+        if enabled:
+            self.stats_frames = 0
+            self.stats_time = time.perf_counter()
+            self.stats_timer.start()
+            self.update_status_timings()
+        else:
+            self.stats_timer.stop()
+            self.statusBar().clearMessage()
             
-        # Create image copy for overlay
-        overlay_image = self.current_image.copy()
-        
+    def update_status_timings(self):
+        """Show recent per-stage milliseconds and the display frame rate"""
+        now = time.perf_counter()
+        fps = self.stats_frames / max(1e-6, now - self.stats_time)
+        self.stats_frames, self.stats_time = 0, now
+        recent = ocr_metrics.registry.recent_ms()
+        stages = ['ocr', 'preprocess', 'tesseract', 'detect_regions', 'overlay', 'display']
+        parts = [f"{stage} {recent[stage]:.1f} ms" for stage in stages if stage in recent]
+        if self.camera_active:
+            parts.append(f"{fps:.1f} FPS")
+        self.statusBar().showMessage(" | ".join(parts) or "No timings yet")
+        
+    def toggle_live_ocr(self, enabled):
+        """Start or stop continuous OCR on camera frames"""
+        self.live_ocr.reset()
+        if not enabled and self.ocr_live:
+            self.cancel_ocr()
+            
+    def show_text_overlay(self, ocr_result, roi=None):
+        """Show word boxes and labels over the image on a transparent layer"""
+        if self.current_image is None:
+            return
+        columns = ocr_result.columns().filter(min_conf=30)  # Confidence threshold
         # Adjust coordinates if ROI was used
-        offset_x, offset_y = 0, 0
         if roi:
-            offset_x, offset_y = roi[0], roi[1]
-            
-        # Draw bounding boxes around detected text
-        for i in range(len(ocr_data['text'])):
-            if int(ocr_data['conf'][i]) > 30:  # Confidence threshold
-                x = ocr_data['left'][i] + offset_x
-                y = ocr_data['top'][i] + offset_y
-                w = ocr_data['width'][i]
-                h = ocr_data['height'][i]
-                
-                # Draw rectangle
-                cv2.rectangle(overlay_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                
-                # Draw text
-                text = ocr_data['text'][i].strip()
-                if text:
-                    cv2.putText(overlay_image, text, (x, y - 5), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                              
-        # Display overlay
-        self.display_image(overlay_image)
+            columns = columns.offset(roi[0], roi[1])
+        self.image_label.set_overlay(columns)
 
 def main():
     """Main application entry point"""
@@ -494,6 +764,7 @@ def main():
     
     # Check if Tesseract is available
     try:
+        import pytesseract
         pytesseract.get_tesseract_version()
     except Exception as e:
         QMessageBox.critical(None, "Error", 
@@ -0,0 +1,162 @@
+"""
+Content-addressed cache for OCR results.
+
+Keys hash the (ROI-cropped) pixels together with every setting that changes
+the output: preprocessing flags, page segmentation mode, language, extra
+Tesseract config and the engine backend, so a disk store shared between
+pytesseract and tesserocr runs never hands one the other's results. Values are JSON-serializable dicts (``OCRResult.to_dict``).
+A small in-memory LRU sits in front of an optional on-disk store that is
+shared between processes and trimmed to a byte budget, oldest-used first.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import ocr_metrics
+
+
+def make_key(image, **settings):
+    """Hash an image's pixels and the OCR settings into a hex key"""
+    import numpy as np
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.shape}|{image.dtype}|".encode('ascii'))
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(memoryview(image).cast('B'))
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """Two-level (memory LRU + disk) cache of OCR results"""
+
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    make_key = staticmethod(make_key)
+
+    def get(self, key):
+        """Return the cached payload for ``key``, or None"""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                ocr_metrics.inc('cache_hits')
+                return payload
+
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                ocr_metrics.inc('cache_misses')
+                return None
+            self.hits += 1
+            ocr_metrics.inc('cache_hits')
+            self._remember(key, payload)
+        return payload
+
+    def put(self, key, payload):
+        """Store a JSON-serializable payload under ``key``"""
+        with self._lock:
+            self._remember(key, payload)
+        if self.disk_dir:
+            self._write_disk(key, payload)
+
+    def clear(self):
+        """Drop memory entries (the disk store is left alone)"""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, payload):
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.json')
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return payload
+
+    def _write_disk(self, key, payload):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            json.dump(payload, handle, separators=(',', ':'))
+        try:
+            replaced = os.path.getsize(path)  # overwriting a key frees its old file
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += size - replaced
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self.evict_disk()
+
+    def _scan_disk_bytes(self):
+        total = 0
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    total += os.path.getsize(os.path.join(root, name))
+        return total
+
+    def evict_disk(self, target_fraction=0.8):
+        """Delete least recently used files until under ``target_fraction`` of the budget"""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * target_fraction
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+        return total
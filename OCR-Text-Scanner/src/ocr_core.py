@@ -0,0 +1,552 @@
+"""
+Headless OCR: result types and OCRProcessor.
+
+Nothing here imports Qt, and the heavy imaging libraries (OpenCV, and the
+preprocessing, region and tiling modules built on it) are imported inside
+the functions that need them, so servers, batch workers and scripts pay only
+for what they use. main.py re-exports these names for the GUI.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+
+import ocr_metrics
+from ocr_engines import get_default_pool
+
+# Pages above this many pixels are OCRed in bands (A4 at 600 DPI is ~35 MP)
+DEFAULT_TILE_PIXELS = 30_000_000
+
+def _recognize(engine, image, psm, lang):
+    """engine.recognize, timed as the 'tesseract' stage"""
+    with ocr_metrics.timer('tesseract'):
+        return engine.recognize(image, psm=psm, lang=lang)
+
+def _backend(engine, pool):
+    """Name of the backend that will run: ``engine``'s, else the pool's"""
+    if engine is not None:
+        return getattr(engine, 'name', type(engine).__name__)
+    return (pool or get_default_pool()).name
+
+_executor = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+def _shared_executor(size):
+    """Process-wide threads for region and band OCR, grown to at least ``size``
+    
+    The threads outlive each call, so every one keeps its
+    OCRProcessor.get_pipeline() buffers from page to page.
+    """
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is None or _executor_size < size:
+            # Callers still holding the old executor finish on it; its threads exit once it is dropped
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='ocr-parallel')
+            _executor_size = size
+        return _executor
+
+def _parallel_map(function, items, workers, size):
+    """[function(item) for item in items] on at most ``workers`` shared threads"""
+    lanes = max(1, min(workers, len(items)))
+    results = [None] * len(items)
+    indices = iter(range(len(items)))
+    lock = threading.Lock()
+    
+    def lane(_):
+        while True:
+            with lock:
+                i = next(indices, None)
+            if i is None:
+                return
+            results[i] = function(items[i])
+            
+    list(_shared_executor(size).map(lane, range(lanes)))
+    return results
+
+@dataclass
+class OCRWord:
+    """A recognized word with its box in processed-image coordinates"""
+    text: str
+    conf: float
+    left: int
+    top: int
+    width: int
+    height: int
+    block_num: int = 0
+    par_num: int = 0
+    line_num: int = 0
+
+    @property
+    def box(self):
+        return (self.left, self.top, self.width, self.height)
+
+@dataclass
+class OCRLine:
+    """Words sharing a Tesseract block/paragraph/line number"""
+    words: list
+    block_num: int = 0
+    par_num: int = 0
+    line_num: int = 0
+
+    @property
+    def text(self):
+        return " ".join(word.text for word in self.words)
+
+@dataclass
+class OCRBlock:
+    """A Tesseract text block made of lines"""
+    lines: list
+    block_num: int = 0
+
+    @property
+    def text(self):
+        paragraphs = []
+        for line in self.lines:
+            if paragraphs and paragraphs[-1][0] == line.par_num:
+                paragraphs[-1][1].append(line.text)
+            else:
+                paragraphs.append((line.par_num, [line.text]))
+        return "\n\n".join("\n".join(lines) for _, lines in paragraphs)
+
+class OCRColumns:
+    """Words as parallel NumPy arrays, for filtering, sorting and drawing without per-word Python
+    
+    ``boxes`` is (N, 4) int32 x, y, w, h; ``conf`` float32; ``block``,
+    ``par`` and ``line`` int32 Tesseract numbering; ``text`` an object array.
+    """
+    
+    def __init__(self, boxes, conf, block, par, line, text):
+        import numpy as np
+        self.boxes = np.asarray(boxes, np.int32).reshape(-1, 4)
+        self.conf = np.asarray(conf, np.float32)
+        self.block = np.asarray(block, np.int32)
+        self.par = np.asarray(par, np.int32)
+        self.line = np.asarray(line, np.int32)
+        self.text = np.asarray(text, object)
+        
+    def __len__(self):
+        return len(self.conf)
+        
+    @classmethod
+    def from_words(cls, words):
+        rows = [(w.left, w.top, w.width, w.height, w.conf, w.block_num, w.par_num, w.line_num) for w in words]
+        if not rows:
+            return cls([], [], [], [], [], [])
+        left, top, width, height, conf, block, par, line = zip(*rows)
+        return cls(list(zip(left, top, width, height)), conf, block, par, line, [w.text for w in words])
+        
+    @classmethod
+    def from_data(cls, data):
+        """Build straight from image_to_data columns, keeping non-empty words"""
+        import numpy as np
+        text = np.char.strip(np.asarray(data['text'], dtype=str))
+        keep = (np.asarray(data['level'], np.int32) == 5) & (text != '')
+        
+        def column(key, dtype):
+            return np.asarray(data[key]).astype(dtype)[keep]
+            
+        boxes = np.stack([column(key, np.int32) for key in ('left', 'top', 'width', 'height')], axis=1)
+        return cls(boxes, column('conf', np.float32), column('block_num', np.int32),
+                   column('par_num', np.int32), column('line_num', np.int32), text[keep].astype(object))
+                   
+    def take(self, index):
+        """Subset (boolean mask or index array), in the given order"""
+        return OCRColumns(self.boxes[index], self.conf[index], self.block[index], self.par[index],
+                          self.line[index], self.text[index])
+                          
+    def filter(self, min_conf=None, region=None):
+        """Words above ``min_conf`` whose centre lies in ``region`` (x, y, w, h)"""
+        import numpy as np
+        keep = np.ones(len(self), bool)
+        if min_conf is not None:
+            keep &= self.conf > min_conf
+        if region is not None:
+            x, y, w, h = region
+            cx = self.boxes[:, 0] + self.boxes[:, 2] / 2.0
+            cy = self.boxes[:, 1] + self.boxes[:, 3] / 2.0
+            keep &= (cx >= x) & (cx < x + w) & (cy >= y) & (cy < y + h)
+        return self.take(keep)
+        
+    def reading_order(self):
+        """Sorted by block, paragraph, line, then left edge"""
+        import numpy as np
+        return self.take(np.lexsort((self.boxes[:, 0], self.line, self.par, self.block)))
+        
+    def offset(self, dx, dy):
+        """Boxes shifted by (dx, dy), e.g. from ROI to image coordinates"""
+        columns = self.take(slice(None))
+        columns.boxes = self.boxes + (dx, dy, 0, 0)
+        return columns
+        
+    def to_words(self):
+        return [OCRWord(text, float(conf), x, y, w, h, block, par, line)
+                for text, conf, (x, y, w, h), block, par, line in
+                zip(self.text, self.conf.tolist(), self.boxes.tolist(), self.block.tolist(),
+                    self.par.tolist(), self.line.tolist())]
+
+@dataclass
+class OCRResult:
+    """Structured output of one Tesseract pass"""
+    words: list = field(default_factory=list)
+    lines: list = field(default_factory=list)
+    blocks: list = field(default_factory=list)
+
+    @property
+    def text(self):
+        """Plain text laid out like image_to_string: lines, blank line between paragraphs"""
+        return "\n\n".join(block.text for block in self.blocks).strip()
+
+    @classmethod
+    def from_data(cls, data):
+        """Build from pytesseract's image_to_data dict (or equivalent TSV columns)"""
+        words = []
+        for i in range(len(data['text'])):
+            text = str(data['text'][i]).strip()
+            if int(data['level'][i]) != 5 or not text:
+                continue
+            words.append(OCRWord(
+                text=text,
+                conf=float(data['conf'][i]),
+                left=int(data['left'][i]),
+                top=int(data['top'][i]),
+                width=int(data['width'][i]),
+                height=int(data['height'][i]),
+                block_num=int(data['block_num'][i]),
+                par_num=int(data['par_num'][i]),
+                line_num=int(data['line_num'][i]),
+            ))
+        return cls.from_words(words)
+        
+    @classmethod
+    def from_words(cls, words):
+        """Group words into lines and blocks by their Tesseract numbering"""
+        result = cls()
+        line_index = {}
+        block_index = {}
+        for word in words:
+            result.words.append(word)
+
+            line_key = (word.block_num, word.par_num, word.line_num)
+            line = line_index.get(line_key)
+            if line is None:
+                line = OCRLine([], word.block_num, word.par_num, word.line_num)
+                line_index[line_key] = line
+                result.lines.append(line)
+                block = block_index.get(word.block_num)
+                if block is None:
+                    block = OCRBlock([], word.block_num)
+                    block_index[word.block_num] = block
+                    result.blocks.append(block)
+                block.lines.append(line)
+            line.words.append(word)
+        return result
+
+    def columns(self):
+        """The words as OCRColumns, built once per result"""
+        columns = self.__dict__.get('_columns')
+        if columns is None or len(columns) != len(self.words):
+            columns = self.__dict__['_columns'] = OCRColumns.from_words(self.words)
+        return columns
+        
+    def to_dict(self):
+        """JSON-serializable form, e.g. for the result cache"""
+        return {'words': [asdict(word) for word in self.words]}
+        
+    @classmethod
+    def from_dict(cls, payload):
+        return cls.from_words([OCRWord(**word) for word in payload['words']])
+        
+    def unwarp(self, transform):
+        """Map word boxes back through a preprocessing transform (e.g. deskew, rescale)"""
+        from preprocessing import map_box_back
+        words = []
+        for word in self.words:
+            left, top, width, height = map_box_back(word.box, transform)
+            words.append(replace(word, left=left, top=top, width=width, height=height))
+        return OCRResult.from_words(words)
+        
+    @classmethod
+    def merge(cls, parts):
+        """Combine (OCRResult, (dx, dy)) parts, in order, into one result
+        
+        Word boxes are shifted by each part's offset and blocks are renumbered
+        so they stay distinct across parts.
+        """
+        merged = cls()
+        block_num = 0
+        for result, (dx, dy) in parts:
+            for block in result.blocks:
+                block_num += 1
+                new_block = OCRBlock([], block_num)
+                for line in block.lines:
+                    new_line = OCRLine([], block_num, line.par_num, line.line_num)
+                    for word in line.words:
+                        new_word = replace(word, left=word.left + dx, top=word.top + dy,
+                                           block_num=block_num)
+                        new_line.words.append(new_word)
+                        merged.words.append(new_word)
+                    new_block.lines.append(new_line)
+                    merged.lines.append(new_line)
+                merged.blocks.append(new_block)
+        return merged
+
+class OCRProcessor:
+    """Class for handling OCR operations"""
+    
+    _pipelines = threading.local()
+    
+    @staticmethod
+    def get_pipeline(**options):
+        """This thread's PreprocessPipeline for ``options``, kept so its buffers are reused"""
+        pipelines = getattr(OCRProcessor._pipelines, 'by_options', None)
+        if pipelines is None:
+            pipelines = OCRProcessor._pipelines.by_options = {}
+        key = tuple(sorted(options.items()))
+        pipeline = pipelines.get(key)
+        if pipeline is None:
+            from preprocessing import PreprocessPipeline
+            pipeline = pipelines[key] = PreprocessPipeline.from_options(**options)
+        return pipeline
+        
+    @staticmethod
+    def preprocess_image(image, enhance_contrast=True, denoise=True, threshold=True, **options):
+        """Preprocess image for better OCR results
+        
+        Further options (deskew, clahe, adaptive_threshold, rescale,
+        source_dpi) enable more PreprocessPipeline stages. Deskew and rescale
+        move the text, so callers that need word boxes should run
+        get_pipeline() themselves and unwarp the result with its transform.
+        """
+        pipeline = OCRProcessor.get_pipeline(enhance_contrast=enhance_contrast, denoise=denoise,
+                                             threshold=threshold, **options)
+        return pipeline.run(image)
+        
+    @staticmethod
+    def extract_text(image, roi=None, preprocess=True, engine=None, psm=6, lang='eng',
+                     cache=None, cache_settings=None, pool=None):
+        """Extract text and an OCRResult from image with a single Tesseract pass
+        
+        ``engine`` is an OCREngine to use; by default one is borrowed from
+        ``pool`` (the shared engine pool unless given). With an OCRCache, results are looked up by the
+        cropped pixels and settings before running Tesseract;
+        ``cache_settings`` adds whatever else produced ``image`` (e.g. the
+        preprocessing flags a caller already applied).
+        """
+        try:
+            # Apply ROI if specified
+            if roi:
+                x, y, w, h = roi
+                image = image[y:y+h, x:x+w]
+                
+            if cache is not None:
+                key = cache.make_key(image, mode='page', preprocess=preprocess, psm=psm, lang=lang,
+                                     backend=_backend(engine, pool), **(cache_settings or {}))
+                cached = cache.get(key)
+                if cached is not None:
+                    result = OCRResult.from_dict(cached)
+                    return result.text, result
+                    
+            # Preprocess image
+            if preprocess:
+                processed_image = OCRProcessor.preprocess_image(image)
+            else:
+                processed_image = image
+                
+            # One recognition pass gives both the words and their boxes
+            if engine is None:
+                with (pool or get_default_pool()).acquire() as pooled_engine:
+                    data = _recognize(pooled_engine, processed_image, psm, lang)
+            else:
+                data = _recognize(engine, processed_image, psm, lang)
+            result = OCRResult.from_data(data)
+            
+            if cache is not None:
+                cache.put(key, result.to_dict())
+            return result.text, result
+            
+        except Exception as e:
+            return f"OCR Error: {str(e)}", None
+            
+    @staticmethod
+    def extract_text_regions(image, roi=None, preprocess_options=None, regions=None,
+                             max_workers=None, lang='eng', cache=None, pool=None):
+        """Detect text blocks and OCR each one in parallel
+        
+        Each block is preprocessed on its own (``preprocess_options`` are the
+        preprocess_image flags; None skips preprocessing) and recognized with a
+        PSM suited to its line count on an engine from ``pool`` (default: the
+        shared pool). Results are merged in reading order with boxes in the
+        coordinates of ``image`` (or of the ROI crop).
+        """
+        import cv2
+        from text_regions import detect_text_regions, psm_for_region
+        
+        try:
+            if roi:
+                x, y, w, h = roi
+                image = image[y:y+h, x:x+w]
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            if cache is not None:
+                key = cache.make_key(gray, mode='regions', preprocess=preprocess_options,
+                                     regions=regions, lang=lang, backend=_backend(None, pool))
+                cached = cache.get(key)
+                if cached is not None:
+                    result = OCRResult.from_dict(cached)
+                    return result.text, result
+            if regions is None:
+                with ocr_metrics.timer('detect_regions'):
+                    regions = detect_text_regions(gray)
+            if not regions:
+                return "", OCRResult()
+                
+            pool = pool or get_default_pool()
+            
+            def recognize_region(region):
+                rx, ry, rw, rh = region
+                crop = gray[ry:ry+rh, rx:rx+rw]
+                psm = psm_for_region(crop)
+                transform = None
+                if preprocess_options is not None:
+                    pipeline = OCRProcessor.get_pipeline(**preprocess_options)
+                    crop = pipeline.run(crop)
+                    transform = pipeline.transform
+                with pool.acquire() as engine:
+                    result = OCRResult.from_data(_recognize(engine, crop, psm, lang))
+                return result if transform is None else result.unwarp(transform)
+                    
+            results = _parallel_map(recognize_region, regions, max_workers or pool.size, pool.size)
+                
+            result = OCRResult.merge(zip(results, [(rx, ry) for rx, ry, _, _ in regions]))
+            if cache is not None:
+                cache.put(key, result.to_dict())
+            return result.text, result
+            
+        except Exception as e:
+            return f"OCR Error: {str(e)}", None
+
+    @staticmethod
+    def extract_text_tiled(image, roi=None, preprocess_options=None, band_height=2048, overlap=64,
+                           engine=None, max_workers=None, psm=6, lang='eng', cache=None, pool=None):
+        """OCR a very large page as overlapping horizontal bands, in parallel
+        
+        Bands are cut along whitespace (see tiling.plan_bands), preprocessed
+        and recognized independently, then stitched with boxes in page
+        coordinates. ``image`` may be a np.memmap; only band-sized copies are
+        made. With ``engine`` the bands run one after another on it, otherwise
+        in parallel on ``pool`` (default: the shared engine pool).
+        """
+        import cv2
+        import numpy as np
+        from tiling import dedupe_words, owns, plan_bands
+        
+        try:
+            if roi:
+                x, y, w, h = roi
+                image = image[y:y+h, x:x+w]
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            if cache is not None:
+                key = cache.make_key(gray, mode='tiled', preprocess=preprocess_options, psm=psm,
+                                     lang=lang, band_height=band_height, overlap=overlap,
+                                     backend=_backend(engine, pool))
+                cached = cache.get(key)
+                if cached is not None:
+                    result = OCRResult.from_dict(cached)
+                    return result.text, result
+            with ocr_metrics.timer('plan_bands'):
+                bands, cuts = plan_bands(gray, band_height, overlap)
+            pool = pool or get_default_pool()
+            
+            def recognize_band(index):
+                y0, y1 = bands[index]
+                band = np.ascontiguousarray(gray[y0:y1])
+                transform = None
+                if preprocess_options is not None:
+                    pipeline = OCRProcessor.get_pipeline(**preprocess_options)
+                    band = pipeline.run(band)
+                    transform = pipeline.transform
+                if engine is not None:
+                    data = _recognize(engine, band, psm, lang)
+                else:
+                    with pool.acquire() as pooled:
+                        data = _recognize(pooled, band, psm, lang)
+                result = OCRResult.from_data(data)
+                if transform is not None:
+                    result = result.unwarp(transform)
+                # Keep only words centred in the rows this band owns
+                return OCRResult.from_words([word for word in result.words if owns(word, index, cuts, y0)])
+                
+            if engine is not None or len(bands) == 1:
+                results = [recognize_band(i) for i in range(len(bands))]
+            else:
+                results = _parallel_map(recognize_band, range(len(bands)), max_workers or pool.size, pool.size)
+                    
+            merged = OCRResult.merge(zip(results, [(0, y0) for y0, _ in bands]))
+            result = OCRResult.from_words(dedupe_words(merged.words, cuts, overlap))
+            if cache is not None:
+                cache.put(key, result.to_dict())
+            return result.text, result
+            
+        except Exception as e:
+            return f"OCR Error: {str(e)}", None
+            
+    @staticmethod
+    def ocr(image, roi=None, preprocess_options=None, detect_regions=False, psm=6, lang='eng',
+            engine=None, pool=None, cache=None):
+        """Crop, preprocess and OCR one image, choosing the best mode for it
+        
+        Runs region detection when ``detect_regions`` is set, band tiling for
+        images over DEFAULT_TILE_PIXELS, and a single pass otherwise.
+        ``preprocess_options`` are PreprocessPipeline.from_options keywords
+        (None skips preprocessing). Word boxes are in ROI coordinates, mapped
+        back through any deskew/rescale. Returns (text, OCRResult), or an
+        error message and None.
+        """
+        ocr_metrics.inc('ocr_calls')
+        with ocr_metrics.timer('ocr'):
+            text, result = OCRProcessor._ocr(image, roi, preprocess_options, detect_regions, psm, lang,
+                                             engine, pool, cache)
+        if result is None:
+            ocr_metrics.inc('ocr_errors')
+        return text, result
+        
+    @staticmethod
+    def _ocr(image, roi, preprocess_options, detect_regions, psm, lang, engine, pool, cache):
+        if roi:
+            x, y, w, h = roi
+            image = image[y:y+h, x:x+w]
+        if cache is not None:
+            # Region detection always runs on the pool, even when an engine is given
+            key = cache.make_key(image, mode='ocr', preprocess=preprocess_options,
+                                 regions=detect_regions, psm=psm, lang=lang,
+                                 backend=_backend(None if detect_regions else engine, pool))
+            cached = cache.get(key)
+            if cached is not None:
+                result = OCRResult.from_dict(cached)
+                return result.text, result
+                
+        if detect_regions:
+            text, result = OCRProcessor.extract_text_regions(image, None, preprocess_options,
+                                                             lang=lang, pool=pool)
+        elif image.shape[0] * image.shape[1] > DEFAULT_TILE_PIXELS:
+            # Huge scans: preprocess and OCR in bands to bound memory
+            text, result = OCRProcessor.extract_text_tiled(image, preprocess_options=preprocess_options,
+                                                           engine=engine, psm=psm, lang=lang, pool=pool)
+        else:
+            transform = None
+            if preprocess_options is not None:
+                try:
+                    # One pipeline per thread, so buffers are reused across calls
+                    pipeline = OCRProcessor.get_pipeline(**preprocess_options)
+                    image = pipeline.run(image)
+                    transform = pipeline.transform
+                except Exception as e:
+                    return f"OCR Error: {str(e)}", None
+            text, result = OCRProcessor.extract_text(image, preprocess=False, engine=engine,
+                                                     psm=psm, lang=lang, pool=pool)
+            if result is not None and transform is not None:
+                result = result.unwarp(transform)
+                
+        if result is not None and cache is not None:
+            cache.put(key, result.to_dict())
+        return text, result
@@ -0,0 +1,204 @@
+"""
+OCR engine backends used by OCRProcessor.
+
+Every engine returns word data in the same column layout as
+``pytesseract.image_to_data(..., output_type=Output.DICT)`` so callers do not
+care which backend ran. ``TesserocrEngine`` keeps a libtesseract API instance
+and its traineddata loaded across calls; ``PytesseractEngine`` spawns the
+tesseract binary per call and is the fallback when tesserocr is missing.
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+INT_COLUMNS = set(TSV_COLUMNS) - {'conf', 'text'}
+
+
+def parse_tsv(tsv):
+    """Parse Tesseract TSV output (with or without header) into an image_to_data dict"""
+    data = {column: [] for column in TSV_COLUMNS}
+    for line in tsv.splitlines():
+        if not line or line.startswith('level'):
+            continue
+        fields = line.split('\t', len(TSV_COLUMNS) - 1)
+        if len(fields) < len(TSV_COLUMNS) - 1:
+            continue
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append('')
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column in INT_COLUMNS:
+                data[column].append(int(value))
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(value)
+    return data
+
+
+class OCREngine:
+    """Base class for OCR backends"""
+
+    name = 'base'
+
+    def recognize(self, image, psm=6, lang='eng', config=''):
+        """Recognize a grayscale or BGR numpy image and return image_to_data columns"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release backend resources"""
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract binary once per call through pytesseract"""
+
+    name = 'pytesseract'
+
+    def recognize(self, image, psm=6, lang='eng', config=''):
+        import pytesseract
+        return pytesseract.image_to_data(image, lang=lang, config=f'--psm {psm} {config}'.strip(),
+                                         output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine(OCREngine):
+    """Keeps one libtesseract instance alive across calls via tesserocr"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', tessdata_path=None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self.path = tessdata_path or os.environ.get('TESSDATA_PREFIX')
+        self.api = tesserocr.PyTessBaseAPI(**self._init_kwargs(lang))
+
+    def _init_kwargs(self, lang):
+        return {'lang': lang, 'path': self.path} if self.path else {'lang': lang}
+
+    def recognize(self, image, psm=6, lang='eng', config=''):
+        import numpy as np
+        from PIL import Image
+        if lang != self.lang:
+            self.api.Init(**self._init_kwargs(lang))
+            self.lang = lang
+        # Only "-c name=value" style variables can be applied to a live API;
+        # they are put back afterwards so a pooled engine does not leak them
+        saved = {}
+        parts = config.split()
+        for flag, setting in zip(parts, parts[1:]):
+            if flag == '-c' and '=' in setting:
+                name, value = setting.split('=', 1)
+                if name not in saved:
+                    saved[name] = self.api.GetVariableAsString(name)
+                self.api.SetVariable(name, value)
+        try:
+            self.api.SetPageSegMode(psm)
+            if image.ndim == 3:
+                image = image[:, :, ::-1]  # BGR -> RGB
+            self.api.SetImage(Image.fromarray(np.ascontiguousarray(image)))
+            self.api.Recognize()
+            return parse_tsv(self.api.GetTSVText(0))
+        finally:
+            for name, value in saved.items():
+                if value is not None:
+                    self.api.SetVariable(name, value)
+
+    def close(self):
+        self.api.End()
+
+
+def tesserocr_available():
+    """True when the in-process tesserocr backend can be imported"""
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_backend(backend='auto'):
+    """The backend name 'auto' stands for: tesserocr if installed, else pytesseract"""
+    if backend == 'auto':
+        return 'tesserocr' if tesserocr_available() else 'pytesseract'
+    return backend
+
+
+def create_engine(backend='auto', lang='eng'):
+    """Create an engine: 'tesserocr', 'pytesseract' or 'auto' (tesserocr if installed)"""
+    backend = resolve_backend(backend)
+    if backend == 'tesserocr':
+        return TesserocrEngine(lang=lang)
+    if backend == 'pytesseract':
+        return PytesseractEngine()
+    raise ValueError(f"Unknown OCR backend: {backend}")
+
+
+class EnginePool:
+    """Thread-safe pool of OCR engines, created lazily up to ``size``
+    
+    ``name`` is the backend its engines use (the factory's ``name`` for a
+    custom factory), so results can be cached per backend.
+    """
+
+    def __init__(self, size=None, backend='auto', lang='eng', factory=None):
+        self.size = size or os.cpu_count() or 1
+        self.name = resolve_backend(backend) if factory is None else getattr(factory, 'name', 'custom')
+        self.factory = factory or (lambda: create_engine(self.name, lang))
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Borrow an engine for the duration of a with-block"""
+        engine = self._checkout(timeout)
+        try:
+            yield engine
+        finally:
+            self._idle.put(engine)
+
+    def _checkout(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def close(self):
+        """Close every idle engine"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """Process-wide engine pool shared by OCRProcessor calls"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = EnginePool(backend=os.environ.get('OCR_BACKEND', 'auto'))
+        return _default_pool
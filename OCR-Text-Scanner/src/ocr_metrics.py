@@ -0,0 +1,314 @@
+"""
+Timing, counters and profiling for the OCR pipeline.
+
+The pipeline records into the process-wide ``registry``. Stage timings go
+into fixed-bucket histograms (preprocess stages, tesseract, overlay,
+display, ...) and events are counted (OCR calls, cache hits, camera
+frames). Recording is one perf_counter pair and a short locked update, and
+set_enabled(False) turns it off. Hooks registered with add_hook() receive
+every observation, e.g. to forward to another metrics system.
+Snapshots can be exported as JSON or as Prometheus text.
+
+profile_call() captures a single call with cProfile (exact, slower) or a
+sampling profiler (approximate, cheap enough to leave on in the field).
+"""
+
+import io
+import json
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Bucketed distribution of durations with a running mean for live readouts"""
+
+    def __init__(self, buckets=BUCKETS, smoothing=0.2):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = None  # exponentially weighted mean, in seconds
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.recent = seconds if self.recent is None else \
+                self.recent + self.smoothing * (seconds - self.recent)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        with self._lock:
+            return {'count': self.count, 'sum': self.sum, 'recent': self.recent,
+                    'buckets': list(self.buckets), 'counts': list(self.counts)}
+
+    def merge(self, data):
+        """Add a to_dict() snapshot (e.g. from a worker process) into this histogram"""
+        if list(data['buckets']) != list(self.buckets):
+            raise ValueError("Histogram buckets differ")
+        with self._lock:
+            for i, count in enumerate(data['counts']):
+                self.counts[i] += count
+            self.count += data['count']
+            self.sum += data['sum']
+            if data.get('recent') is not None:
+                self.recent = data['recent']
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Named counters and duration histograms"""
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}
+        self.counters = {}
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name, seconds):
+        """Record a duration for stage ``name``"""
+        if not self.enabled:
+            return
+        self.histogram(name).observe(seconds)
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def timer(self, name):
+        """Context manager that observes the time spent in its block"""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def inc(self, name, amount=1):
+        """Add ``amount`` to counter ``name``"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_hook(self, hook):
+        """Call ``hook(name, seconds)`` on every observation"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def recent_ms(self):
+        """Smoothed recent duration per stage in milliseconds, for status readouts"""
+        return {name: h.recent * 1000 for name, h in sorted(self.histograms.items()) if h.recent is not None}
+
+    def snapshot(self):
+        """JSON-serializable state of every counter and histogram"""
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+        return {'counters': counters,
+                'histograms': {name: h.to_dict() for name, h in sorted(histograms.items())}}
+
+    def merge(self, snapshot):
+        """Fold another registry's snapshot into this one"""
+        for name, amount in snapshot.get('counters', {}).items():
+            self.inc(name, amount)
+        for name, data in snapshot.get('histograms', {}).items():
+            self.histogram(name).merge(data)
+
+    def summary(self):
+        """Per stage: count, mean and approximate p50/p95/p99 in milliseconds"""
+        stages = {}
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            stages[name] = {
+                'count': histogram.count,
+                'mean_ms': round(histogram.sum / histogram.count * 1000, 3),
+                'p50_ms': histogram.quantile(0.5) * 1000,
+                'p95_ms': histogram.quantile(0.95) * 1000,
+                'p99_ms': histogram.quantile(0.99) * 1000,
+            }
+        return {'counters': dict(self.counters), 'stages': stages}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.summary(), **kwargs)
+
+    def to_prometheus(self, prefix='ocr'):
+        """Prometheus text exposition: one histogram family labelled by stage, one counter per event"""
+        lines = []
+        snapshot = self.snapshot()
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        if snapshot['histograms']:
+            family = f"{prefix}_stage_seconds"
+            lines.append(f"# TYPE {family} histogram")
+            for name, data in snapshot['histograms'].items():
+                label = f'stage="{name}"'
+                cumulative = 0
+                for bound, count in zip(data['buckets'] + ['+Inf'], data['counts']):
+                    cumulative += count
+                    lines.append(f'{family}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f"{family}_sum{{{label}}} {data['sum']!r}")
+                lines.append(f"{family}_count{{{label}}} {data['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write a summary to ``path``: Prometheus text for .prom/.txt, JSON otherwise"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json(indent=2) + '\n'
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+
+def _metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+registry = MetricsRegistry()
+observe = registry.observe
+timer = registry.timer
+inc = registry.inc
+
+
+def set_enabled(enabled):
+    registry.enabled = enabled
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval from a background thread
+
+    Overhead does not depend on how many Python calls the profiled code
+    makes, unlike cProfile. Results are counts of collapsed stacks, usable
+    directly as flame graph input.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = _Tally()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def __enter__(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def collapsed(self):
+        """Stacks in "frame;frame;frame count" form (flamegraph.pl, speedscope)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self, limit=25):
+        """Functions by share of samples in which they were on the stack"""
+        inclusive = _Tally()
+        for stack, count in self.stacks.items():
+            for frame in set(stack.split(';')):
+                inclusive[frame] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms"]
+        for frame, count in inclusive.most_common(limit):
+            lines.append(f"{100.0 * count / max(1, self.samples):6.1f}%  {frame}")
+        return '\n'.join(lines)
+
+
+def profile_call(func, *args, mode='cprofile', output=None, limit=25, **kwargs):
+    """Run ``func(*args, **kwargs)`` once under a profiler; returns (result, report text)
+
+    ``mode`` is 'cprofile' or 'sample'. With ``output``, the raw profile is
+    saved too: pstats data for cProfile (open with snakeviz or pstats),
+    collapsed stacks for sampling.
+    """
+    if mode == 'sample':
+        with SamplingProfiler() as profiler:
+            result = func(*args, **kwargs)
+        if output:
+            with open(output, 'w', encoding='utf-8') as handle:
+                handle.write(profiler.collapsed())
+        return result, profiler.report(limit)
+    if mode != 'cprofile':
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    if output:
+        profiler.dump_stats(output)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return result, stream.getvalue()
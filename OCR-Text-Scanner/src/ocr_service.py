@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Local OCR HTTP service.
+
+A small asyncio HTTP/1.1 server (standard library only) in front of
+OCRProcessor. Pages go through one bounded queue that a fixed set of workers
+drain, each borrowing a persistent engine from an EnginePool. Pages of a
+multi-page upload are queued together, so they are spread across idle
+workers, and are streamed back as NDJSON as each one finishes. When the
+queue is full, new requests are refused with 503 and Retry-After instead of
+piling up; uploads with more pages than the queue can ever hold get 413.
+
+    python src/ocr_service.py --port 8765 --workers 4
+
+    POST /ocr?psm=6&lang=eng&roi=x,y,w,h&preprocess=default&regions=0
+         body: image bytes (PNG, JPEG, TIFF incl. multi-page, ...)
+    GET  /metrics    latency percentiles, throughput, queue depth, stage timings
+                     (?format=prometheus for Prometheus text)
+    GET  /health
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import ocr_metrics
+from ocr_core import OCRProcessor
+from ocr_engines import EnginePool
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+PREPROCESS_STAGES = ('enhance_contrast', 'denoise', 'threshold', 'clahe', 'adaptive_threshold',
+                     'deskew', 'rescale')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_options(query):
+    """Turn query parameters into OCRProcessor.ocr keyword arguments"""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    options = {'psm': 6, 'lang': 'eng', 'roi': None, 'detect_regions': False,
+               'preprocess_options': {'enhance_contrast': True, 'denoise': True, 'threshold': True}}
+    try:
+        if 'psm' in params:
+            options['psm'] = int(params['psm'])
+        if 'lang' in params:
+            options['lang'] = params['lang']
+        if 'roi' in params:
+            x, y, w, h = (int(v) for v in params['roi'].split(','))
+            options['roi'] = (x, y, w, h)
+    except ValueError:
+        raise HTTPError(400, "psm must be an integer and roi must be x,y,w,h")
+    options['detect_regions'] = params.get('regions', '0').lower() in ('1', 'true', 'yes')
+
+    preprocess = params.get('preprocess', 'default')
+    if preprocess == 'none':
+        options['preprocess_options'] = None
+    elif preprocess != 'default':
+        stages = [stage for stage in preprocess.split(',') if stage]
+        unknown = set(stages) - set(PREPROCESS_STAGES)
+        if unknown:
+            raise HTTPError(400, f"Unknown preprocess stages: {', '.join(sorted(unknown))}")
+        options['preprocess_options'] = {stage: stage in stages for stage in PREPROCESS_STAGES}
+    return options
+
+
+def count_frames(body):
+    """Pages in an upload, read from the image header without decoding pixels"""
+    import io
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(body)) as image:
+            return getattr(image, 'n_frames', 1)
+    except Exception:
+        return 1  # decode_pages() falls back to OpenCV, which yields one page
+
+
+def decode_pages(body):
+    """Decode an upload into a list of BGR pages (multi-page TIFF aware)"""
+    import io
+    import cv2
+    import numpy as np
+    from PIL import Image, ImageSequence
+
+    try:
+        with Image.open(io.BytesIO(body)) as image:
+            if getattr(image, 'n_frames', 1) > 1:
+                return [cv2.cvtColor(np.array(frame.convert('RGB')), cv2.COLOR_RGB2BGR)
+                        for frame in ImageSequence.Iterator(image)]
+    except Exception:
+        pass  # not something Pillow reads; let OpenCV try
+    page = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+    if page is None:
+        raise HTTPError(400, "Could not decode image")
+    return [page]
+
+
+def result_payload(text, result, page=None, seconds=None):
+    payload = {'text': text} if result is not None else {'error': text}
+    if result is not None:
+        payload['words'] = [
+            {'text': w.text, 'conf': w.conf, 'box': list(w.box), 'block': w.block_num, 'line': w.line_num}
+            for w in result.words
+        ]
+    if page is not None:
+        payload['page'] = page
+    if seconds is not None:
+        payload['seconds'] = round(seconds, 4)
+    return payload
+
+
+class ServiceMetrics:
+    """Request counters and a sliding window of page latencies"""
+
+    def __init__(self, window=1000, rate_seconds=60.0):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.pages = 0
+        self.rejected = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self.completions = deque()
+        self.rate_seconds = rate_seconds
+
+    def page_done(self, seconds, ok=True):
+        now = time.monotonic()
+        self.pages += 1
+        if not ok:
+            self.errors += 1
+        self.latencies.append(seconds)
+        self.completions.append(now)
+        while self.completions and self.completions[0] < now - self.rate_seconds:
+            self.completions.popleft()
+
+    def snapshot(self, queue_depth, in_flight, workers):
+        ordered = sorted(self.latencies)
+
+        def percentile(q):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+        uptime = time.monotonic() - self.started
+        window = min(self.rate_seconds, uptime) or 1.0
+        return {
+            'uptime_seconds': round(uptime, 1),
+            'requests': self.requests,
+            'pages': self.pages,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'queue_depth': queue_depth,
+            'in_flight': in_flight,
+            'workers': workers,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)},
+            'pages_per_sec': round(len(self.completions) / window, 3),
+        }
+
+
+class OCRService:
+    """Bounded-queue OCR workers behind an asyncio HTTP server"""
+
+    def __init__(self, workers=None, queue_size=64, backend='auto', pool=None, max_body=MAX_BODY_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.max_body = max_body
+        self.pool = pool or EnginePool(size=self.workers, backend=backend)
+        self.metrics = ServiceMetrics()
+        self.in_flight = 0
+        self.queue = None
+        self.server = None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr')
+        self._tasks = []
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Start the workers and listen; returns the bound (host, port)"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            image, options, future = await self.queue.get()
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                text, result = await loop.run_in_executor(
+                    self._executor, lambda: OCRProcessor.ocr(image, pool=self.pool, **options)
+                )
+                seconds = time.perf_counter() - start
+                self.metrics.page_done(seconds, ok=result is not None)
+                if not future.cancelled():
+                    future.set_result((text, result, seconds))
+            except Exception as e:
+                self.metrics.page_done(time.perf_counter() - start, ok=False)
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    def check_capacity(self, page_count):
+        """Raise 413 if ``page_count`` pages can never fit the queue, 503 if they do not fit now"""
+        if page_count > self.queue.maxsize:
+            self.metrics.rejected += 1
+            raise HTTPError(413, f"Upload has {page_count} pages; the queue holds at most {self.queue.maxsize}")
+        if self.queue.maxsize - self.queue.qsize() < page_count:
+            self.metrics.rejected += 1
+            raise HTTPError(503, "OCR queue is full, retry later")
+
+    def submit(self, pages, options):
+        """Queue every page or none of them; futures resolve to (text, result, seconds)"""
+        self.check_capacity(len(pages))
+        loop = asyncio.get_running_loop()
+        futures = []
+        for page in pages:
+            future = loop.create_future()
+            self.queue.put_nowait((page, options, future))
+            futures.append(future)
+        return futures
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    await self._route(method, path, query, body, writer, keep_alive)
+                except HTTPError as e:
+                    extra = {'Retry-After': '1'} if e.status == 503 else {}
+                    await self._send_json(writer, e.status, {'error': str(e)}, keep_alive, extra)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    await self._send_json(writer, 500, {'error': f"Internal error: {e}"}, False)
+                    break
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, writer):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            await self._send_json(writer, 400, {'error': 'Malformed request line'}, False)
+            return None
+        headers = {}
+        while True:
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            await self._send_json(writer, 400, {'error': 'Invalid Content-Length'}, False)
+            return None
+        if length > self.max_body:
+            await self._send_json(writer, 413, {'error': 'Request body too large'}, False)
+            return None
+        body = await reader.readexactly(length) if length else b''
+        url = urlsplit(target)
+        return method.upper(), url.path, url.query, headers, body
+
+    async def _route(self, method, path, query, body, writer, keep_alive):
+        if path == '/health':
+            await self._send_json(writer, 200, {'status': 'ok'}, keep_alive)
+        elif path == '/metrics':
+            snapshot = self.metrics.snapshot(self.queue.qsize(), self.in_flight, self.workers)
+            if parse_qs(query).get('format') == ['prometheus']:
+                await self._send_text(writer, 200, self.prometheus(snapshot), keep_alive)
+            else:
+                snapshot['stages'] = ocr_metrics.registry.summary()['stages']
+                await self._send_json(writer, 200, snapshot, keep_alive)
+        elif path == '/ocr':
+            if method != 'POST':
+                raise HTTPError(405, "Use POST with the image as the request body")
+            await self._ocr(query, body, writer, keep_alive)
+        else:
+            raise HTTPError(404, f"No route for {path}")
+
+    async def _ocr(self, query, body, writer, keep_alive):
+        if not body:
+            raise HTTPError(400, "Empty request body")
+        options = parse_options(query)
+        self.metrics.requests += 1
+        # Refuse before paying for the decode
+        self.check_capacity(count_frames(body))
+        loop = asyncio.get_running_loop()
+        pages = await loop.run_in_executor(None, decode_pages, body)
+        futures = self.submit(pages, options)
+
+        if len(futures) == 1:
+            text, result, seconds = await futures[0]
+            await self._send_json(writer, 200, result_payload(text, result, seconds=seconds), keep_alive)
+            return
+
+        # Multi-page: stream one NDJSON line per page as pages finish. The
+        # status line is already sent, so a failed page becomes an error line.
+        async def numbered(index, future):
+            try:
+                return (index,) + await future
+            except Exception as e:
+                return index, f"OCR Error: {e}", None, None
+
+        writer.write(self._head(200, 'application/x-ndjson', keep_alive, {'Transfer-Encoding': 'chunked'}))
+        try:
+            for done in asyncio.as_completed([numbered(i, f) for i, f in enumerate(futures)]):
+                index, text, result, seconds = await done
+                line = json.dumps(result_payload(text, result, page=index, seconds=seconds)) + '\n'
+                chunk = line.encode('utf-8')
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                await writer.drain()
+        finally:
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+
+    @staticmethod
+    def prometheus(snapshot):
+        """Service gauges and counters plus the shared stage histograms as Prometheus text"""
+        lines = []
+        for name in ('requests', 'pages', 'rejected', 'errors'):
+            lines += [f"# TYPE ocr_service_{name}_total counter", f"ocr_service_{name}_total {snapshot[name]}"]
+        for name in ('queue_depth', 'in_flight', 'workers', 'pages_per_sec'):
+            lines += [f"# TYPE ocr_service_{name} gauge", f"ocr_service_{name} {snapshot[name]}"]
+        return '\n'.join(lines) + '\n' + ocr_metrics.registry.to_prometheus()
+
+    @staticmethod
+    def _head(status, content_type, keep_alive, extra=None):
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}', f'Content-Type: {content_type}',
+                 f'Connection: {"keep-alive" if keep_alive else "close"}']
+        lines += [f'{name}: {value}' for name, value in (extra or {}).items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_json(self, writer, status, payload, keep_alive, extra=None):
+        await self._send(writer, status, 'application/json', json.dumps(payload).encode('utf-8'),
+                         keep_alive, extra)
+
+    async def _send_text(self, writer, status, text, keep_alive):
+        await self._send(writer, status, 'text/plain; version=0.0.4', text.encode('utf-8'), keep_alive)
+
+    async def _send(self, writer, status, content_type, body, keep_alive, extra=None):
+        headers = dict(extra or {}, **{'Content-Length': str(len(body))})
+        writer.write(self._head(status, content_type, keep_alive, headers) + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers, queue_size, backend):
+    service = OCRService(workers=workers, queue_size=queue_size, backend=backend)
+    host, port = await service.start(host, port)
+    print(f"OCR service on http://{host}:{port} with {service.workers} workers, "
+          f"queue of {service.queue_size}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Local OCR HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="OCR workers/engines (default: CPU count)")
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help="Pages that may wait before requests are refused with 503")
+    parser.add_argument('--backend', choices=['auto', 'tesserocr', 'pytesseract'], default='auto')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue_size, args.backend))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
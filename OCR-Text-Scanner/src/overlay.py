@@ -0,0 +1,64 @@
+"""
+Word-box overlays rendered as a transparent layer.
+
+render_overlay() draws OCRColumns into a BGRA array of the size the image is
+displayed at. All boxes are mapped in one NumPy expression and outlined in a
+single cv2.polylines call per pixel of border width. Labels are drawn only
+for words tall enough to read at that size. The GUI composites the layer over
+the image when painting, so the image is never copied and the layer is only
+re-rendered when the display size or the words change.
+"""
+
+import cv2
+import numpy as np
+
+
+def box_corners(boxes, scale=(1.0, 1.0), offset=(0.0, 0.0)):
+    """(N, 4) x, y, w, h boxes -> (N, 4) x0, y0, x1, y1 after scaling and shifting"""
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    sx, sy = scale
+    dx, dy = offset
+    x0 = boxes[:, 0] * sx + dx
+    y0 = boxes[:, 1] * sy + dy
+    return np.stack([x0, y0, x0 + boxes[:, 2] * sx, y0 + boxes[:, 3] * sy], axis=1)
+
+
+def render_overlay(columns, size, scale=(1.0, 1.0), offset=(0.0, 0.0), color=(0, 255, 0),
+                   thickness=2, labels=True, min_label_height=10, font_scale=None):
+    """Draw word boxes (and legible labels) on a transparent BGRA layer
+
+    ``size`` is the layer's (width, height); boxes are mapped by
+    ``scale`` then ``offset`` from the columns' coordinates.
+    """
+    width, height = size
+    layer = np.zeros((height, width, 4), np.uint8)
+    if not len(columns):
+        return layer
+    bgra = tuple(color) + (255,)
+    corners = np.rint(box_corners(columns.boxes, scale, offset)).astype(np.int32)
+    x0, y0, x1, y1 = corners.T
+    # Nested 1 px outlines are much cheaper than one thick polyline
+    for inset in range(thickness):
+        polygons = np.stack([np.stack([x0 + inset, y0 + inset], 1), np.stack([x1 - inset, y0 + inset], 1),
+                             np.stack([x1 - inset, y1 - inset], 1), np.stack([x0 + inset, y1 - inset], 1)], 1)
+        cv2.polylines(layer, polygons, True, bgra, 1)
+
+    if labels:
+        heights = y1 - y0
+        visible = (heights >= min_label_height) & (x1 > 0) & (x0 < width) & (y0 > 0) & (y0 < height)
+        for index in np.flatnonzero(visible):
+            scale_for_word = font_scale or max(0.3, min(1.0, heights[index] / 30.0))
+            cv2.putText(layer, columns.text[index], (int(x0[index]), int(y0[index]) - 3),
+                        cv2.FONT_HERSHEY_SIMPLEX, scale_for_word, bgra, 1, cv2.LINE_AA)
+    return layer
+
+
+def composite(image, layer):
+    """Blend a layer onto a BGR image of the same size; returns a new image
+
+    Drawing on a zeroed layer leaves colours premultiplied by alpha
+    (anti-aliased edges included), which is also how Qt composites it.
+    """
+    alpha = layer[..., 3:4].astype(np.float32) / 255.0
+    blended = image.astype(np.float32) * (1.0 - alpha) + layer[..., :3]
+    return np.clip(blended, 0, 255).astype(np.uint8)
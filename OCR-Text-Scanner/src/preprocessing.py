@@ -0,0 +1,344 @@
+"""
+Composable image preprocessing for OCR.
+
+A PreprocessPipeline converts an image to grayscale and runs a list of stages
+over it: rescale to Tesseract's preferred text size, deskew, contrast,
+denoise and threshold. On machines with OpenCL the stages run on cv2.UMat
+through OpenCV's transparent API; on the CPU path each stage writes into a
+buffer kept from the previous run, so a stream of same-sized camera frames is
+processed without per-frame allocations. Geometric stages record the affine
+transform they applied, so OCR boxes can be mapped back to the input image.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+import ocr_metrics
+
+
+def opencl_available():
+    """True when OpenCV can run the transparent API on an OpenCL device"""
+    try:
+        return cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+    except cv2.error:
+        return False
+
+
+class Stage:
+    """One preprocessing step on a single-channel uint8 image
+
+    ``prepare(gray)`` sees the original grayscale input (always a numpy array)
+    before any stage runs, so stages can measure the page without downloading
+    a UMat. ``apply(src, dst, shape)`` returns the output for an input of
+    ``shape``, writing into ``dst`` (a reusable buffer of ``output_shape``, or
+    None) when it can. Geometric stages set ``transform`` to the 2x3 affine
+    matrix they applied, else None.
+    """
+
+    name = 'stage'
+    transform = None
+
+    def prepare(self, gray):
+        pass
+
+    def output_shape(self, shape):
+        return shape
+
+    def apply(self, src, dst, shape):
+        raise NotImplementedError
+
+
+def text_height(gray, max_side=1000):
+    """Median height in pixels of glyph-sized connected components, or None"""
+    height, width = gray.shape[:2]
+    factor = min(1.0, max_side / float(max(height, width)))
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Glyphs: not specks, not page-wide rules or photos
+    keep = (heights >= 3) & (heights < small.shape[0] / 4) & (widths < small.shape[1] / 4)
+    if np.count_nonzero(keep) < 5:
+        return None
+    return float(np.median(heights[keep])) / factor
+
+
+def estimate_skew(gray, max_side=1000):
+    """Rotation in degrees that straightens the text lines, or None
+
+    Glyphs are joined into line blobs by a wide horizontal closing and the
+    length-weighted median of their minAreaRect angles is returned.
+    """
+    height, width = gray.shape[:2]
+    factor = min(1.0, max_side / float(max(height, width)))
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    join = max(9, small.shape[1] // 40)
+    lines = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (join, 3)))
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    angles, lengths = [], []
+    for contour in contours:
+        _, (w, h), angle = cv2.minAreaRect(contour)
+        if w < h:
+            w, h = h, w
+            angle -= 90.0
+        # Only long, thin blobs are text lines
+        if w < 4 * h or w < small.shape[1] / 10:
+            continue
+        angles.append((angle + 90.0) % 180.0 - 90.0)
+        lengths.append(w)
+    if not angles:
+        return None
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(lengths)[order])
+    return float(np.asarray(angles)[order][np.searchsorted(cumulative, cumulative[-1] / 2.0)])
+
+
+class RescaleText(Stage):
+    """Resize so text lands at Tesseract's preferred size (~300 DPI)
+
+    With a known ``source_dpi`` the scale is ``target_dpi / source_dpi``.
+    Otherwise the median glyph height is measured and scaled towards
+    ``target_text_height`` pixels, roughly 10-12pt text at 300 DPI. Scales
+    within ``tolerance`` of 1 are skipped to avoid pointless resampling.
+    """
+
+    name = 'rescale'
+
+    def __init__(self, target_dpi=300, source_dpi=None, target_text_height=30,
+                 min_scale=0.4, max_scale=3.0, tolerance=0.2):
+        self.target_dpi = target_dpi
+        self.source_dpi = source_dpi
+        self.target_text_height = target_text_height
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.tolerance = tolerance
+        self.scale = 1.0
+        self.transform = None
+
+    def prepare(self, gray):
+        if self.source_dpi:
+            scale = self.target_dpi / float(self.source_dpi)
+        else:
+            height = text_height(gray)
+            scale = 1.0 if height is None else self.target_text_height / height
+        scale = float(np.clip(scale, self.min_scale, self.max_scale))
+        self.scale = 1.0 if abs(scale - 1.0) <= self.tolerance else scale
+        self.transform = None
+        if self.scale != 1.0:
+            self.transform = np.array([[self.scale, 0, 0], [0, self.scale, 0]], np.float64)
+
+    def output_shape(self, shape):
+        if self.scale == 1.0:
+            return shape
+        return (max(1, int(round(shape[0] * self.scale))), max(1, int(round(shape[1] * self.scale))))
+
+    def apply(self, src, dst, shape):
+        if self.scale == 1.0:
+            return src
+        height, width = self.output_shape(shape)
+        interpolation = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_CUBIC
+        return cv2.resize(src, (width, height), dst, interpolation=interpolation)
+
+
+class Deskew(Stage):
+    """Rotate the page so text lines are horizontal
+
+    Rotations smaller than ``min_angle`` or larger than ``max_angle`` degrees
+    are skipped; the latter are more likely tables or photos than skew.
+    """
+
+    name = 'deskew'
+
+    def __init__(self, max_angle=15.0, min_angle=0.3, max_side=1000):
+        self.max_angle = max_angle
+        self.min_angle = min_angle
+        self.max_side = max_side
+        self.angle = 0.0
+        self.transform = None
+
+    def prepare(self, gray):
+        # The angle does not depend on scale, so it is measured on the input
+        angle = estimate_skew(gray, self.max_side)
+        if angle is None or abs(angle) < self.min_angle or abs(angle) > self.max_angle:
+            angle = 0.0
+        self.angle = angle
+        self.transform = None
+
+    def apply(self, src, dst, shape):
+        if not self.angle:
+            return src
+        height, width = shape
+        self.transform = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), self.angle, 1.0)
+        return cv2.warpAffine(src, self.transform, (width, height), dst,
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+class EqualizeHist(Stage):
+    name = 'equalize'
+
+    def apply(self, src, dst, shape):
+        return cv2.equalizeHist(src, dst)
+
+
+class CLAHE(Stage):
+    """Contrast limited adaptive histogram equalization, for uneven lighting"""
+
+    name = 'clahe'
+
+    def __init__(self, clip_limit=2.0, tile_grid_size=(8, 8)):
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+
+    def apply(self, src, dst, shape):
+        return self.clahe.apply(src, dst)
+
+
+class MedianBlur(Stage):
+    name = 'denoise'
+
+    def __init__(self, ksize=3):
+        self.ksize = ksize
+
+    def apply(self, src, dst, shape):
+        return cv2.medianBlur(src, self.ksize, dst)
+
+
+class OtsuThreshold(Stage):
+    name = 'threshold'
+
+    def apply(self, src, dst, shape):
+        _, out = cv2.threshold(src, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst)
+        return out
+
+
+class AdaptiveThreshold(Stage):
+    """Local mean threshold; copes with shadows and gradients that defeat Otsu"""
+
+    name = 'adaptive_threshold'
+
+    def __init__(self, block_size=31, c=15):
+        self.block_size = block_size | 1
+        self.c = c
+
+    def apply(self, src, dst, shape):
+        return cv2.adaptiveThreshold(src, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                     self.block_size, self.c, dst)
+
+
+class PreprocessPipeline:
+    """Run stages in order, reusing buffers and timing each stage
+
+    A pipeline keeps per-run state, so use one per thread. ``use_opencl``
+    defaults to whether OpenCL is available. ``timings`` holds the seconds
+    each stage took in the last run; ``totals`` and ``runs`` accumulate.
+    ``transform`` is the 2x3 affine map from input to output coordinates
+    when a geometric stage changed the image, else None.
+    """
+
+    def __init__(self, stages, use_opencl=None):
+        self.stages = list(stages)
+        self.use_opencl = opencl_available() if use_opencl is None else use_opencl
+        self.timings = {}
+        self.totals = {}
+        self.runs = 0
+        self.transform = None
+        self._buffers = {}
+
+    @classmethod
+    def from_options(cls, enhance_contrast=True, denoise=True, threshold=True, deskew=False,
+                     clahe=False, adaptive_threshold=False, rescale=False, source_dpi=None,
+                     use_opencl=None):
+        """Build the pipeline for a set of on/off options
+
+        ``clahe`` replaces global histogram equalization and
+        ``adaptive_threshold`` replaces Otsu when both are enabled.
+        """
+        stages = []
+        if rescale:
+            stages.append(RescaleText(source_dpi=source_dpi))
+        if deskew:
+            stages.append(Deskew())
+        if clahe:
+            stages.append(CLAHE())
+        elif enhance_contrast:
+            stages.append(EqualizeHist())
+        if denoise:
+            stages.append(MedianBlur(3))
+        if adaptive_threshold:
+            stages.append(AdaptiveThreshold())
+        elif threshold:
+            stages.append(OtsuThreshold())
+        return cls(stages, use_opencl)
+
+    def _buffer(self, slot, shape):
+        """A reusable numpy output buffer for one stage slot
+
+        Under OpenCL no buffer is passed: OpenCV's OpenCL buffer pool already
+        recycles device memory between calls.
+        """
+        if self.use_opencl:
+            return None
+        buffer = self._buffers.get(slot)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, np.uint8)
+            self._buffers[slot] = buffer
+        return buffer
+
+    def run(self, image):
+        """Process a BGR or grayscale uint8 image; returns a new grayscale array"""
+        timings = {}
+        start = time.perf_counter()
+        if image.ndim == 3:
+            # Convert on the CPU: uploading one channel instead of three is cheaper
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, self._buffer('gray', image.shape[:2]))
+        else:
+            gray = image
+        current = cv2.UMat(gray) if self.use_opencl else gray
+        timings['grayscale'] = time.perf_counter() - start
+
+        shape = gray.shape[:2]
+        transform = np.eye(3)
+        geometric = False
+        for slot, stage in enumerate(self.stages):
+            start = time.perf_counter()
+            stage.prepare(gray)
+            out_shape = stage.output_shape(shape)
+            current = stage.apply(current, self._buffer(slot, out_shape), shape)
+            shape = out_shape
+            if self.use_opencl:
+                cv2.ocl.finish()  # UMat calls are asynchronous; wait so the timing is real
+            timings[stage.name] = time.perf_counter() - start
+            if stage.transform is not None:
+                transform = np.vstack([stage.transform, [0, 0, 1]]) @ transform
+                geometric = True
+
+        for name, seconds in timings.items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            ocr_metrics.observe('preprocess.' + name, seconds)
+        ocr_metrics.observe('preprocess', sum(timings.values()))
+        self.timings = timings
+        self.runs += 1
+        self.transform = transform[:2] if geometric else None
+
+        if isinstance(current, cv2.UMat):
+            return current.get()
+        # Never hand out the caller's input or a buffer that the next run reuses
+        return current.copy()
+
+    def mean_timings(self):
+        """Average seconds per run for each stage"""
+        return {name: total / max(1, self.runs) for name, total in self.totals.items()}
+
+
+def map_box_back(box, transform):
+    """Map an (x, y, w, h) box from pipeline output to input coordinates"""
+    inverse = cv2.invertAffineTransform(np.asarray(transform, np.float64))
+    x, y, w, h = box
+    corners = np.array([[x, y, 1], [x + w, y, 1], [x, y + h, 1], [x + w, y + h, 1]], np.float64)
+    mapped = corners @ inverse.T
+    x0, y0 = np.floor(mapped.min(axis=0)).astype(int)
+    x1, y1 = np.ceil(mapped.max(axis=0)).astype(int)
+    return int(x0), int(y0), int(x1 - x0), int(y1 - y0)
@@ -0,0 +1,124 @@
+"""
+Morphology-based text region detection.
+
+Finds candidate text blocks so that only those areas are sent to Tesseract.
+Text strokes produce strong local gradients; closing the gradient mask with a
+wide kernel joins characters into words and words into lines; closely stacked
+lines are then grouped into blocks, whose bounding boxes become the regions.
+Runs in a few milliseconds on CPU.
+"""
+
+import cv2
+import numpy as np
+
+
+def detect_text_regions(image, min_height=8, min_width=12, join_width=None, join_height=None,
+                        padding=4, min_fill=0.15):
+    """Return text block boxes (x, y, w, h) in reading order
+
+    ``join_width``/``join_height`` size the closing kernel that merges glyphs
+    into blocks; by default they scale with the image width.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, width = gray.shape[:2]
+    if join_width is None:
+        join_width = max(9, width // 60)
+    if join_height is None:
+        join_height = max(3, join_width // 3)
+
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT,
+                                cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    joined = cv2.morphologyEx(mask, cv2.MORPH_CLOSE,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (join_width, join_height)))
+
+    contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < min_width or h < min_height:
+            continue
+        # Solid blobs (photos, filled shapes) have gradients only at their edges
+        fill = cv2.countNonZero(mask[y:y+h, x:x+w]) / float(w * h)
+        if fill < min_fill:
+            continue
+        x0, y0 = max(0, x - padding), max(0, y - padding)
+        x1, y1 = min(width, x + w + padding), min(height, y + h + padding)
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+    return reading_order(group_lines(merge_overlapping(boxes)))
+
+
+def group_lines(boxes, gap_ratio=0.8):
+    """Merge line boxes stacked closer than ``gap_ratio`` line heights into blocks"""
+    blocks = []
+    for x, y, w, h in sorted(boxes, key=lambda b: b[1]):
+        for i, (bx, by, bw, bh, line_h) in enumerate(blocks):
+            gap = y - (by + bh)
+            overlaps = x < bx + bw and bx < x + w
+            if overlaps and -h < gap < gap_ratio * min(h, line_h):
+                x0, y0 = min(x, bx), min(y, by)
+                x1, y1 = max(x + w, bx + bw), max(y + h, by + bh)
+                blocks[i] = (x0, y0, x1 - x0, y1 - y0, h)
+                break
+        else:
+            blocks.append((x, y, w, h, h))
+    return merge_overlapping([block[:4] for block in blocks])
+
+
+def merge_overlapping(boxes):
+    """Merge boxes that overlap (e.g. after padding) until none do"""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        while boxes:
+            x, y, w, h = boxes.pop()
+            i = 0
+            while i < len(boxes):
+                bx, by, bw, bh = boxes[i]
+                if bx < x + w and x < bx + bw and by < y + h and y < by + bh:
+                    x0, y0 = min(x, bx), min(y, by)
+                    x1, y1 = max(x + w, bx + bw), max(y + h, by + bh)
+                    x, y, w, h = x0, y0, x1 - x0, y1 - y0
+                    boxes.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            result.append((x, y, w, h))
+        boxes = result
+    return boxes
+
+
+def reading_order(boxes):
+    """Sort boxes top-to-bottom in rows, left-to-right within a row"""
+    rows = []
+    for box in sorted(boxes, key=lambda b: b[1]):
+        x, y, w, h = box
+        for row in rows:
+            top, bottom = row['top'], row['bottom']
+            overlap = min(bottom, y + h) - max(top, y)
+            if overlap > 0.5 * min(h, bottom - top):
+                row['boxes'].append(box)
+                row['top'], row['bottom'] = min(top, y), max(bottom, y + h)
+                break
+        else:
+            rows.append({'top': y, 'bottom': y + h, 'boxes': [box]})
+    ordered = []
+    for row in sorted(rows, key=lambda r: r['top']):
+        ordered.extend(sorted(row['boxes'], key=lambda b: b[0]))
+    return ordered
+
+
+def estimate_line_count(region_gray):
+    """Count text lines in a region from its horizontal ink profile"""
+    _, binary = cv2.threshold(region_gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    profile = binary.sum(axis=1) > max(1, binary.shape[1] // 100)
+    # Each False -> True transition starts a new line
+    return int(np.count_nonzero(profile[1:] & ~profile[:-1]) + (1 if profile[:1].any() else 0))
+
+
+def psm_for_region(region_gray):
+    """Pick a Tesseract page segmentation mode for one detected block"""
+    return 7 if estimate_line_count(region_gray) <= 1 else 6
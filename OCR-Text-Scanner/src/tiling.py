@@ -0,0 +1,135 @@
+"""
+Band tiling for very large scans.
+
+A3 pages at 600 DPI and up are slow and memory-hungry as one Tesseract call.
+plan_bands() cuts the page into horizontal bands of roughly ``band_height``
+rows, placing each cut in the emptiest rows near the target so lines are
+rarely split, and extends every band by ``overlap`` rows so a line that is
+split still appears whole in one band. Each word is kept by the band that
+owns its vertical centre, and dedupe_words() drops the rare duplicates left
+where the two bands measured a word slightly differently.
+
+The page can be a np.memmap (see load_gray_memmap): bands are slices, so only
+the rows being OCRed are paged in.
+"""
+
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+
+def load_gray_memmap(path, directory=None, strip_rows=1024):
+    """Decode an image file to a read-only grayscale np.memmap
+
+    The file is decoded once with PIL (JPEGs straight to one channel) and then
+    converted to gray and written into the memmap ``strip_rows`` at a time, so
+    beside the decoded image only one gray strip is held in memory. The
+    decoded image is released on return and the pixels live on in an unlinked
+    temporary file, paged in band by band as they are OCRed.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(path)
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Could not decode image: {path}") from exc
+    with image:
+        image.draft('L', image.size)
+        if image.getexif().get(0x0112, 1) != 1:
+            image = ImageOps.exif_transpose(image)  # rotate like cv2.imread does
+        width, height = image.size
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy', dir=directory)
+        os.close(fd)
+        try:
+            pixels = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(height, width))
+            for y in range(0, height, strip_rows):
+                pixels[y:y + strip_rows] = _gray_strip(image.crop((0, y, width, min(height, y + strip_rows))))
+            pixels.flush()
+            del pixels
+            return np.load(tmp_path, mmap_mode='r')
+        finally:
+            os.remove(tmp_path)  # the mapping stays valid after unlinking (POSIX)
+
+
+def _gray_strip(strip):
+    """8-bit gray pixels for one strip of a PIL image of any mode"""
+    if strip.mode in ('I', 'I;16', 'I;16B', 'I;16L'):
+        return (np.asarray(strip) >> 8).astype(np.uint8)  # 16-bit scans, as cv2 scales them
+    return np.asarray(strip.convert('L'))
+
+
+def row_ink(gray, strip_rows=1024):
+    """Dark pixels per row, computed strip by strip so memmaps stay lazy"""
+    sample = np.ascontiguousarray(gray[::8, ::8])
+    level, _ = cv2.threshold(sample, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ink = np.empty(gray.shape[0], np.int64)
+    for y in range(0, gray.shape[0], strip_rows):
+        ink[y:y + strip_rows] = np.count_nonzero(gray[y:y + strip_rows] < level, axis=1)
+    return ink
+
+
+def plan_bands(gray, band_height=2048, overlap=64, search=None):
+    """Return (bands, cuts): overlapping (y0, y1) bands and the cut rows between them
+
+    ``cuts`` has one more entry than ``bands``; band i owns rows
+    cuts[i]..cuts[i+1] and reads ``overlap`` extra rows on each side.
+    """
+    height = gray.shape[0]
+    if height <= band_height + overlap:
+        return [(0, height)], [0, height]
+    search = search or band_height // 4
+    ink = row_ink(gray).astype(np.float64)
+    # Smooth so the middle of a gap scores lower than a row just past a line
+    ink = np.convolve(ink, np.ones(9) / 9.0, mode='same')
+
+    cuts = [0]
+    while height - cuts[-1] > band_height + overlap:
+        target = cuts[-1] + band_height
+        lo = max(cuts[-1] + band_height // 2, target - search)
+        hi = min(height - overlap, target + search)
+        window = ink[lo:hi]
+        # Prefer empty rows; break ties towards the target height
+        distance = np.abs(np.arange(lo, hi) - target) / float(search)
+        cuts.append(int(lo + np.argmin(window + distance * (window.max() + 1) * 0.01)))
+    cuts.append(height)
+    bands = [(max(0, a - overlap), min(height, b + overlap)) for a, b in zip(cuts, cuts[1:])]
+    return bands, cuts
+
+
+def owns(word, index, cuts, band_top):
+    """True if band ``index`` (starting at page row ``band_top``) owns ``word``"""
+    center = band_top + word.top + word.height / 2.0
+    return cuts[index] <= center < cuts[index + 1]
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def dedupe_words(words, cuts, overlap, min_iou=0.5):
+    """Drop words read twice across a cut (same text, overlapping boxes)
+
+    Only words within ``overlap`` rows of an inner cut are compared; of a
+    duplicate pair the higher-confidence reading is kept. Order is preserved.
+    """
+    dropped = set()
+    for cut in cuts[1:-1]:
+        near = [i for i, word in enumerate(words)
+                if word.top - overlap <= cut <= word.top + word.height + overlap]
+        for n, i in enumerate(near):
+            for j in near[n + 1:]:
+                if i in dropped or j in dropped:
+                    continue
+                a, b = words[i], words[j]
+                if a.text == b.text and _iou(a.box, b.box) >= min_iou:
+                    dropped.add(j if a.conf >= b.conf else i)
+    return [word for i, word in enumerate(words) if i not in dropped]
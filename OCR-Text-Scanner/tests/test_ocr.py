@@ -11,43 +11,17 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 def test_imports():
-    """Test if all required modules can be imported"""
+    """Test if all required modules are installed (without importing them)"""
+    import importlib.util
     print("Testing imports...")
     
-    try:
-        import PyQt5
-        print("✓ PyQt5 imported successfully")
-    except ImportError as e:
-        print(f"✗ PyQt5 import failed: {e}")
-        return False
-        
-    try:
-        import cv2
-        print("✓ OpenCV imported successfully")
-    except ImportError as e:
-        print(f"✗ OpenCV import failed: {e}")
-        return False
-        
-    try:
-        import pytesseract
-        print("✓ PyTesseract imported successfully")
-    except ImportError as e:
-        print(f"✗ PyTesseract import failed: {e}")
-        return False
-        
-    try:
-        from PIL import Image
-        print("✓ Pillow imported successfully")
-    except ImportError as e:
-        print(f"✗ Pillow import failed: {e}")
-        return False
-        
-    try:
-        import numpy as np
-        print("✓ NumPy imported successfully")
-    except ImportError as e:
-        print(f"✗ NumPy import failed: {e}")
-        return False
+    modules = [('PyQt5', 'PyQt5'), ('cv2', 'OpenCV'), ('pytesseract', 'PyTesseract'),
+               ('PIL', 'Pillow'), ('numpy', 'NumPy')]
+    for module, name in modules:
+        if importlib.util.find_spec(module) is None:
+            print(f"✗ {name} is not installed")
+            return False
+        print(f"✓ {name} found")
         
     return True
 
@@ -110,6 +84,726 @@ def test_basic_ocr():
         print(f"✗ Basic OCR test failed: {e}")
         return False
 
+def test_batch_resume_and_page_discovery(tmp_path):
+    """Batch mode finds multi-page TIFFs and resumes from JSONL output"""
+    import json
+    from PIL import Image
+    import batch_ocr
+
+    pages = [Image.new('RGB', (40, 20), 'white') for _ in range(3)]
+    tiff_path = tmp_path / "scan.tif"
+    pages[0].save(tiff_path, save_all=True, append_images=pages[1:])
+    (tmp_path / "notes.txt").write_text("not an image")
+
+    documents = batch_ocr.find_documents([str(tmp_path)])
+    assert documents == [str(tiff_path)]
+    assert batch_ocr.count_pages(str(tiff_path)) == 3
+    assert batch_ocr.load_page(str(tiff_path), 2).shape == (20, 40, 3)
+
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({'path': str(tiff_path), 'page': 0, 'text': 'done'}) + "\n" +
+        json.dumps({'path': str(tiff_path), 'page': 1, 'error': 'boom'}) + "\n" +
+        '{"path": "torn'
+    )
+    assert batch_ocr.completed_pages(str(output), 'jsonl') == {(str(tiff_path), 0)}
+
+    writer = batch_ocr.ResultWriter(str(output), 'jsonl', append=True)
+    writer.write({'path': str(tiff_path), 'page': 2, 'text': 'resumed'})
+    writer.close()
+    assert [json.loads(line)['page'] for line in output.read_text().splitlines()] == [0, 1, 2]
+
+    names = {batch_ocr.page_output_path('out', p, 0, 'text') for p in ('../a/x.png', 'a/x.png')}
+    assert len(names) == 2
+
+def _tesseract_data(rows):
+    """Build an image_to_data style dict from (level, block, par, line, text, conf, box) rows"""
+    keys = ['level', 'block_num', 'par_num', 'line_num', 'text', 'conf', 'left', 'top', 'width', 'height']
+    data = {key: [] for key in keys}
+    for level, block, par, line, text, conf, (x, y, w, h) in rows:
+        for key, value in zip(keys, (level, block, par, line, text, conf, x, y, w, h)):
+            data[key].append(value)
+    return data
+
+def _fixed_engine(rows):
+    """OCREngine class answering every call with ``rows``, or ``rows(image, psm)`` if callable"""
+    from ocr_engines import OCREngine
+
+    class FixedEngine(OCREngine):
+        def recognize(self, image, psm=6, lang='eng', config=''):
+            return _tesseract_data(rows(image, psm) if callable(rows) else rows)
+    return FixedEngine
+
+def _tiff(values):
+    """A multi-page TIFF with one flat 30x20 page per gray value"""
+    import io
+    import numpy as np
+    from PIL import Image
+    buffer = io.BytesIO()
+    frames = [Image.fromarray(np.full((20, 30, 3), v, np.uint8)) for v in values]
+    frames[0].save(buffer, format='TIFF', save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+def test_single_pass_ocr_result(monkeypatch):
+    """extract_text runs Tesseract once and rebuilds text from word data"""
+    import numpy as np
+    import pytesseract
+    import ocr_core
+
+    data = _tesseract_data([
+        (1, 0, 0, 0, '', -1, (0, 0, 200, 100)),
+        (4, 1, 1, 1, '', -1, (0, 0, 100, 10)),
+        (5, 1, 1, 1, 'Hello', 95.0, (0, 0, 40, 10)),
+        (5, 1, 1, 1, 'world', 91.5, (50, 0, 40, 10)),
+        (5, 1, 1, 2, 'again', 88.0, (0, 20, 40, 10)),
+        (5, 1, 2, 1, ' ', -1, (0, 40, 5, 10)),
+        (5, 1, 2, 1, 'Next', 80.0, (0, 40, 30, 10)),
+        (5, 2, 1, 1, 'Footer', 70.0, (0, 80, 50, 10)),
+    ])
+    calls = []
+    monkeypatch.setattr(pytesseract, 'image_to_data', lambda *a, **k: calls.append(k) or data)
+    monkeypatch.setattr(pytesseract, 'image_to_string', lambda *a, **k: _fail_second_pass())
+
+    text, result = ocr_core.OCRProcessor.extract_text(np.full((100, 200, 3), 255, np.uint8))
+
+    assert len(calls) == 1
+    assert text == "Hello world\nagain\n\nNext\n\nFooter"
+    assert [word.text for word in result.words] == ['Hello', 'world', 'again', 'Next', 'Footer']
+    assert [line.text for line in result.lines] == ['Hello world', 'again', 'Next', 'Footer']
+    assert len(result.blocks) == 2
+    assert result.words[1].box == (50, 0, 40, 10)
+
+def _fail_second_pass():
+    raise AssertionError("image_to_string should not be called")
+
+def test_engine_tsv_parsing_and_pool():
+    """TSV from a persistent engine parses like image_to_data; the pool reuses engines"""
+    import threading
+    from ocr_engines import EnginePool, OCREngine, parse_tsv
+
+    tsv = ("level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+           "1\t1\t0\t0\t0\t0\t0\t0\t100\t50\t-1\t\n"
+           "5\t1\t1\t1\t1\t1\t4\t5\t30\t12\t96.25\tHello\n")
+    data = parse_tsv(tsv)
+    assert data['text'] == ['', 'Hello']
+    assert data['conf'] == [-1.0, 96.25]
+    assert data['left'][1] == 4
+
+    created = []
+
+    class CountingEngine(OCREngine):
+        def __init__(self):
+            created.append(self)
+
+    pool = EnginePool(size=2, factory=CountingEngine)
+    seen = []
+
+    def borrow():
+        for _ in range(20):
+            with pool.acquire() as engine:
+                seen.append(engine)
+
+    threads = [threading.Thread(target=borrow) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) <= 2
+    assert len(seen) == 80
+
+def test_tesserocr_engine_keeps_tessdata_and_restores_variables(monkeypatch):
+    """Switching language keeps the tessdata path; -c variables do not outlive a call"""
+    import types
+    import numpy as np
+    from ocr_engines import TesserocrEngine
+
+    class FakeAPI:
+        def __init__(self, **kwargs):
+            self.inits = [kwargs]
+            self.variables = {'preserve_interword_spaces': '0'}
+            self.seen = {}
+        def Init(self, **kwargs):
+            self.inits.append(kwargs)
+        def GetVariableAsString(self, name):
+            return self.variables.get(name)
+        def SetVariable(self, name, value):
+            self.variables[name] = value
+        def SetPageSegMode(self, psm):
+            pass
+        def SetImage(self, image):
+            pass
+        def Recognize(self):
+            self.seen = dict(self.variables)
+        def GetTSVText(self, page):
+            return ''
+
+    monkeypatch.setitem(sys.modules, 'tesserocr', types.SimpleNamespace(PyTessBaseAPI=FakeAPI))
+    engine = TesserocrEngine(tessdata_path='/opt/tessdata')
+    engine.recognize(np.zeros((4, 4), np.uint8), lang='deu', config='-c preserve_interword_spaces=1')
+    assert engine.api.inits == [{'lang': 'eng', 'path': '/opt/tessdata'}, {'lang': 'deu', 'path': '/opt/tessdata'}]
+    assert engine.api.seen['preserve_interword_spaces'] == '1'
+    assert engine.api.variables['preserve_interword_spaces'] == '0'
+
+def _qt_app():
+    """Create (or reuse) a QApplication that works without a display"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def _process_events_until(app, condition, timeout=5.0):
+    import time
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+def test_background_ocr_newest_request_wins(monkeypatch):
+    """OCR runs off the GUI thread and stale results are dropped"""
+    import time
+    import numpy as np
+    import main
+
+    app = _qt_app()
+    calls = []
+
+    def slow_extract(image, roi=None, preprocess=True, **kwargs):
+        calls.append(image.shape)
+        time.sleep(0.2)
+        return f"text {image.shape[1]}", None
+
+    monkeypatch.setattr(main.OCRProcessor, 'extract_text', staticmethod(slow_extract))
+    window = main.MainWindow()
+    window.threshold_cb.setChecked(False)
+    window.enhance_contrast_cb.setChecked(False)
+    window.denoise_cb.setChecked(False)
+
+    window.current_image = np.full((20, 30, 3), 255, np.uint8)
+    started = time.perf_counter()
+    window.run_ocr()
+    assert time.perf_counter() - started < 0.1  # GUI thread is not blocked
+    window.current_image = np.full((20, 40, 3), 255, np.uint8)
+    window.run_ocr()
+
+    _process_events_until(app, lambda: window.ocr_task is None)
+    assert window.text_output.toPlainText() == "text 40"
+    assert not window.progress_bar.isVisible()
+
+def test_live_ocr_skips_static_scenes_and_votes():
+    """Live OCR re-runs only on scene change and votes text across passes"""
+    import numpy as np
+    from live_ocr import FrameChangeDetector, LiveOCRController
+
+    page_a = np.full((120, 160), 255, np.uint8)
+    page_a[40:60, 20:140] = 0
+    page_b = np.full((120, 160), 255, np.uint8)
+    page_b[70:100, 10:60] = 0
+
+    controller = LiveOCRController(votes_per_scene=3, cpu_share=1.0,
+                                   detector=FrameChangeDetector(stable_frames=2))
+    now = 0.0
+    passes = []
+    texts = iter(["Hello", "He1lo", "Hello", "World", "World", "World"])
+    for frame in [page_a] * 20 + [page_b] * 20:
+        now += 0.033
+        if controller.offer(frame, now):
+            controller.submitted(now)
+            passes.append(controller.completed(next(texts), now + 0.01))
+
+    assert len(passes) == 6  # three voting passes per scene, none while static
+    assert passes[2] == "Hello"
+    assert passes[-1] == "World"
+
+def _sample_page():
+    """White page with a two-line block, a one-line block and a filled box"""
+    import cv2
+    import numpy as np
+    page = np.full((600, 900, 3), 255, np.uint8)
+    cv2.putText(page, "First block line", (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    cv2.putText(page, "and its second", (40, 120), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    cv2.putText(page, "Footer", (300, 520), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    cv2.rectangle(page, (600, 250), (850, 400), (90, 90, 90), -1)
+    return page
+
+def test_text_region_detection_and_merge(monkeypatch):
+    """Only text blocks are OCRed, with PSM per block, merged in reading order"""
+    import ocr_core
+    from ocr_engines import EnginePool
+    from text_regions import detect_text_regions, estimate_line_count
+
+    page = _sample_page()
+    regions = detect_text_regions(page)
+    assert len(regions) == 2
+    (x0, y0, w0, h0), (x1, y1, _, _) = regions
+    assert y0 < y1
+    assert estimate_line_count(page[y0:y0+h0, x0:x0+w0, 0]) == 2
+
+    FakeEngine = _fixed_engine(lambda image, psm: [
+        (5, 1, 1, 1, 'two lines' if psm == 6 else 'single', 90.0, (2, 3, 10, 10))])
+
+    monkeypatch.setattr(ocr_core, 'get_default_pool', lambda: EnginePool(size=2, factory=FakeEngine))
+    text, result = ocr_core.OCRProcessor.extract_text_regions(page)
+    assert text == "two lines\n\nsingle"
+    assert result.words[1].box[:2] == (x1 + 2, y1 + 3)
+    assert [block.block_num for block in result.blocks] == [1, 2]
+
+    # Calls share one set of worker threads, so per-thread pipelines are reused
+    import threading
+    threads = set()
+    pipeline = ocr_core.OCRProcessor.get_pipeline
+    monkeypatch.setattr(ocr_core.OCRProcessor, 'get_pipeline',
+                        staticmethod(lambda **kw: threads.add(threading.current_thread()) or pipeline(**kw)))
+    for _ in range(3):
+        ocr_core.OCRProcessor.extract_text_regions(page, preprocess_options={})
+    assert len(threads) <= 2
+
+def test_ocr_cache_hits_and_disk_eviction(tmp_path):
+    """Identical pixels and settings skip Tesseract; the disk store stays under budget"""
+    import os
+    import numpy as np
+    import ocr_core
+    from ocr_cache import OCRCache
+    from ocr_engines import OCREngine
+
+    calls = []
+
+    class CountingEngine(OCREngine):
+        def recognize(self, image, psm=6, lang='eng', config=''):
+            calls.append(psm)
+            return _tesseract_data([(5, 1, 1, 1, 'cached', 90.0, (1, 2, 30, 10))])
+
+    image = np.full((60, 80, 3), 255, np.uint8)
+    cache = OCRCache(disk_dir=str(tmp_path / 'cache'))
+    engine = CountingEngine()
+    first = ocr_core.OCRProcessor.extract_text(image, engine=engine, cache=cache)
+    second = ocr_core.OCRProcessor.extract_text(image.copy(), engine=engine, cache=cache)
+    assert len(calls) == 1
+    assert second[0] == first[0] == "cached"
+    assert second[1].words[0].box == (1, 2, 30, 10)
+
+    ocr_core.OCRProcessor.extract_text(image, engine=engine, cache=cache, psm=7)
+    image[0, 0] = 0
+    ocr_core.OCRProcessor.extract_text(image, engine=engine, cache=cache)
+    assert len(calls) == 3  # a different setting or pixel is a miss
+
+    # A fresh process sharing the directory gets hits from disk
+    restarted = OCRCache(disk_dir=str(tmp_path / 'cache'))
+    ocr_core.OCRProcessor.extract_text(image, engine=engine, cache=restarted)
+    assert len(calls) == 3 and restarted.hits == 1
+
+    class OtherBackend(CountingEngine):
+        name = 'other'
+
+    ocr_core.OCRProcessor.extract_text(image, engine=OtherBackend(), cache=restarted)
+    assert len(calls) == 4  # results are not shared across backends
+
+    small = OCRCache(disk_dir=str(tmp_path / 'small'), max_disk_bytes=1000)
+    for i in range(20):
+        small.put(small.make_key(np.full((4, 4), i, np.uint8)), {'words': [], 'pad': 'x' * 100})
+    sizes = [os.path.getsize(os.path.join(root, name))
+             for root, _, files in os.walk(tmp_path / 'small') for name in files]
+    assert sum(sizes) <= 1000
+
+    key = small.make_key(np.zeros((2, 2), np.uint8))
+    for _ in range(5):
+        small.put(key, {'words': []})
+    assert small._disk_bytes == small._scan_disk_bytes()  # overwrites are not counted twice
+
+def test_preprocess_pipeline_stages_and_buffers():
+    """Default stages match the legacy chain; deskew/rescale boxes map back"""
+    import cv2
+    import numpy as np
+    import ocr_core
+    from preprocessing import PreprocessPipeline, estimate_skew
+
+    page = _sample_page()
+    gray = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    _, legacy = cv2.threshold(cv2.medianBlur(cv2.equalizeHist(gray), 3), 0, 255,
+                              cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    assert np.array_equal(ocr_core.OCRProcessor.preprocess_image(page), legacy)
+
+    pipeline = PreprocessPipeline.from_options(use_opencl=False)
+    first = pipeline.run(page)
+    buffers = {slot: buffer.ctypes.data for slot, buffer in pipeline._buffers.items()}
+    second = pipeline.run(page)
+    assert first is not second and np.array_equal(first, second)
+    assert {slot: buffer.ctypes.data for slot, buffer in pipeline._buffers.items()} == buffers
+    assert set(pipeline.timings) == {'grayscale', 'equalize', 'denoise', 'threshold'}
+    assert pipeline.runs == 2 and pipeline.transform is None
+
+    rotation = cv2.getRotationMatrix2D((450, 300), 4.0, 1.0)
+    skewed = cv2.warpAffine(page, rotation, (900, 600), borderValue=(255, 255, 255))
+    pipeline = PreprocessPipeline.from_options(deskew=True, rescale=True, use_opencl=False)
+    straight = pipeline.run(skewed)
+    assert abs(estimate_skew(cv2.cvtColor(skewed, cv2.COLOR_BGR2GRAY)) + 4.0) < 1.0
+    assert abs(estimate_skew(straight) or 0.0) < 1.0
+    assert straight.shape[0] > skewed.shape[0]  # small text is scaled up
+
+    # A box found in the processed image maps back onto the skewed input
+    corner = np.array([40.0, 80.0, 1.0])
+    x, y = pipeline.transform @ corner
+    word = ocr_core.OCRWord('First', 90.0, int(x), int(y), 30, 20)
+    mapped = ocr_core.OCRResult.from_words([word]).unwarp(pipeline.transform).words[0]
+    assert abs(mapped.left - 40) <= 2 and abs(mapped.top - 80) <= 2
+
+def test_tiled_ocr_cuts_whitespace_and_stitches(tmp_path):
+    """Bands are cut between lines and every line is read exactly once"""
+    import cv2
+    import numpy as np
+    import ocr_core
+    from ocr_engines import OCREngine
+    from tiling import dedupe_words, load_gray_memmap, plan_bands, row_ink
+
+    page = np.full((3000, 600), 255, np.uint8)
+    line_tops = list(range(40, 2950, 45))
+    for top in line_tops:
+        cv2.putText(page, "tiled text line", (20, top + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    path = str(tmp_path / 'page.png')
+    cv2.imwrite(path, page)
+    mapped = load_gray_memmap(path)
+    assert isinstance(mapped, np.memmap) and np.array_equal(mapped, page)
+    color_path = str(tmp_path / 'page.jpg')
+    cv2.imwrite(color_path, cv2.cvtColor(page[:900], cv2.COLOR_GRAY2BGR))
+    striped = load_gray_memmap(color_path, strip_rows=128)
+    expected = cv2.imread(color_path, cv2.IMREAD_GRAYSCALE)
+    assert striped.shape == expected.shape and np.abs(striped.astype(int) - expected).max() <= 2
+
+    bands, cuts = plan_bands(mapped, band_height=700, overlap=40)
+    assert len(bands) > 3 and bands[0][0] == 0 and bands[-1][1] == 3000
+    assert all(row_ink(page)[cut] == 0 for cut in cuts[1:-1])
+
+    class LineEngine(OCREngine):
+        """One word per run of inked rows, including lines cut by the band edge"""
+        def recognize(self, image, psm=6, lang='eng', config=''):
+            inked = np.count_nonzero(image < 128, axis=1) > 0
+            edges = np.flatnonzero(np.diff(np.concatenate([[0], inked.astype(int), [0]])))
+            rows = [(5, 1, 1, i + 1, 'line', 90.0, (20, start, 300, end - start))
+                    for i, (start, end) in enumerate(zip(edges[::2], edges[1::2]))]
+            return _tesseract_data(rows)
+
+    text, result = ocr_core.OCRProcessor.extract_text_tiled(mapped, band_height=700, overlap=40, engine=LineEngine())
+    assert len(result.words) == len(line_tops)
+    tops = sorted(word.top for word in result.words)
+    assert all(abs(top - expected) < 25 for top, expected in zip(tops, line_tops))
+
+    duplicate = ocr_core.OCRWord('line', 80.0, 20, 1000, 300, 20)
+    kept = dedupe_words([ocr_core.OCRWord('line', 90.0, 21, 1001, 300, 20), duplicate], [0, 1010, 3000], 40)
+    assert [word.conf for word in kept] == [90.0]
+
+def test_camera_frames_are_prescaled_and_dropped_when_gui_lags():
+    """The capture thread scales previews and keeps only the newest frame"""
+    import threading
+    import numpy as np
+    import main
+
+    app = _qt_app()
+    window = main.MainWindow()
+    camera = window.camera_thread
+    camera.set_display_size(320, 240)
+    # Five frames arrive from a capture thread before the GUI thread gets to run
+    capture = threading.Thread(target=lambda: [camera.publish(np.full((720, 1280, 3), i, np.uint8))
+                                               for i in range(5)])
+    capture.start()
+    capture.join()
+    assert camera.dropped == 4
+
+    _process_events_until(app, lambda: window.current_image is not None)
+    assert window.current_image[0, 0, 0] == 4  # newest frame wins
+    pixmap = window.image_label.pixmap()
+    assert (pixmap.width(), pixmap.height()) == (320, 180)
+    assert window.image_label.source_size == (1280, 720)
+    assert camera.take_frame() is None
+
+    # Boxes from OCR on one frame are dropped once the next frame is shown
+    from ocr_core import OCRResult
+    window.image_label.set_overlay(OCRResult.from_data(_tesseract_data(
+        [(5, 1, 1, 1, 'word', 90.0, (10, 10, 50, 20))])).columns())
+    camera.publish(np.full((720, 1280, 3), 5, np.uint8))
+    _process_events_until(app, lambda: window.current_image[0, 0, 0] == 5)
+    assert window.image_label.overlay is None
+
+def test_roi_maps_through_letterboxing_and_crops_camera_frames():
+    """ROI drags map to exact source pixels and the camera thread crops them"""
+    import threading
+    import numpy as np
+    from PyQt5.QtCore import QPoint, Qt
+    from PyQt5.QtTest import QTest
+    import main
+
+    app = _qt_app()
+    window = main.MainWindow()
+    label = window.image_label
+    label.resize(600, 400)
+    window.display_image(np.zeros((500, 1000, 3), np.uint8))
+    rect = label.pixmap_rect()
+    assert (rect.width(), rect.height()) == (600, 300)  # letterboxed vertically
+
+    # Drag from source (100, 50) to (400, 250): scale 0.6 on both axes
+    QTest.mousePress(label, Qt.LeftButton, pos=QPoint(rect.x() + 60, rect.y() + 30))
+    QTest.mouseMove(label, QPoint(rect.x() + 240, rect.y() + 150))
+    QTest.mouseRelease(label, Qt.LeftButton, pos=QPoint(rect.x() + 240, rect.y() + 150))
+    assert label.get_roi_coordinates() == (100, 50, 300, 200)
+
+    window.roi_only_cb.setChecked(True)
+    camera = window.camera_thread
+    camera.set_roi(label.get_roi_coordinates())
+    frame = np.zeros((500, 1000, 3), np.uint8)
+    frame[50:250, 100:400] = 7
+    capture = threading.Thread(target=camera.publish, args=(frame,))
+    capture.start()
+    capture.join()
+    _process_events_until(app, lambda: window.current_image is frame)
+    assert label.get_roi_coordinates() == (100, 50, 300, 200)  # same-size frames keep the ROI
+
+    capture = threading.Thread(target=camera.publish, args=(frame,))
+    capture.start()
+    capture.join()
+    _, _, roi, region = camera.take_frame()
+    assert roi == (100, 50, 300, 200)
+    assert region.shape == (200, 300, 3) and region.flags['C_CONTIGUOUS'] and (region == 7).all()
+
+def test_headless_core_imports_without_qt_or_opencv():
+    """ocr_core and the batch CLI can be imported without loading Qt"""
+    import subprocess
+    src = os.path.join(os.path.dirname(__file__), '..', 'src')
+    check = ("import sys, ocr_core, ocr_engines; "
+             "print(','.join(m for m in ('PyQt5', 'cv2', 'PIL', 'numpy') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=src, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ''
+    check = "import sys, batch_ocr; print('PyQt5' in sys.modules)"
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=src, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == 'False'
+
+async def _http(port, method, path, body=b''):
+    """Send one request with Connection: close and return the raw response"""
+    import asyncio
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return raw
+
+def _parse_http(raw):
+    head, _, body = raw.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    if headers.get('Transfer-Encoding') == 'chunked':
+        chunks = b''
+        while True:
+            size, _, body = body.partition(b'\r\n')
+            size = int(size, 16)
+            if not size:
+                break
+            chunks, body = chunks + body[:size], body[size + 2:]
+        body = chunks
+    return int(lines[0].split()[1]), headers, body
+
+def test_ocr_service_streams_pages_and_applies_backpressure():
+    """Single pages return JSON, multi-page TIFFs stream NDJSON, oversized uploads give 413"""
+    import asyncio
+    import json
+    from ocr_engines import EnginePool
+    from ocr_service import OCRService
+
+    FakeEngine = _fixed_engine(lambda image, psm: [(5, 1, 1, 1, f"page{int(image.mean())}", 90.0, (1, 2, 3, 4))])
+
+    async def scenario():
+        service = OCRService(workers=2, queue_size=4, pool=EnginePool(size=2, factory=FakeEngine))
+        _, port = await service.start(port=0)
+        try:
+            single = _parse_http(await _http(port, 'POST', '/ocr?preprocess=none', _tiff([10])))
+            multi = _parse_http(await _http(port, 'POST', '/ocr?preprocess=none', _tiff([10, 20, 30])))
+            full = _parse_http(await _http(port, 'POST', '/ocr?preprocess=none', _tiff([1, 2, 3, 4, 5])))
+            bad = _parse_http(await _http(port, 'POST', '/ocr?roi=1,2', _tiff([10])))
+            metrics = _parse_http(await _http(port, 'GET', '/metrics'))
+        finally:
+            await service.close()
+        return single, multi, full, bad, metrics
+
+    single, multi, full, bad, metrics = asyncio.run(scenario())
+    status, _, body = single
+    payload = json.loads(body)
+    assert status == 200 and payload['text'] == 'page10'
+    assert payload['words'][0]['box'] == [1, 2, 3, 4]
+
+    status, headers, body = multi
+    assert status == 200 and headers['Content-Type'] == 'application/x-ndjson'
+    pages = sorted((json.loads(line) for line in body.decode().splitlines()), key=lambda p: p['page'])
+    assert [(p['page'], p['text']) for p in pages] == [(0, 'page10'), (1, 'page20'), (2, 'page30')]
+
+    assert full[0] == 413
+    assert bad[0] == 400
+    stats = json.loads(metrics[2])
+    assert (stats['requests'], stats['pages'], stats['rejected']) == (3, 4, 1)
+    assert stats['latency_ms']['p50'] is not None and stats['queue_depth'] == 0
+
+def test_ocr_service_answers_every_failure(monkeypatch):
+    """A busy queue gives 503, bad headers 400, and a crashing worker 500 or an error line"""
+    import asyncio
+    import json
+    import pytest
+    import ocr_service
+    from ocr_engines import EnginePool, OCREngine
+    from ocr_service import HTTPError, OCRService
+
+    def crash(image, **options):
+        raise RuntimeError("engine crashed")
+
+    async def raw(port, request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def scenario():
+        service = OCRService(workers=1, queue_size=2, pool=EnginePool(size=1, factory=OCREngine))
+        _, port = await service.start(port=0)
+        try:
+            service.queue.put_nowait(None)
+            with pytest.raises(HTTPError) as busy:
+                service.check_capacity(2)
+            service.queue.get_nowait()
+            bad = _parse_http(await raw(port, b"POST /ocr HTTP/1.1\r\nContent-Length: abc\r\n\r\n"))
+            monkeypatch.setattr(ocr_service.OCRProcessor, 'ocr', staticmethod(crash))
+            single = _parse_http(await _http(port, 'POST', '/ocr', _tiff([10])))
+            multi = _parse_http(await _http(port, 'POST', '/ocr', _tiff([10, 10])))
+        finally:
+            await service.close()
+        return busy.value.status, bad, single, multi
+
+    busy, bad, single, multi = asyncio.run(scenario())
+    assert busy == 503 and bad[0] == 400
+    assert single[0] == 500 and 'engine crashed' in json.loads(single[2])['error']
+    lines = [json.loads(line) for line in multi[2].decode().splitlines()]
+    assert multi[0] == 200 and sorted(line['page'] for line in lines) == [0, 1]
+    assert all('engine crashed' in line['error'] for line in lines)
+
+def test_benchmark_suite_scores_cer_and_flags_regressions():
+    """Synthetic pages are reproducible; the suite reports CER and compares runs"""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+    from bench_ocr import char_error_rate, compare, normalize_text, run_suite
+    from synthetic_docs import DocSpec, generate_document
+
+    spec = DocSpec(font_size=11, dpi=100, page_inches=(4, 2), pages=2, noise=5.0, rotation=1.0)
+    pages = generate_document(spec)
+    again = generate_document(spec)
+    assert len(pages) == 2 and pages[0][0].shape == (200, 400, 3)
+    assert (pages[0][0] == again[0][0]).all() and pages[1][1] == again[1][1] != pages[0][1]
+    assert char_error_rate("abc def", "abx  def\n") == 1 / 7.0
+
+    FakeEngine = _fixed_engine([(5, 1, 1, 1, "invoice", 90.0, (0, 0, 10, 10)),
+                                (5, 1, 1, 1, "total", 90.0, (12, 0, 10, 10))])
+
+    report = run_suite([spec], {"none": None, "default": {}}, {"fake": FakeEngine()})
+    results = report["results"]
+    assert [(r["config"], r["pages"]) for r in results] == [("none", 2), ("default", 2)]
+    assert results[1]["stage_ms"] and not results[0]["stage_ms"]
+    lengths = [len(normalize_text(truth)) for _, truth in pages]
+    expected = sum(char_error_rate(truth, "invoice total") * n for (_, truth), n in zip(pages, lengths)) / sum(lengths)
+    assert abs(results[0]["cer"] - expected) < 1e-4
+
+    baseline = {"results": [dict(r, cer=r["cer"] - 0.1) for r in results]}
+    assert len(compare(report, baseline)) == 2
+    assert compare(report, report) == []
+
+def test_metrics_registry_records_stages_and_exports():
+    """OCR stages land in histograms, exported as JSON/Prometheus; one call can be profiled"""
+    import json
+    import numpy as np
+    import ocr_core
+    import ocr_metrics
+
+    FakeEngine = _fixed_engine([(5, 1, 1, 1, "word", 90.0, (0, 0, 10, 10))])
+
+    registry = ocr_metrics.registry
+    registry.reset()
+    seen = []
+    registry.add_hook(lambda name, seconds: seen.append(name))
+    try:
+        page = np.full((60, 80, 3), 255, np.uint8)
+        ocr_core.OCRProcessor.ocr(page, preprocess_options={}, engine=FakeEngine())
+        (text, _), report = ocr_metrics.profile_call(ocr_core.OCRProcessor.ocr, page, engine=FakeEngine())
+        _, sampled = ocr_metrics.profile_call(sum, range(10), mode='sample')
+    finally:
+        registry.hooks.clear()
+
+    assert text == "word" and 'function calls' in report and 'samples every' in sampled
+    assert {'ocr', 'tesseract', 'preprocess', 'preprocess.threshold'} <= set(seen)
+    summary = json.loads(registry.to_json())
+    assert summary['counters']['ocr_calls'] == 2
+    assert summary['stages']['tesseract']['count'] == 2
+    assert summary['stages']['preprocess']['count'] == 1
+
+    prometheus = registry.to_prometheus()
+    assert 'ocr_ocr_calls_total 2' in prometheus
+    assert 'ocr_stage_seconds_count{stage="tesseract"} 2' in prometheus
+    assert 'ocr_stage_seconds_bucket{stage="tesseract",le="+Inf"} 2' in prometheus
+
+    # Worker snapshots merge into the parent's totals
+    other = ocr_metrics.MetricsRegistry()
+    other.observe('tesseract', 0.003)
+    other.inc('ocr_calls')
+    registry.merge(other.snapshot())
+    assert registry.histograms['tesseract'].count == 3 and registry.counters['ocr_calls'] == 3
+    assert other.histograms['tesseract'].quantile(0.5) == 0.005
+    registry.reset()
+
+def test_columnar_results_and_overlay_layer():
+    """Columns filter and sort without per-word objects; the overlay is a cached transparent layer"""
+    import numpy as np
+    import main
+    from ocr_core import OCRColumns, OCRResult
+    from overlay import composite, render_overlay
+
+    data = _tesseract_data([
+        (4, 1, 1, 1, '', -1, (0, 0, 300, 20)),
+        (5, 1, 1, 1, 'world', 91.0, (120, 10, 60, 20)),
+        (5, 1, 1, 1, 'Hello', 95.0, (10, 10, 80, 20)),
+        (5, 1, 1, 1, ' ', -1, (100, 10, 5, 20)),
+        (5, 1, 1, 2, 'faint', 12.0, (10, 40, 50, 20)),
+        (5, 2, 1, 1, 'Footer', 70.0, (10, 150, 80, 20)),
+    ])
+    columns = OCRColumns.from_data(data)
+    assert list(columns.text) == ['world', 'Hello', 'faint', 'Footer']
+    assert columns.boxes.dtype == np.int32 and columns.boxes.shape == (4, 4)
+    assert len(OCRResult.from_data(data).columns()) == 4
+
+    ordered = columns.filter(min_conf=30).reading_order()
+    assert list(ordered.text) == ['Hello', 'world', 'Footer']
+    assert list(columns.filter(region=(0, 0, 200, 100)).text) == ['world', 'Hello', 'faint']
+    shifted = ordered.offset(5, 7)
+    assert shifted.boxes[0].tolist() == [15, 17, 80, 20] and ordered.boxes[0].tolist() == [10, 10, 80, 20]
+    assert [w.text for w in OCRResult.from_words(ordered.to_words()).words] == ['Hello', 'world', 'Footer']
+
+    layer = render_overlay(ordered, (200, 100), scale=(0.5, 0.5), labels=False)
+    assert layer.shape == (100, 200, 4)
+    assert tuple(layer[5, 20]) == (0, 255, 0, 255)  # top edge of Hello at (5, 5)-(45, 15)
+    assert layer[10, 20, 3] == 0  # box interiors stay transparent
+    blended = composite(np.full((100, 200, 3), 200, np.uint8), layer)
+    assert tuple(blended[5, 20]) == (0, 255, 0) and tuple(blended[10, 20]) == (200, 200, 200)
+
+    app = _qt_app()
+    window = main.MainWindow()
+    label = window.image_label
+    label.resize(600, 400)
+    window.current_image = np.full((500, 1000, 3), 255, np.uint8)
+    window.display_image(window.current_image)
+    window.show_text_overlay(OCRResult.from_data(data), roi=(100, 50, 400, 300))
+    assert list(label.overlay.text) == ['world', 'Hello', 'Footer']
+    assert label.overlay.boxes[1].tolist() == [110, 60, 80, 20]
+    rendered = label.grab().toImage()  # paints: pixmap + composited layer
+    first = label._overlay_layer[1]
+    label.grab()
+    assert label._overlay_layer[1] is first  # repaints reuse the rendered layer
+    rect = label.pixmap_rect()
+    assert rendered.pixelColor(rect.x() + 66 + 10, rect.y() + 36).green() == 255
+    window.display_image(np.zeros((200, 200, 3), np.uint8))
+    assert label.overlay is None  # a different image drops stale boxes
+    app.processEvents()
+
 def main():
     """Run all tests"""
     print("OCR Text Scanner - Dependency Test")
@@ -0,0 +1,48 @@
+"""Measure cold-start time of the face pipeline modules and CLIs.
+
+Run from the face_recognition_arcface directory:
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CASES = [
+    ("import src.recognize", [sys.executable, "-c", "import src.recognize"]),
+    ("load gallery", [sys.executable, "-c", "from src.recognize import load_identity_database; load_identity_database('data/identities')"]),
+    ("events query --help", [sys.executable, "-m", "src.events", "--help"]),
+    ("enroll --help", [sys.executable, "-m", "src.enroll", "--help"]),
+    ("eager cv2+mediapipe+onnxruntime", [sys.executable, "-c", "import cv2, mediapipe, onnxruntime"]),
+]
+
+
+def time_command(command, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.repeat)
+    print(f"{'interpreter only':<36} {baseline * 1000:8.1f} ms")
+    for name, command in CASES:
+        seconds = time_command(command, args.repeat)
+        print(f"{name:<36} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .align import _bbox_iou
+from .detect import detect_faces
+from .embed import ArcFaceEmbedder
+from .recognize import identify_face, largest_boxes
+from .utils import cv2
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class Decisions:
+    """Knobs the controller trades between accuracy and speed."""
+
+    detect_scale: float = 1.0
+    detect_interval: int = 1
+    embed_interval: int = 1
+    max_faces: int = 8
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+@dataclass
+class Track:
+    """A face followed across frames between detections."""
+
+    track_id: int
+    box: Box
+    name: str = "Unknown"
+    score: float = -1.0
+    last_embedded: int = -1
+
+
+@dataclass
+class StageTimings:
+    """Exponentially smoothed stage costs in seconds."""
+
+    detect: float = 0.0
+    embed_per_face: float = 0.0
+    frame: float = 0.0
+    faces: float = 0.0
+    initialized: Dict[str, bool] = field(default_factory=dict)
+
+    def update(self, name: str, value: float, smoothing: float) -> None:
+        if not self.initialized.get(name):
+            setattr(self, name, value)
+            self.initialized[name] = True
+        else:
+            setattr(self, name, (1.0 - smoothing) * getattr(self, name) + smoothing * value)
+
+
+class AdaptiveController:
+    """Adjust detection scale, detection/embedding intervals and face count to a latency budget.
+
+    Each frame reports its stage timings. When the smoothed frame latency is
+    over budget, the controller degrades whichever stage currently costs more
+    per frame (detection or embedding); when there is ample headroom it
+    restores quality in the opposite order. A cooldown after every change lets
+    the smoothed timings settle before the next decision.
+    """
+
+    def __init__(
+        self,
+        target_latency: Optional[float] = None,
+        target_fps: Optional[float] = None,
+        min_scale: float = 0.4,
+        max_detect_interval: int = 6,
+        max_embed_interval: int = 15,
+        max_faces: int = 8,
+        headroom: float = 0.6,
+        smoothing: float = 0.2,
+        cooldown_frames: int = 10,
+    ) -> None:
+        if target_latency is None and target_fps is None:
+            raise ValueError("Provide target_latency or target_fps")
+        self.budget = target_latency if target_latency is not None else 1.0 / target_fps
+        self.min_scale = min_scale
+        self.max_detect_interval = max_detect_interval
+        self.max_embed_interval = max_embed_interval
+        self.max_faces_limit = max_faces
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.cooldown_frames = cooldown_frames
+        self.decisions = Decisions(max_faces=max_faces)
+        self.timings = StageTimings()
+        self._cooldown = 0
+
+    def observe(
+        self,
+        frame_seconds: float,
+        detect_seconds: Optional[float] = None,
+        embed_seconds: Optional[float] = None,
+        faces_embedded: int = 0,
+        faces_seen: int = 0,
+    ) -> Decisions:
+        """Record one frame's timings and return the decisions for the next frame."""
+        self.timings.update("frame", frame_seconds, self.smoothing)
+        self.timings.update("faces", float(faces_seen), self.smoothing)
+        if detect_seconds is not None:
+            # Normalize to full scale so the cost estimate survives scale changes.
+            full_scale = detect_seconds / max(self.decisions.detect_scale ** 2, 1e-3)
+            self.timings.update("detect", full_scale, self.smoothing)
+        if embed_seconds is not None and faces_embedded:
+            self.timings.update("embed_per_face", embed_seconds / faces_embedded, self.smoothing)
+
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return self.decisions
+
+        if self.timings.frame > self.budget:
+            changed = self._degrade()
+        elif self.timings.frame < self.budget * self.headroom:
+            changed = self._restore()
+        else:
+            changed = False
+        if changed:
+            self._cooldown = self.cooldown_frames
+        return self.decisions
+
+    def _detect_cost(self) -> float:
+        d = self.decisions
+        return self.timings.detect * d.detect_scale ** 2 / d.detect_interval
+
+    def _embed_cost(self) -> float:
+        d = self.decisions
+        return self.timings.embed_per_face * min(self.timings.faces, d.max_faces) / d.embed_interval
+
+    def _degrade(self) -> bool:
+        d = self.decisions
+        if self._detect_cost() >= self._embed_cost():
+            if d.detect_scale > self.min_scale:
+                d.detect_scale = max(self.min_scale, round(d.detect_scale * 0.8, 3))
+                return True
+            if d.detect_interval < self.max_detect_interval:
+                d.detect_interval += 1
+                return True
+        if d.embed_interval < self.max_embed_interval:
+            d.embed_interval += 1
+            return True
+        if d.detect_interval < self.max_detect_interval:
+            d.detect_interval += 1
+            return True
+        if d.max_faces > 1:
+            d.max_faces -= 1
+            return True
+        return False
+
+    def _restore(self) -> bool:
+        d = self.decisions
+        if d.max_faces < self.max_faces_limit:
+            d.max_faces += 1
+            return True
+        if d.detect_scale < 1.0:
+            d.detect_scale = min(1.0, round(d.detect_scale / 0.8, 3))
+            return True
+        if d.detect_interval > 1:
+            d.detect_interval -= 1
+            return True
+        if d.embed_interval > 1:
+            d.embed_interval -= 1
+            return True
+        return False
+
+
+class AdaptiveRecognizer:
+    """Frame-by-frame recognizer that follows an ``AdaptiveController``.
+
+    Between detections, faces keep their last boxes; between re-embeddings,
+    tracks keep their last identity. Tracks are matched to new detections by
+    IoU so identities and track ids persist across frames.
+    """
+
+    def __init__(
+        self,
+        embedder: ArcFaceEmbedder,
+        database: Dict[str, np.ndarray],
+        controller: AdaptiveController,
+        threshold: float = 0.45,
+        detection_confidence: float = 0.6,
+        iou_match: float = 0.3,
+    ) -> None:
+        self.embedder = embedder
+        self.database = database
+        self.controller = controller
+        self.threshold = threshold
+        self.detection_confidence = detection_confidence
+        self.iou_match = iou_match
+        self.tracks: List[Track] = []
+        self.frame_index = 0
+        self._next_track_id = 0
+        self._last_detect = -(10 ** 9)
+
+    @property
+    def decisions(self) -> Decisions:
+        return self.controller.decisions
+
+    def _update_tracks(self, boxes: List[Box]) -> None:
+        tracks: List[Track] = []
+        unmatched = list(self.tracks)
+        for box in boxes:
+            best, best_iou = None, self.iou_match
+            for track in unmatched:
+                iou = _bbox_iou(box, track.box)
+                if iou >= best_iou:
+                    best, best_iou = track, iou
+            if best is None:
+                best = Track(self._next_track_id, box)
+                self._next_track_id += 1
+            else:
+                unmatched.remove(best)
+                best.box = box
+            tracks.append(best)
+        self.tracks = tracks
+
+    def process(self, frame: cv2.Mat) -> List[Tuple[Box, str, float]]:
+        """Recognize a frame and return (box, name, score) like ``recognize_frame``."""
+        decisions = self.controller.decisions
+        frame_start = time.perf_counter()
+
+        detect_seconds = None
+        if self.frame_index - self._last_detect >= decisions.detect_interval:
+            start = time.perf_counter()
+            boxes = detect_faces(frame, self.detection_confidence, scale=decisions.detect_scale)
+            detect_seconds = time.perf_counter() - start
+            self._update_tracks(largest_boxes(boxes, decisions.max_faces))
+            self._last_detect = self.frame_index
+
+        embed_start = time.perf_counter()
+        embedded = 0
+        for track in self.tracks:
+            if track.last_embedded >= 0 and self.frame_index - track.last_embedded < decisions.embed_interval:
+                continue
+            match = identify_face(frame, track.box, self.embedder, self.database, self.threshold)
+            track.last_embedded = self.frame_index
+            embedded += 1
+            if match is not None:
+                track.name, track.score = match
+        embed_seconds = time.perf_counter() - embed_start
+
+        self.controller.observe(
+            time.perf_counter() - frame_start,
+            detect_seconds=detect_seconds,
+            embed_seconds=embed_seconds,
+            faces_embedded=embedded,
+            faces_seen=len(self.tracks),
+        )
+        self.frame_index += 1
+        return [(track.box, track.name, track.score) for track in self.tracks]
+
+    @property
+    def track_ids(self) -> List[int]:
+        """Track ids in the same order as the last ``process`` result."""
+        return [track.track_id for track in self.tracks]
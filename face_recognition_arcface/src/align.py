@@ -1,9 +1,14 @@
+from __future__ import annotations
+
+import threading
 from typing import List, Optional, Tuple
 
-import cv2
-import mediapipe as mp
 import numpy as np
 
+from .utils import cv2, lazy_import
+
+mp = lazy_import("mediapipe")
+
 ARC_FACE_TEMPLATE = np.array(
     [
         [38.2946, 51.6963],
@@ -17,6 +22,25 @@ ARC_FACE_TEMPLATE = np.array(
 
 LANDMARK_INDEXES = [33, 263, 1, 61, 291]  # left eye, right eye, nose, mouth left, mouth right
 
+_face_mesh = None
+_face_mesh_lock = threading.Lock()
+
+
+def get_face_mesh():
+    """Return the shared MediaPipe FaceMesh, building its graph on first use."""
+    global _face_mesh
+    with _face_mesh_lock:
+        if _face_mesh is None:
+            # Static mode keeps each call independent, as with a fresh graph per call.
+            _face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=True,
+                max_num_faces=5,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+            )
+    return _face_mesh
+
 
 def _extract_landmarks(landmarks, width: int, height: int) -> np.ndarray:
     points = []
@@ -59,13 +83,8 @@ def align_face(
     image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
     height, width = image_bgr.shape[:2]
 
-    with mp.solutions.face_mesh.FaceMesh(
-        static_image_mode=False,
-        max_num_faces=5,
-        refine_landmarks=True,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-    ) as face_mesh:
+    face_mesh = get_face_mesh()
+    with _face_mesh_lock:
         results = face_mesh.process(image_rgb)
 
     if not results.multi_face_landmarks:
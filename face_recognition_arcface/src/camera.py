@@ -1,6 +1,8 @@
+from __future__ import annotations
+
 from typing import Generator
 
-import cv2
+from .utils import cv2
 
 
 def camera_stream(camera_index: int = 0) -> Generator[cv2.Mat, None, None]:
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import glob
+import os
+from typing import Optional
+
+import numpy as np
+
+from .utils import cv2, save_npy_atomic
+
+CROPS_FILE = "crops.npy"
+CROP_SHAPE = (112, 112, 3)
+
+
+def save_crops(identity_dir: str, crops: np.ndarray) -> str:
+    """Save aligned crops as one (N, 112, 112, 3) uint8 BGR array, replacing any previous file."""
+    crops = np.ascontiguousarray(crops, dtype=np.uint8)
+    if crops.ndim != 4 or crops.shape[1:] != CROP_SHAPE:
+        raise ValueError(f"Expected crops of shape (N, 112, 112, 3), got {crops.shape}")
+    path = os.path.join(identity_dir, CROPS_FILE)
+    save_npy_atomic(path, crops)
+    return path
+
+
+def read_jpeg_crops(identity_dir: str) -> Optional[np.ndarray]:
+    """Decode the crops/*.jpg files written by older enrollments, in enrollment order."""
+    paths = sorted(glob.glob(os.path.join(identity_dir, "crops", "*.jpg")))
+    crops = [cv2.imread(path) for path in paths]
+    crops = [crop for crop in crops if crop is not None and crop.shape == CROP_SHAPE]
+    if not crops:
+        return None
+    return np.stack(crops)
+
+
+def load_crops(identity_dir: str, pack: bool = True) -> Optional[np.ndarray]:
+    """Load an identity's aligned crops as a read-only memory map.
+
+    Identities enrolled before crops were packed only have crops/*.jpg; these are
+    decoded once and, with ``pack``, written to crops.npy for next time.
+    """
+    path = os.path.join(identity_dir, CROPS_FILE)
+    if os.path.isfile(path):
+        return np.load(path, mmap_mode="r")
+    crops = read_jpeg_crops(identity_dir)
+    if crops is not None and pack:
+        save_crops(identity_dir, crops)
+        return np.load(path, mmap_mode="r")
+    return crops
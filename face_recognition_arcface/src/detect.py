@@ -1,18 +1,46 @@
-from typing import List, Tuple
+from __future__ import annotations
 
-import cv2
-import mediapipe as mp
+import threading
+from typing import Dict, List, Tuple
 
+from .utils import cv2, lazy_import
 
-def detect_faces(image_bgr: cv2.Mat, min_confidence: float = 0.6) -> List[Tuple[int, int, int, int]]:
-    """Detect faces and return bounding boxes (x1, y1, x2, y2)."""
-    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+mp = lazy_import("mediapipe")
+
+_detectors: Dict[Tuple[int, float], object] = {}
+_detector_lock = threading.Lock()
+
+
+def get_detector(min_confidence: float = 0.6, model_selection: int = 1):
+    """Return a cached MediaPipe face detector, building its graph on first use."""
+    key = (model_selection, min_confidence)
+    with _detector_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = mp.solutions.face_detection.FaceDetection(
+                model_selection=model_selection,
+                min_detection_confidence=min_confidence,
+            )
+            _detectors[key] = detector
+    return detector
+
+
+def detect_faces(
+    image_bgr: cv2.Mat, min_confidence: float = 0.6, scale: float = 1.0
+) -> List[Tuple[int, int, int, int]]:
+    """Detect faces and return bounding boxes (x1, y1, x2, y2).
+
+    ``scale`` < 1 runs the detector on a downscaled copy; boxes are still
+    returned in full-resolution coordinates.
+    """
     height, width = image_bgr.shape[:2]
+    if scale != 1.0:
+        image_bgr = cv2.resize(image_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
 
-    with mp.solutions.face_detection.FaceDetection(
-        model_selection=1,
-        min_detection_confidence=min_confidence,
-    ) as detector:
+    detector = get_detector(min_confidence)
+    # MediaPipe graphs are not safe to drive from several threads at once.
+    with _detector_lock:
         results = detector.process(image_rgb)
 
     boxes: List[Tuple[int, int, int, int]] = []
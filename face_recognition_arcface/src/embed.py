@@ -1,19 +1,27 @@
+from __future__ import annotations
+
 from typing import Optional
 
-import cv2
 import numpy as np
-import onnxruntime as ort
 
-from .utils import l2_normalize
+from .utils import cv2, l2_normalize, lazy_import
+
+ort = lazy_import("onnxruntime")
 
 
 class ArcFaceEmbedder:
     """ArcFace ONNX embedder running on CPU."""
 
-    def __init__(self, model_path: str) -> None:
-        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
-        self.input_name = self.session.get_inputs()[0].name
+    def __init__(self, model_path: str, threads: int = 0) -> None:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
         self.output_name = self.session.get_outputs()[0].name
+        # Some exported ArcFace models have a fixed batch size of 1
+        batch_dim = model_input.shape[0]
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
 
     def preprocess(self, image_bgr: cv2.Mat) -> np.ndarray:
         """Prepare aligned 112x112 BGR image to model input."""
@@ -29,3 +37,20 @@ class ArcFaceEmbedder:
         embedding = self.session.run([self.output_name], {self.input_name: input_tensor})[0]
         embedding = embedding.reshape(-1)
         return l2_normalize(embedding)
+
+    def preprocess_batch(self, faces_bgr: np.ndarray) -> np.ndarray:
+        """Prepare a stack of aligned 112x112 BGR faces (N, 112, 112, 3) as one model input."""
+        faces = np.asarray(faces_bgr)[..., ::-1].astype(np.float32)
+        faces = (faces - 127.5) / 128.0
+        return np.ascontiguousarray(faces.transpose(0, 3, 1, 2))
+
+    def embed_batch(self, aligned_faces_bgr: np.ndarray) -> np.ndarray:
+        """Generate L2-normalized embeddings (N, D) for a stack of aligned faces."""
+        input_tensor = self.preprocess_batch(aligned_faces_bgr)
+        step = self.max_batch or max(len(input_tensor), 1)
+        outputs = [
+            self.session.run([self.output_name], {self.input_name: input_tensor[start : start + step]})[0]
+            for start in range(0, len(input_tensor), step)
+        ]
+        embeddings = np.concatenate([output.reshape(len(output), -1) for output in outputs])
+        return l2_normalize(embeddings, axis=1)
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import argparse
 import os
 from typing import Iterable, List, Tuple
 
-import cv2
 import numpy as np
 
 from .align import align_face
+from .crops import save_crops
 from .detect import detect_faces
 from .embed import ArcFaceEmbedder
-from .utils import ensure_dir, l2_normalize, save_image
+from .utils import cv2, ensure_dir, save_image, save_npy_atomic
+from .warmup import warm_up
 
 
 def enroll_identity(
@@ -18,18 +20,19 @@ def enroll_identity(
     embedder: ArcFaceEmbedder,
     output_dir: str,
     detection_confidence: float = 0.6,
+    save_jpegs: bool = False,
 ) -> Tuple[int, str]:
     """Enroll a single identity from image paths.
 
-    Saves aligned 112x112 crops and embeddings to disk.
+    Saves aligned 112x112 crops (packed in crops.npy, plus crops/*.jpg with
+    ``save_jpegs``) and embeddings to disk.
     Returns number of samples enrolled and the identity folder.
     """
     identity_dir = os.path.join(output_dir, name)
     crops_dir = os.path.join(identity_dir, "crops")
-    ensure_dir(crops_dir)
+    ensure_dir(identity_dir)
 
-    embeddings: List[np.ndarray] = []
-    sample_count = 0
+    faces: List[np.ndarray] = []
 
     for idx, image_path in enumerate(image_paths):
         image = cv2.imread(image_path)
@@ -47,15 +50,54 @@ def enroll_identity(
             continue
 
         aligned_face, _ = aligned
-        embedding = embedder.embed(aligned_face)
-        embeddings.append(embedding)
+        faces.append(aligned_face)
 
-        crop_path = os.path.join(crops_dir, f"{idx:04d}.jpg")
-        save_image(crop_path, aligned_face)
-        sample_count += 1
+        if save_jpegs:
+            crop_path = os.path.join(crops_dir, f"{idx:04d}.jpg")
+            save_image(crop_path, aligned_face)
 
-    if embeddings:
-        embeddings_array = l2_normalize(np.stack(embeddings), axis=1)
-        np.save(os.path.join(identity_dir, "embeddings.npy"), embeddings_array)
+    if faces:
+        crops = np.stack(faces)
+        save_crops(identity_dir, crops)
+        embeddings_array = embedder.embed_batch(crops)
+        save_npy_atomic(os.path.join(identity_dir, "embeddings.npy"), embeddings_array)
 
-    return sample_count, identity_dir
+    return len(faces), identity_dir
+
+
+def _expand_image_paths(paths: Iterable[str]) -> List[str]:
+    image_paths: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            image_paths.extend(
+                os.path.join(path, filename)
+                for filename in sorted(os.listdir(path))
+                if filename.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
+            )
+        else:
+            image_paths.append(path)
+    return image_paths
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Enroll an identity from photos.")
+    parser.add_argument("name")
+    parser.add_argument("images", nargs="+", help="Image files or folders of images")
+    parser.add_argument("--model", default=os.path.join(base_dir, "models", "arcface.onnx"))
+    parser.add_argument("--output", default=os.path.join(base_dir, "data", "identities"))
+    parser.add_argument("--det-conf", type=float, default=0.6)
+    parser.add_argument("--save-jpegs", action="store_true", help="Also write crops/*.jpg for inspection")
+    args = parser.parse_args()
+
+    # Models load in the background while the image list is gathered.
+    warmup = warm_up(args.model, args.det_conf)
+    image_paths = _expand_image_paths(args.images)
+    embedder = warmup.wait()
+
+    count, folder = enroll_identity(args.name, image_paths, embedder, args.output, args.det_conf, args.save_jpegs)
+    print(f"Enrolled {count} samples to {folder}")
+
+
+if __name__ == "__main__":
+    main()
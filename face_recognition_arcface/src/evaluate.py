@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .align import align_face
+from .detect import detect_faces
+from .embed import ArcFaceEmbedder
+from .recognize import load_identity_database
+from .utils import cv2, ensure_dir, l2_normalize
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+DEFAULT_FAR_TARGETS = (1e-4, 1e-3, 1e-2, 1e-1)
+
+
+@dataclass(frozen=True)
+class Sample:
+    """A single labelled probe: an image, or one frame of a video."""
+
+    path: str
+    label: str
+    frame: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.path}#{self.frame}"
+
+
+@dataclass(frozen=True)
+class EvalConfig:
+    """Pipeline settings that change the extracted embeddings or their scoring."""
+
+    model_path: str
+    detection_confidence: float = 0.6
+    gallery_dtype: str = "float32"
+    frame_step: int = 1
+
+
+def collect_samples(data_dir: str, video_stride: int = 1) -> List[Sample]:
+    """Collect labelled samples from ``data_dir/<identity>/<image or video>``."""
+    samples: List[Sample] = []
+    for label in sorted(os.listdir(data_dir)):
+        label_dir = os.path.join(data_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for filename in sorted(os.listdir(label_dir)):
+            path = os.path.join(label_dir, filename)
+            ext = os.path.splitext(filename)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                samples.append(Sample(path, label))
+            elif ext in VIDEO_EXTENSIONS:
+                cap = cv2.VideoCapture(path)
+                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                cap.release()
+                for frame in range(0, max(frame_count, 0), video_stride):
+                    samples.append(Sample(path, label, frame))
+    return samples
+
+
+def _largest_face_embedding(
+    image: np.ndarray, embedder: ArcFaceEmbedder, detection_confidence: float
+) -> Optional[np.ndarray]:
+    boxes = detect_faces(image, min_confidence=detection_confidence)
+    if not boxes:
+        return None
+    box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+    aligned = align_face(image, box)
+    if aligned is None:
+        return None
+    return embedder.embed(aligned[0])
+
+
+_worker_embedder: Optional[ArcFaceEmbedder] = None
+
+
+def _init_worker(model_path: str) -> None:
+    global _worker_embedder
+    cv2.setNumThreads(1)
+    _worker_embedder = ArcFaceEmbedder(model_path)
+
+
+def _extract_file(
+    path: str, frames: Sequence[int], detection_confidence: float
+) -> List[Tuple[int, Optional[np.ndarray], float]]:
+    """Embed the requested frames of one file inside a worker process."""
+    assert _worker_embedder is not None
+    results: List[Tuple[int, Optional[np.ndarray], float]] = []
+    if os.path.splitext(path)[1].lower() not in VIDEO_EXTENSIONS:
+        start = time.perf_counter()
+        image = cv2.imread(path)
+        embedding = None
+        if image is not None:
+            embedding = _largest_face_embedding(image, _worker_embedder, detection_confidence)
+        results.append((0, embedding, time.perf_counter() - start))
+        return results
+
+    wanted = set(frames)
+    cap = cv2.VideoCapture(path)
+    try:
+        index = 0
+        last = max(wanted)
+        while index <= last:
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index in wanted:
+                embedding = _largest_face_embedding(frame, _worker_embedder, detection_confidence)
+                results.append((index, embedding, time.perf_counter() - start))
+            index += 1
+    finally:
+        cap.release()
+    return results
+
+
+class EmbeddingCache:
+    """On-disk cache of probe embeddings for one (model, detection confidence) pair.
+
+    Entries are keyed by sample path, frame and file mtime so edited inputs are
+    re-extracted. Samples without a detectable face are cached as NaN rows.
+    """
+
+    def __init__(self, cache_dir: str, model_path: str, detection_confidence: float) -> None:
+        model_stat = os.stat(model_path)
+        tag = f"{os.path.abspath(model_path)}|{model_stat.st_mtime_ns}|{detection_confidence:.4f}"
+        digest = hashlib.sha1(tag.encode("utf-8")).hexdigest()[:16]
+        ensure_dir(cache_dir)
+        self.path = os.path.join(cache_dir, f"embeddings_{digest}.npz")
+        self.entries: Dict[str, Tuple[np.ndarray, float]] = {}
+        if os.path.isfile(self.path):
+            data = np.load(self.path, allow_pickle=False)
+            for key, embedding, seconds in zip(data["keys"], data["embeddings"], data["seconds"]):
+                self.entries[str(key)] = (embedding, float(seconds))
+
+    @staticmethod
+    def entry_key(sample: Sample) -> str:
+        return f"{sample.key}@{os.stat(sample.path).st_mtime_ns}"
+
+    def save(self) -> None:
+        if not self.entries:
+            return
+        keys = list(self.entries)
+        embeddings = np.stack([self.entries[k][0] for k in keys]).astype(np.float32)
+        seconds = np.array([self.entries[k][1] for k in keys], dtype=np.float64)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys), embeddings=embeddings, seconds=seconds)
+        os.replace(tmp_path, self.path)
+
+
+def extract_embeddings(
+    samples: Sequence[Sample],
+    model_path: str,
+    detection_confidence: float,
+    cache_dir: str,
+    workers: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (embeddings, seconds) for each sample, reusing cached entries.
+
+    Rows for samples without a usable face are NaN.
+    """
+    cache = EmbeddingCache(cache_dir, model_path, detection_confidence)
+    keys = [EmbeddingCache.entry_key(sample) for sample in samples]
+
+    pending: Dict[str, List[int]] = {}
+    for sample, key in zip(samples, keys):
+        if key not in cache.entries:
+            pending.setdefault(sample.path, []).append(sample.frame)
+
+    if pending:
+        embedding_dim: Optional[int] = None
+        extracted: List[Tuple[str, int, Optional[np.ndarray], float]] = []
+        with ProcessPoolExecutor(
+            max_workers=max(1, workers), initializer=_init_worker, initargs=(model_path,)
+        ) as pool:
+            futures = {
+                path: pool.submit(_extract_file, path, frames, detection_confidence)
+                for path, frames in pending.items()
+            }
+            for path, future in futures.items():
+                for frame, embedding, seconds in future.result():
+                    if embedding is not None:
+                        embedding_dim = embedding.shape[0]
+                    extracted.append((path, frame, embedding, seconds))
+
+        if embedding_dim is None:
+            embedding_dim = next(iter(cache.entries.values()))[0].shape[0] if cache.entries else 512
+        for path, frame, embedding, seconds in extracted:
+            if embedding is None:
+                embedding = np.full(embedding_dim, np.nan, dtype=np.float32)
+            key = EmbeddingCache.entry_key(Sample(path, "", frame))
+            cache.entries[key] = (embedding.astype(np.float32), seconds)
+        # Videos can end before their reported frame count.
+        for key in keys:
+            if key not in cache.entries:
+                cache.entries[key] = (np.full(embedding_dim, np.nan, dtype=np.float32), 0.0)
+        cache.save()
+
+    embeddings = np.stack([cache.entries[key][0] for key in keys])
+    seconds = np.array([cache.entries[key][1] for key in keys], dtype=np.float64)
+    return embeddings, seconds
+
+
+def compress_gallery(embeddings: np.ndarray, dtype: str) -> np.ndarray:
+    """Round-trip gallery embeddings through a storage dtype to measure its accuracy cost."""
+    if dtype == "float32":
+        return embeddings.astype(np.float32)
+    if dtype == "float16":
+        return embeddings.astype(np.float16).astype(np.float32)
+    if dtype == "int8":
+        quantized = np.clip(np.round(embeddings * 127.0), -127, 127).astype(np.int8)
+        return l2_normalize(quantized.astype(np.float32), axis=1)
+    raise ValueError(f"Unsupported gallery dtype: {dtype}")
+
+
+def score_matrix(
+    probes: np.ndarray, gallery: Dict[str, np.ndarray]
+) -> Tuple[np.ndarray, List[str]]:
+    """Best cosine score of every probe against every gallery identity."""
+    names = sorted(gallery)
+    if not names:
+        return np.empty((len(probes), 0), dtype=np.float32), names
+    templates = np.concatenate([gallery[name] for name in names])
+    owners = np.concatenate([np.full(len(gallery[name]), i) for i, name in enumerate(names)])
+    scores = probes @ templates.T
+    best = np.full((len(probes), len(names)), -np.inf, dtype=np.float32)
+    for i in range(len(names)):
+        best[:, i] = scores[:, owners == i].max(axis=1)
+    return best, names
+
+
+def roc_curve(genuine: np.ndarray, impostor: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (thresholds, TAR, FAR) with thresholds sorted in descending order."""
+    thresholds = np.unique(np.concatenate([genuine, impostor]))[::-1]
+    genuine_sorted = np.sort(genuine)
+    impostor_sorted = np.sort(impostor)
+    tar = 1.0 - np.searchsorted(genuine_sorted, thresholds, side="left") / max(len(genuine), 1)
+    far = 1.0 - np.searchsorted(impostor_sorted, thresholds, side="left") / max(len(impostor), 1)
+    return thresholds, tar, far
+
+
+def tar_at_far(genuine: np.ndarray, impostor: np.ndarray, far_target: float) -> Tuple[float, float]:
+    """Highest TAR whose FAR does not exceed ``far_target``; returns (TAR, threshold)."""
+    if len(genuine) == 0 or len(impostor) == 0:
+        return float("nan"), float("nan")
+    thresholds, tar, far = roc_curve(genuine, impostor)
+    allowed = far <= far_target
+    if not np.any(allowed):
+        return 0.0, float("inf")
+    idx = np.flatnonzero(allowed)[-1]
+    return float(tar[idx]), float(thresholds[idx])
+
+
+def propagate_predictions(samples: Sequence[Sample], processed: np.ndarray) -> np.ndarray:
+    """Map every sample to the most recent processed sample of the same video."""
+    source = np.arange(len(samples))
+    last: Dict[str, int] = {}
+    for i, sample in enumerate(samples):
+        if processed[i]:
+            last[sample.path] = i
+        elif sample.path in last:
+            source[i] = last[sample.path]
+        else:
+            source[i] = -1
+    return source
+
+
+def evaluate_config(
+    samples: Sequence[Sample],
+    embeddings: np.ndarray,
+    seconds: np.ndarray,
+    gallery: Dict[str, np.ndarray],
+    config: EvalConfig,
+    thresholds: Sequence[float],
+    far_targets: Sequence[float] = DEFAULT_FAR_TARGETS,
+    roc_points: int = 50,
+) -> Dict[str, object]:
+    """Compute verification, identification and throughput metrics for one config."""
+    gallery = {name: compress_gallery(emb, config.gallery_dtype) for name, emb in gallery.items()}
+    labels = np.array([sample.label for sample in samples])
+    valid = ~np.isnan(embeddings).any(axis=1)
+
+    processed = np.array([sample.frame % config.frame_step == 0 for sample in samples])
+    scores, names = score_matrix(np.nan_to_num(embeddings), gallery)
+    known = np.isin(labels, names)
+
+    # Verification uses every processed probe with a face against every identity.
+    usable = processed & valid
+    label_index = np.array([names.index(label) if label in names else -1 for label in labels])
+    genuine_mask = np.zeros_like(scores, dtype=bool)
+    rows = np.flatnonzero(usable & known)
+    genuine_mask[rows, label_index[rows]] = True
+    genuine = scores[genuine_mask]
+    impostor = scores[usable[:, None] & ~genuine_mask]
+
+    report: Dict[str, object] = {"config": asdict(config)}
+    report["tar_at_far"] = {}
+    for target in far_targets:
+        tar, threshold = tar_at_far(genuine, impostor, target)
+        report["tar_at_far"][f"{target:g}"] = {"tar": tar, "threshold": threshold}
+
+    if len(genuine) and len(impostor):
+        roc_thr, roc_tar, roc_far = roc_curve(genuine, impostor)
+        pick = np.unique(np.linspace(0, len(roc_thr) - 1, num=min(roc_points, len(roc_thr))).astype(int))
+        report["roc"] = {
+            "threshold": roc_thr[pick].tolist(),
+            "tar": roc_tar[pick].tolist(),
+            "far": roc_far[pick].tolist(),
+        }
+
+    # Identification: skipped frames inherit the prediction of the last processed one.
+    source = propagate_predictions(samples, processed)
+    has_source = source >= 0
+    source_ok = has_source & valid[np.where(has_source, source, 0)]
+    best_idx = scores.argmax(axis=1) if names else np.zeros(len(samples), dtype=int)
+    best_score = scores.max(axis=1) if names else np.full(len(samples), -1.0)
+    identification = {}
+    for threshold in thresholds:
+        accepted = source_ok & (best_score[np.where(has_source, source, 0)] >= threshold)
+        predicted = np.where(accepted, best_idx[np.where(has_source, source, 0)], -1)
+        correct = known & (predicted == label_index)
+        false_accept = ~known & (predicted >= 0)
+        identification[f"{threshold:g}"] = {
+            "identification_rate": float(correct.sum() / max(known.sum(), 1)),
+            "false_accept_rate": float(false_accept.sum() / max((~known).sum(), 1)),
+        }
+    report["identification"] = identification
+
+    processed_seconds = float(seconds[processed].sum())
+    report["throughput"] = {
+        "processed_frames": int(processed.sum()),
+        "total_frames": len(samples),
+        "processed_fps": float(processed.sum() / processed_seconds) if processed_seconds else 0.0,
+        "effective_fps": float(len(samples) / processed_seconds) if processed_seconds else 0.0,
+        "detection_failures": int((processed & ~valid).sum()),
+    }
+    return report
+
+
+def split_gallery(
+    samples: Sequence[Sample], embeddings: np.ndarray, per_identity: int
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Use the first ``per_identity`` valid samples of each label as the gallery.
+
+    Returns the gallery and a mask of samples left over as probes.
+    """
+    gallery: Dict[str, List[np.ndarray]] = {}
+    probe_mask = np.ones(len(samples), dtype=bool)
+    for i, sample in enumerate(samples):
+        if np.isnan(embeddings[i]).any():
+            continue
+        templates = gallery.setdefault(sample.label, [])
+        if len(templates) < per_identity:
+            templates.append(embeddings[i])
+            probe_mask[i] = False
+    return {name: np.stack(emb) for name, emb in gallery.items()}, probe_mask
+
+
+def run_sweep(
+    data_dir: str,
+    model_paths: Iterable[str],
+    detection_confidences: Iterable[float],
+    gallery_dtypes: Iterable[str],
+    frame_steps: Iterable[int],
+    thresholds: Sequence[float],
+    cache_dir: str,
+    identities_dir: Optional[str] = None,
+    gallery_per_identity: int = 1,
+    video_stride: int = 1,
+    workers: int = 1,
+) -> List[Dict[str, object]]:
+    """Evaluate the cartesian product of the given settings.
+
+    Embeddings are extracted once per (model, detection confidence) pair; the
+    other settings only change scoring and are evaluated from the cache.
+    """
+    samples = collect_samples(data_dir, video_stride=video_stride)
+    stored_gallery = load_identity_database(identities_dir) if identities_dir else None
+    reports: List[Dict[str, object]] = []
+
+    for model_path, confidence in itertools.product(model_paths, detection_confidences):
+        embeddings, seconds = extract_embeddings(samples, model_path, confidence, cache_dir, workers)
+        if stored_gallery is not None:
+            gallery, probe_mask = stored_gallery, np.ones(len(samples), dtype=bool)
+        else:
+            gallery, probe_mask = split_gallery(samples, embeddings, gallery_per_identity)
+        probe_samples = [s for s, keep in zip(samples, probe_mask) if keep]
+
+        for dtype, step in itertools.product(gallery_dtypes, frame_steps):
+            config = EvalConfig(model_path, confidence, dtype, step)
+            reports.append(
+                evaluate_config(
+                    probe_samples, embeddings[probe_mask], seconds[probe_mask], gallery, config, thresholds
+                )
+            )
+    return reports
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Evaluate recognition accuracy against speed settings.")
+    parser.add_argument("data_dir", help="Labelled set laid out as <data_dir>/<identity>/<image or video>")
+    parser.add_argument("--models", nargs="+", default=[os.path.join(base_dir, "models", "arcface.onnx")])
+    parser.add_argument("--identities", default=None, help="Enrolled gallery; default splits data_dir")
+    parser.add_argument("--gallery-per-identity", type=int, default=1)
+    parser.add_argument("--det-conf", nargs="+", type=float, default=[0.6])
+    parser.add_argument("--gallery-dtype", nargs="+", default=["float32"], choices=["float32", "float16", "int8"])
+    parser.add_argument("--frame-step", nargs="+", type=int, default=[1])
+    parser.add_argument("--video-stride", type=int, default=1)
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.35, 0.45, 0.55])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-dir", default=os.path.join(base_dir, "data", "eval_cache"))
+    parser.add_argument("--output", default=None, help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    reports = run_sweep(
+        args.data_dir,
+        args.models,
+        args.det_conf,
+        args.gallery_dtype,
+        args.frame_step,
+        args.thresholds,
+        args.cache_dir,
+        identities_dir=args.identities,
+        gallery_per_identity=args.gallery_per_identity,
+        video_stride=args.video_stride,
+        workers=args.workers,
+    )
+
+    for report in reports:
+        config = report["config"]
+        throughput = report["throughput"]
+        far = report["tar_at_far"].get("0.001", {})
+        print(
+            f"{os.path.basename(config['model_path'])} conf={config['detection_confidence']} "
+            f"gallery={config['gallery_dtype']} step={config['frame_step']} "
+            f"TAR@FAR1e-3={far.get('tar', float('nan')):.3f} fps={throughput['effective_fps']:.1f}"
+        )
+        for threshold, ident in report["identification"].items():
+            print(
+                f"  thr={threshold}: id_rate={ident['identification_rate']:.3f} "
+                f"false_accept={ident['false_accept_rate']:.3f}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(reports, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
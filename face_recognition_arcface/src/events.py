@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .utils import ensure_dir
+
+Box = Tuple[int, int, int, int]
+
+COLUMNS = ("timestamp", "stream", "track_id", "box", "identity", "score")
+
+
+@dataclass
+class RecognitionEvent:
+    """One recognized (or unknown) face in one frame."""
+
+    timestamp: float
+    stream: str
+    track_id: int
+    box: Box
+    identity: str
+    score: float
+    embedding: Optional[np.ndarray] = None
+
+
+def _segment_name(timestamp: float, rotation_seconds: int) -> str:
+    start = int(timestamp // rotation_seconds) * rotation_seconds
+    return datetime.fromtimestamp(start).strftime("%Y%m%d-%H%M%S")
+
+
+class EventLog:
+    """Buffered, append-only columnar log of recognition events.
+
+    ``log`` only enqueues; a background thread groups events into batches and
+    writes each batch as an uncompressed ``.npz`` chunk (one ``.npy`` array per
+    column) inside a directory per ``rotation_seconds`` time window. Chunk file
+    names carry their first/last timestamps so queries can skip whole files.
+    When the queue is full, events are dropped and counted rather than blocking
+    the frame loop.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+        rotation_seconds: int = 3600,
+        store_embeddings: bool = False,
+        max_pending: int = 10000,
+    ) -> None:
+        self.log_dir = log_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotation_seconds = rotation_seconds
+        self.store_embeddings = store_embeddings
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[RecognitionEvent]]" = queue.Queue(maxsize=max_pending)
+        self._sequence = 0
+        self._embedding_dim = 0
+        ensure_dir(log_dir)
+        self._thread = threading.Thread(target=self._writer_loop, name="event-log", daemon=True)
+        self._thread.start()
+
+    def log(self, event: RecognitionEvent) -> None:
+        """Queue an event without blocking."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def log_results(
+        self,
+        results: Iterable[Tuple[Box, str, float]],
+        stream: str = "0",
+        timestamp: Optional[float] = None,
+        track_ids: Optional[Sequence[int]] = None,
+        embeddings: Optional[Sequence[np.ndarray]] = None,
+    ) -> None:
+        """Queue the output of ``recognize_frame`` for one frame."""
+        timestamp = time.time() if timestamp is None else timestamp
+        for i, (box, name, score) in enumerate(results):
+            self.log(
+                RecognitionEvent(
+                    timestamp=timestamp,
+                    stream=stream,
+                    track_id=track_ids[i] if track_ids is not None else -1,
+                    box=tuple(int(v) for v in box),
+                    identity=name,
+                    score=float(score),
+                    embedding=embeddings[i] if embeddings is not None else None,
+                )
+            )
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer thread."""
+        # A writer that died (e.g. disk full) no longer drains the queue.
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _writer_loop(self) -> None:
+        batch: List[RecognitionEvent] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                event = False
+
+            if event is None:
+                self._write_batch(batch)
+                return
+            if event:
+                batch.append(event)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_batch(self, batch: List[RecognitionEvent]) -> None:
+        # Split at rotation boundaries so every chunk lives in exactly one segment.
+        segments: Dict[str, List[RecognitionEvent]] = {}
+        for event in batch:
+            segments.setdefault(_segment_name(event.timestamp, self.rotation_seconds), []).append(event)
+
+        for segment, events in segments.items():
+            columns: Dict[str, np.ndarray] = {
+                "timestamp": np.array([e.timestamp for e in events], dtype=np.float64),
+                "stream": np.array([e.stream for e in events]),
+                "track_id": np.array([e.track_id for e in events], dtype=np.int32),
+                "box": np.array([e.box for e in events], dtype=np.int32).reshape(-1, 4),
+                "identity": np.array([e.identity for e in events]),
+                "score": np.array([e.score for e in events], dtype=np.float32),
+            }
+            if self.store_embeddings:
+                columns["embedding"] = self._embedding_column(events)
+
+            segment_dir = os.path.join(self.log_dir, segment)
+            ensure_dir(segment_dir)
+            first_ms = int(np.floor(columns["timestamp"].min() * 1000))
+            last_ms = int(np.ceil(columns["timestamp"].max() * 1000))
+            self._sequence += 1
+            filename = f"chunk_{first_ms}_{last_ms}_{os.getpid()}_{self._sequence:06d}.npz"
+            tmp_path = os.path.join(segment_dir, f".{filename}.tmp.npz")
+            np.savez(tmp_path, **columns)
+            os.replace(tmp_path, os.path.join(segment_dir, filename))
+
+    def _embedding_column(self, events: List[RecognitionEvent]) -> np.ndarray:
+        # Events logged without an embedding get a NaN row so the column stays aligned.
+        for event in events:
+            if event.embedding is not None:
+                self._embedding_dim = len(event.embedding)
+                break
+        column = np.full((len(events), self._embedding_dim), np.nan, dtype=np.float16)
+        for row, event in enumerate(events):
+            if event.embedding is not None:
+                column[row] = event.embedding
+        return column
+
+
+def _chunk_paths(log_dir: str, start: Optional[float], end: Optional[float]) -> List[str]:
+    paths: List[str] = []
+    if not os.path.isdir(log_dir):
+        return paths
+    for segment in sorted(os.listdir(log_dir)):
+        segment_dir = os.path.join(log_dir, segment)
+        if not os.path.isdir(segment_dir):
+            continue
+        for filename in sorted(os.listdir(segment_dir)):
+            if not filename.startswith("chunk_") or not filename.endswith(".npz"):
+                continue
+            first_ms, last_ms = (int(part) for part in filename.split("_")[1:3])
+            if start is not None and last_ms < start * 1000:
+                continue
+            if end is not None and first_ms > end * 1000:
+                continue
+            paths.append(os.path.join(segment_dir, filename))
+    return paths
+
+
+def query_events(
+    log_dir: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    identity: Optional[str] = None,
+    stream: Optional[str] = None,
+    include_embeddings: bool = False,
+) -> Dict[str, np.ndarray]:
+    """Load matching events as columns, sorted by timestamp."""
+    parts: Dict[str, List[np.ndarray]] = {column: [] for column in COLUMNS}
+    if include_embeddings:
+        parts["embedding"] = []
+
+    for path in _chunk_paths(log_dir, start, end):
+        with np.load(path, allow_pickle=False) as chunk:
+            mask = np.ones(len(chunk["timestamp"]), dtype=bool)
+            if start is not None:
+                mask &= chunk["timestamp"] >= start
+            if end is not None:
+                mask &= chunk["timestamp"] <= end
+            if identity is not None:
+                mask &= chunk["identity"] == identity
+            if stream is not None:
+                mask &= chunk["stream"] == stream
+            if not mask.any():
+                continue
+            for column in parts:
+                if column == "embedding" and column not in chunk.files:
+                    raise ValueError(f"{path} was written without embeddings")
+                parts[column].append(chunk[column][mask])
+
+    if not parts["timestamp"]:
+        return {
+            "timestamp": np.empty(0, dtype=np.float64),
+            "stream": np.empty(0, dtype=str),
+            "track_id": np.empty(0, dtype=np.int32),
+            "box": np.empty((0, 4), dtype=np.int32),
+            "identity": np.empty(0, dtype=str),
+            "score": np.empty(0, dtype=np.float32),
+            **({"embedding": np.empty((0, 0), dtype=np.float16)} if include_embeddings else {}),
+        }
+
+    if include_embeddings:
+        # Chunks written before any embedding was seen have zero-width columns.
+        dim = max(values.shape[1] for values in parts["embedding"])
+        parts["embedding"] = [
+            values if values.shape[1] == dim else np.full((len(values), dim), np.nan, dtype=np.float16)
+            for values in parts["embedding"]
+        ]
+    events = {column: np.concatenate(values) for column, values in parts.items()}
+    order = np.argsort(events["timestamp"], kind="stable")
+    return {column: values[order] for column, values in events.items()}
+
+
+def who_was_seen(
+    log_dir: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    stream: Optional[str] = None,
+) -> List[Tuple[str, float, float, int]]:
+    """Summarize known identities as (name, first_seen, last_seen, sightings)."""
+    events = query_events(log_dir, start, end, stream=stream)
+    known = events["identity"] != "Unknown"
+    names, inverse = np.unique(events["identity"][known], return_inverse=True)
+    timestamps = events["timestamp"][known]
+    summary: List[Tuple[str, float, float, int]] = []
+    for i, name in enumerate(names):
+        seen = timestamps[inverse == i]
+        summary.append((str(name), float(seen.min()), float(seen.max()), int(len(seen))))
+    return sorted(summary, key=lambda row: row[1])
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Query the recognition event log.")
+    parser.add_argument("--log-dir", default=os.path.join(base_dir, "data", "events"))
+    parser.add_argument("--start", help="ISO time or UNIX timestamp")
+    parser.add_argument("--end", help="ISO time or UNIX timestamp")
+    parser.add_argument("--identity", help="List individual sightings of this identity")
+    parser.add_argument("--stream")
+    args = parser.parse_args()
+
+    start, end = _parse_time(args.start), _parse_time(args.end)
+    if args.identity:
+        events = query_events(args.log_dir, start, end, identity=args.identity, stream=args.stream)
+        for ts, stream, track_id, score in zip(
+            events["timestamp"], events["stream"], events["track_id"], events["score"]
+        ):
+            print(f"{datetime.fromtimestamp(ts).isoformat()} stream={stream} track={track_id} score={score:.2f}")
+        return
+
+    for name, first, last, count in who_was_seen(args.log_dir, start, end, stream=args.stream):
+        print(
+            f"{name}: {datetime.fromtimestamp(first).isoformat()} -> "
+            f"{datetime.fromtimestamp(last).isoformat()} ({count} sightings)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-import cv2
 import numpy as np
 
 from .align import align_face
 from .detect import detect_faces
 from .embed import ArcFaceEmbedder
+from .utils import cv2
 
 
 def load_identity_database(identities_dir: str) -> Dict[str, np.ndarray]:
@@ -42,25 +42,51 @@ def match_identity(embedding: np.ndarray, database: Dict[str, np.ndarray]) -> Tu
     return best_name, best_score
 
 
+def identify_face(
+    frame: cv2.Mat,
+    box: Tuple[int, int, int, int],
+    embedder: ArcFaceEmbedder,
+    database: Dict[str, np.ndarray],
+    threshold: float = 0.45,
+) -> Optional[Tuple[str, float]]:
+    """Align, embed and match one detected face; None if alignment fails."""
+    aligned = align_face(frame, box)
+    if aligned is None:
+        return None
+    aligned_face, _ = aligned
+    embedding = embedder.embed(aligned_face)
+    name, score = match_identity(embedding, database)
+    if score < threshold:
+        name = "Unknown"
+    return name, score
+
+
+def largest_boxes(
+    boxes: List[Tuple[int, int, int, int]], max_faces: Optional[int]
+) -> List[Tuple[int, int, int, int]]:
+    """Keep the ``max_faces`` largest boxes (all of them when None)."""
+    if max_faces is None or len(boxes) <= max_faces:
+        return boxes
+    return sorted(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)[:max_faces]
+
+
 def recognize_frame(
     frame: cv2.Mat,
     embedder: ArcFaceEmbedder,
     database: Dict[str, np.ndarray],
     threshold: float = 0.45,
+    detect_scale: float = 1.0,
+    max_faces: Optional[int] = None,
 ) -> List[Tuple[Tuple[int, int, int, int], str, float]]:
     """Recognize faces in a frame and return list of (box, name, score)."""
     results: List[Tuple[Tuple[int, int, int, int], str, float]] = []
-    boxes = detect_faces(frame)
+    boxes = largest_boxes(detect_faces(frame, scale=detect_scale), max_faces)
 
     for box in boxes:
-        aligned = align_face(frame, box)
-        if aligned is None:
+        match = identify_face(frame, box, embedder, database, threshold)
+        if match is None:
             continue
-        aligned_face, _ = aligned
-        embedding = embedder.embed(aligned_face)
-        name, score = match_identity(embedding, database)
-        if score < threshold:
-            name = "Unknown"
+        name, score = match
         results.append((box, name, score))
 
     return results
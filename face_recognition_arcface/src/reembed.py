@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .crops import CROPS_FILE, load_crops
+from .embed import ArcFaceEmbedder
+from .utils import save_npy_atomic
+
+
+def list_identities(identities_dir: str) -> List[str]:
+    """Identity folders that have stored crops, packed or as JPEGs."""
+    if not os.path.isdir(identities_dir):
+        return []
+    names = []
+    for name in sorted(os.listdir(identities_dir)):
+        identity_dir = os.path.join(identities_dir, name)
+        if os.path.isfile(os.path.join(identity_dir, CROPS_FILE)) or os.path.isdir(os.path.join(identity_dir, "crops")):
+            names.append(name)
+    return names
+
+
+def reembed_gallery(
+    identities_dir: str,
+    embedder: ArcFaceEmbedder,
+    batch_size: int = 64,
+    workers: int = 1,
+    names: Optional[List[str]] = None,
+    pack: bool = True,
+) -> Dict[str, int]:
+    """Regenerate embeddings.npy for every identity from its stored aligned crops.
+
+    No detection or alignment is run. Crops from all identities are cut into
+    batches of ``batch_size`` and embedded on ``workers`` threads (ONNX Runtime
+    releases the GIL). Each identity's embeddings are written as soon as its last
+    batch is done. Returns the number of embeddings written per identity.
+    """
+    crops: Dict[str, np.ndarray] = {}
+    for name in names if names is not None else list_identities(identities_dir):
+        stored = load_crops(os.path.join(identities_dir, name), pack=pack)
+        if stored is not None and len(stored):
+            crops[name] = stored
+
+    chunks: List[Tuple[str, int, int]] = [
+        (name, start, min(start + batch_size, len(stack)))
+        for name, stack in crops.items()
+        for start in range(0, len(stack), batch_size)
+    ]
+
+    def embed_chunk(chunk: Tuple[str, int, int]) -> np.ndarray:
+        name, start, stop = chunk
+        return embedder.embed_batch(np.asarray(crops[name][start:stop]))
+
+    written: Dict[str, int] = {}
+    parts: List[np.ndarray] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for (name, _, stop), embeddings in zip(chunks, pool.map(embed_chunk, chunks)):
+            parts.append(embeddings)
+            if stop == len(crops[name]):
+                # Replaced atomically so a running recognizer never loads a half-written gallery.
+                embeddings_path = os.path.join(identities_dir, name, "embeddings.npy")
+                save_npy_atomic(embeddings_path, np.concatenate(parts).astype(np.float32))
+                written[name] = stop
+                parts = []
+    return written
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Regenerate gallery embeddings from stored aligned crops.")
+    parser.add_argument("names", nargs="*", help="Identities to re-embed (default: all)")
+    parser.add_argument("--model", default=os.path.join(base_dir, "models", "arcface.onnx"))
+    parser.add_argument("--identities", default=os.path.join(base_dir, "data", "identities"))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2, help="Batches embedded concurrently")
+    parser.add_argument("--pack-only", action="store_true", help="Only convert crops/*.jpg to crops.npy")
+    args = parser.parse_args()
+
+    names = args.names or list_identities(args.identities)
+    if args.pack_only:
+        for name in names:
+            stored = load_crops(os.path.join(args.identities, name), pack=True)
+            print(f"{name}: {0 if stored is None else len(stored)} crops")
+        return
+
+    # Split cores between concurrent batches instead of oversubscribing them.
+    threads = max(1, (os.cpu_count() or 1) // max(1, args.workers))
+    embedder = ArcFaceEmbedder(args.model, threads=threads)
+    start = time.perf_counter()
+    written = reembed_gallery(args.identities, embedder, args.batch_size, args.workers, names)
+    elapsed = time.perf_counter() - start
+
+    for name, count in written.items():
+        print(f"{name}: {count} embeddings")
+    total = sum(written.values())
+    rate = total / elapsed if elapsed else 0.0
+    print(f"Re-embedded {total} crops for {len(written)} identities in {elapsed:.1f}s ({rate:.0f} crops/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
+from __future__ import annotations
+
+import argparse
 import os
 from typing import Tuple
 
-import cv2
-
+from .adaptive import AdaptiveController, AdaptiveRecognizer
 from .camera import camera_stream
-from .embed import ArcFaceEmbedder
+from .events import EventLog
 from .recognize import load_identity_database, recognize_frame
+from .utils import cv2
+from .warmup import warm_up
 
 
 def draw_label(frame: cv2.Mat, box: Tuple[int, int, int, int], text: str) -> None:
@@ -27,20 +31,59 @@ def draw_label(frame: cv2.Mat, box: Tuple[int, int, int, int], text: str) -> Non
 
 def main() -> None:
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Run live face recognition on the webcam.")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--event-log", default=None, help="Directory to record recognition events in")
+    parser.add_argument("--target-fps", type=float, default=None, help="Adapt processing to hold this rate")
+    parser.add_argument("--target-latency-ms", type=float, default=None, help="Adapt to this per-frame budget")
+    args = parser.parse_args()
+
     model_path = os.path.join(base_dir, "models", "arcface.onnx")
     identities_dir = os.path.join(base_dir, "data", "identities")
 
-    embedder = ArcFaceEmbedder(model_path)
+    warmup = warm_up(model_path)
     database = load_identity_database(identities_dir)
+    embedder = warmup.wait()
+    event_log = EventLog(args.event_log) if args.event_log else None
+
+    recognizer = None
+    if args.target_fps or args.target_latency_ms:
+        target_latency = args.target_latency_ms / 1000.0 if args.target_latency_ms else None
+        controller = AdaptiveController(target_latency=target_latency, target_fps=args.target_fps)
+        recognizer = AdaptiveRecognizer(embedder, database, controller)
 
-    for frame in camera_stream():
-        results = recognize_frame(frame, embedder, database)
-        for box, name, score in results:
-            draw_label(frame, box, f"{name} ({score:.2f})")
+    try:
+        for frame in camera_stream(args.camera):
+            track_ids = None
+            if recognizer is not None:
+                results = recognizer.process(frame)
+                track_ids = recognizer.track_ids
+            else:
+                results = recognize_frame(frame, embedder, database)
+            if event_log is not None:
+                event_log.log_results(results, stream=str(args.camera), track_ids=track_ids)
+            for box, name, score in results:
+                draw_label(frame, box, f"{name} ({score:.2f})")
+            if recognizer is not None:
+                d = recognizer.decisions
+                cv2.putText(
+                    frame,
+                    f"scale {d.detect_scale:.2f} det/{d.detect_interval} emb/{d.embed_interval} "
+                    f"max {d.max_faces} | {recognizer.controller.timings.frame * 1000:.0f} ms",
+                    (10, 20),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    (0, 200, 255),
+                    1,
+                    cv2.LINE_AA,
+                )
 
-        cv2.imshow("ArcFace Recognition", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+            cv2.imshow("ArcFace Recognition", frame)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+    finally:
+        if event_log is not None:
+            event_log.close()
 
     cv2.destroyAllWindows()
 
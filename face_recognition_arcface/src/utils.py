@@ -1,10 +1,37 @@
+from __future__ import annotations
+
+import importlib
 import os
+import types
 from typing import Optional
 
-import cv2
 import numpy as np
 
 
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._module: Optional[types.ModuleType] = None
+
+    def load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Defer importing a heavy dependency such as cv2 or mediapipe until it is used."""
+    return LazyModule(name)
+
+
+cv2 = lazy_import("cv2")
+
+
 def l2_normalize(vec: np.ndarray, axis: int = -1, epsilon: float = 1e-12) -> np.ndarray:
     """L2-normalize a vector or batch of vectors."""
     norm = np.linalg.norm(vec, axis=axis, keepdims=True)
@@ -23,6 +50,15 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+def save_npy_atomic(path: str, array: np.ndarray) -> None:
+    """Save an array to a .npy file via a temp file and rename, so readers never see a partial file."""
+    ensure_dir(os.path.dirname(path))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as handle:
+        np.save(handle, array)
+    os.replace(tmp_path, path)
+
+
 def save_image(path: str, image_bgr: np.ndarray) -> None:
     """Save a BGR image to disk, creating parent dirs if needed."""
     ensure_dir(os.path.dirname(path))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .align import get_face_mesh
+from .detect import get_detector
+from .embed import ArcFaceEmbedder
+
+
+class ModelWarmup:
+    """Preload cv2, MediaPipe graphs and the ArcFace session off the main thread."""
+
+    def __init__(self, model_path: Optional[str] = None, detection_confidence: float = 0.6) -> None:
+        self.model_path = model_path
+        self.detection_confidence = detection_confidence
+        self.embedder: Optional[ArcFaceEmbedder] = None
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run_safely, name="face-warmup", daemon=True)
+
+    def run(self) -> None:
+        """Build every model inline."""
+        get_detector(self.detection_confidence)
+        get_face_mesh()
+        if self.model_path is not None:
+            embedder = ArcFaceEmbedder(self.model_path)
+            embedder.embed(np.zeros((112, 112, 3), dtype=np.uint8))
+            self.embedder = embedder
+
+    def start(self) -> "ModelWarmup":
+        """Build every model in a background thread."""
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[ArcFaceEmbedder]:
+        """Block until warm-up finishes and return the embedder, if one was requested.
+
+        Raises TimeoutError if the models are still loading after ``timeout`` seconds.
+        """
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                raise TimeoutError(f"Model warm-up still running after {timeout} seconds")
+        if self.error is not None:
+            raise self.error
+        return self.embedder
+
+    def _run_safely(self) -> None:
+        try:
+            self.run()
+        except BaseException as exc:  # re-raised from wait()
+            self.error = exc
+
+
+def warm_up(
+    model_path: Optional[str] = None,
+    detection_confidence: float = 0.6,
+    background: bool = True,
+) -> ModelWarmup:
+    """Start preloading models; call ``wait()`` on the result before first use."""
+    warmup = ModelWarmup(model_path, detection_confidence)
+    if background:
+        return warmup.start()
+    warmup.run()
+    return warmup
@@ -1,2 +1,193 @@
 def test_placeholder() -> None:
     assert True
+
+
+def test_tar_at_far_separable_scores() -> None:
+    import numpy as np
+
+    from src.evaluate import roc_curve, tar_at_far
+
+    genuine = np.array([0.9, 0.8, 0.7, 0.3])
+    impostor = np.array([0.1, 0.2, 0.4, 0.5])
+    thresholds, tar, far = roc_curve(genuine, impostor)
+    assert thresholds[0] == 0.9 and tar[-1] == 1.0 and far[-1] == 1.0
+
+    tar_value, threshold = tar_at_far(genuine, impostor, 0.0)
+    assert tar_value == 0.75
+    assert threshold == 0.7
+
+
+def test_evaluate_config_propagates_skipped_frames() -> None:
+    import numpy as np
+
+    from src.evaluate import EvalConfig, Sample, evaluate_config
+
+    alice = np.array([1.0, 0.0], dtype=np.float32)
+    bob = np.array([0.0, 1.0], dtype=np.float32)
+    gallery = {"alice": alice[None, :], "bob": bob[None, :]}
+    samples = [Sample("clip.mp4", "alice", frame) for frame in range(4)]
+    embeddings = np.stack([alice, alice, np.full(2, np.nan), alice]).astype(np.float32)
+    seconds = np.full(4, 0.1)
+
+    every_frame = evaluate_config(samples, embeddings, seconds, gallery, EvalConfig("m.onnx"), [0.45])
+    assert every_frame["identification"]["0.45"]["identification_rate"] == 0.75
+    assert every_frame["throughput"]["detection_failures"] == 1
+
+    skipped = evaluate_config(
+        samples, embeddings, seconds, gallery, EvalConfig("m.onnx", frame_step=2), [0.45]
+    )
+    assert skipped["identification"]["0.45"]["identification_rate"] == 0.5
+    assert skipped["throughput"]["processed_frames"] == 2
+
+
+def test_event_log_roundtrip(tmp_path) -> None:
+    from src.events import EventLog, query_events, who_was_seen
+
+    with EventLog(str(tmp_path), batch_size=2, rotation_seconds=50) as log:
+        log.log_results([((0, 0, 10, 10), "alice", 0.8)], timestamp=1000.0)
+        log.log_results([((5, 5, 15, 15), "Unknown", 0.2)], timestamp=1030.0)
+        log.log_results([((1, 1, 11, 11), "alice", 0.7)], timestamp=1090.0, track_ids=[3])
+
+    assert len(list(tmp_path.iterdir())) == 2  # two rotation windows
+
+    events = query_events(str(tmp_path), start=1020.0)
+    assert events["identity"].tolist() == ["Unknown", "alice"]
+    assert events["track_id"].tolist() == [-1, 3]
+    assert events["box"].shape == (2, 4)
+
+    assert who_was_seen(str(tmp_path)) == [("alice", 1000.0, 1090.0, 2)]
+
+
+def test_event_log_keeps_embedding_rows_aligned(tmp_path) -> None:
+    import numpy as np
+
+    from src.events import EventLog, query_events
+
+    embedding = np.ones(4, dtype=np.float32)
+    with EventLog(str(tmp_path), store_embeddings=True) as log:
+        log.log_results([((0, 0, 10, 10), "alice", 0.8)], timestamp=1000.0, embeddings=[embedding])
+        log.log_results([((5, 5, 15, 15), "Unknown", 0.2)], timestamp=1001.0)
+
+    events = query_events(str(tmp_path), include_embeddings=True)
+    assert events["embedding"].shape == (2, 4)
+    assert np.all(events["embedding"][0] == 1) and np.isnan(events["embedding"][1]).all()
+
+
+def test_event_log_close_returns_after_writer_died(tmp_path) -> None:
+    from src.events import EventLog
+
+    log = EventLog(str(tmp_path), max_pending=1)
+    log._queue.put(None)  # stop the writer, as an exception in it would
+    log._thread.join()
+    log.log_results([((0, 0, 10, 10), "alice", 0.8)])
+    log.close()
+
+
+def test_gallery_import_skips_heavy_dependencies() -> None:
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; import src.recognize, src.enroll, src.events; "
+        "print(any(m in sys.modules for m in ('cv2', 'mediapipe', 'onnxruntime')))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_warmup_wait_times_out_while_loading() -> None:
+    import threading
+
+    import pytest
+
+    from src.warmup import ModelWarmup
+
+    release = threading.Event()
+    warmup = ModelWarmup()
+    warmup.run = release.wait  # type: ignore[method-assign]
+    warmup.start()
+    with pytest.raises(TimeoutError):
+        warmup.wait(timeout=0.05)
+    release.set()
+    assert warmup.wait(timeout=5) is None
+
+
+def test_adaptive_controller_degrades_costliest_stage_and_recovers() -> None:
+    from src.adaptive import AdaptiveController
+
+    controller = AdaptiveController(target_fps=20, cooldown_frames=0, smoothing=1.0)
+
+    # Detection dominates: shrink the detector input first.
+    decisions = controller.observe(0.2, detect_seconds=0.15, embed_seconds=0.05, faces_embedded=1, faces_seen=1)
+    assert decisions.detect_scale < 1.0 and decisions.embed_interval == 1
+
+    # Embedding dominates: re-embed less often.
+    decisions = controller.observe(0.2, embed_seconds=0.18, faces_embedded=1, faces_seen=6)
+    assert decisions.embed_interval == 2
+
+    for _ in range(20):
+        decisions = controller.observe(0.005)
+    assert decisions.detect_scale == 1.0
+    assert decisions.detect_interval == 1 and decisions.embed_interval == 1
+
+
+def _tiny_embedder_model(path) -> None:
+    """ONNX stand-in for ArcFace: per-channel mean of the face plus a constant."""
+    import numpy as np
+    import pytest
+
+    onnx = pytest.importorskip("onnx")  # only needed to build the test model
+    from onnx import TensorProto, helper, numpy_helper
+
+    graph = helper.make_graph(
+        [
+            helper.make_node("GlobalAveragePool", ["data"], ["pooled"]),
+            helper.make_node("Flatten", ["pooled"], ["flat"]),
+            helper.make_node("Add", ["flat", "bias"], ["embedding"]),
+        ],
+        "tiny_embedder",
+        [helper.make_tensor_value_info("data", TensorProto.FLOAT, ["batch", 3, 112, 112])],
+        [helper.make_tensor_value_info("embedding", TensorProto.FLOAT, ["batch", 3])],
+        [numpy_helper.from_array(np.array([0.5, 0.0, -0.5], np.float32), "bias")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def test_reembed_gallery_from_packed_and_jpeg_crops(tmp_path) -> None:
+    import os
+
+    import cv2
+    import numpy as np
+
+    from src.crops import load_crops, save_crops
+    from src.embed import ArcFaceEmbedder
+    from src.reembed import list_identities, reembed_gallery
+
+    model_path = tmp_path / "tiny.onnx"
+    _tiny_embedder_model(model_path)
+    embedder = ArcFaceEmbedder(str(model_path))
+
+    rng = np.random.default_rng(0)
+    alice = rng.integers(0, 256, (5, 112, 112, 3), dtype=np.uint8)
+    gallery = tmp_path / "identities"
+    save_crops(str(gallery / "alice"), alice)
+    # An identity enrolled before crops were packed
+    os.makedirs(gallery / "bob" / "crops")
+    for idx in range(3):
+        cv2.imwrite(str(gallery / "bob" / "crops" / f"{idx:04d}.jpg"), np.full((112, 112, 3), 60 * idx, np.uint8))
+    os.makedirs(gallery / "carol")
+
+    assert list_identities(str(gallery)) == ["alice", "bob"]
+    written = reembed_gallery(str(gallery), embedder, batch_size=2, workers=2)
+    assert written == {"alice": 5, "bob": 3}
+
+    embeddings = np.load(gallery / "alice" / "embeddings.npy")
+    expected = np.stack([embedder.embed(face) for face in alice])
+    assert embeddings.shape == (5, 3)
+    assert np.allclose(embeddings, expected, atol=1e-5)
+
+    packed = load_crops(str(gallery / "bob"))
+    assert isinstance(packed, np.memmap) and packed.shape == (3, 112, 112, 3)
+    assert os.path.isfile(gallery / "bob" / "crops.npy")
@@ -0,0 +1,81 @@
+"""Measure training data loader throughput in images/sec and images/sec per core.
+
+Run from the plate_recognition directory:
+
+    python benchmarks/bench_loader.py --workers 0 1 2 4 --batches 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.augment import AugmentConfig, load_image  # noqa: E402
+from src.dataset import load_labels  # noqa: E402
+from src.loader import BatchLoader, SampleSource  # noqa: E402
+from src.validate import read_image_sizes  # noqa: E402
+
+
+def time_decode(source, repeat):
+    """Seconds per image for a full-size decode + resize vs a reduced-scale decode."""
+    paths = [source.index.image_path(i) for i in source.ids]
+    results = {}
+    for name, sizes in (("full decode", None), ("reduced decode", source.image_sizes)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for i, path in zip(source.ids, paths):
+                load_image(path, source.img_size, None if sizes is None else tuple(sizes[i, :2]))
+        results[name] = (time.perf_counter() - start) / (repeat * len(paths))
+    return results
+
+
+def time_loader(source, workers, batch_size, batches):
+    """Images/sec over ``batches`` batches, after one warm-up batch."""
+    with BatchLoader(source, batch_size=batch_size, workers=workers) as loader:
+        produced = -1
+        images = 0
+        start = time.perf_counter()
+        while produced < batches:
+            for batch in loader:
+                produced += 1
+                if produced == 0:
+                    start = time.perf_counter()  # exclude worker start-up
+                else:
+                    images += len(batch.images)
+                if produced >= batches:
+                    break
+        return images / (time.perf_counter() - start)
+
+
+def main():
+    default_root = os.path.join(PROJECT_DIR, "..", "NIYOBYOSEPaulin", "NIYOBYOSE_PAULIN")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=default_root)
+    parser.add_argument("--img-size", type=int, default=640)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, os.cpu_count() or 1])
+    parser.add_argument("--no-augment", action="store_true", help="Letterbox only (evaluation pipeline).")
+    args = parser.parse_args()
+
+    index = load_labels(args.root)
+    sizes = read_image_sizes([index.image_path(i) for i in range(len(index))])
+    augment = None if args.no_augment else AugmentConfig()
+    source = SampleSource(index, args.img_size, augment, sizes)
+    print(f"{len(source.ids)} images, {args.img_size}px, batch {args.batch_size}, "
+          f"{'letterbox only' if augment is None else 'mosaic + affine + HSV'}, {os.cpu_count()} CPUs")
+
+    for name, seconds in time_decode(source, repeat=3).items():
+        print(f"{name:<24} {seconds * 1000:8.1f} ms/image")
+
+    for workers in args.workers:
+        rate = time_loader(source, workers, args.batch_size, args.batches)
+        cores = max(workers, 1)
+        print(f"workers={workers:<3} {rate:8.1f} images/s  {rate / cores:8.1f} images/s/core")
+
+
+if __name__ == "__main__":
+    main()
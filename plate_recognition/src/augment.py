@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# JPEG decoders can scale by 1/2, 1/4 or 1/8 while decoding, which is much cheaper
+# than decoding at full size and resizing afterwards.
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+Sample = Tuple[np.ndarray, np.ndarray, np.ndarray]  # image (H, W, 3), boxes (N, 4) pixel xyxy, classes (N,)
+
+
+@dataclass
+class AugmentConfig:
+    mosaic: float = 1.0  # probability of a 4-image mosaic
+    degrees: float = 0.0
+    translate: float = 0.1
+    scale: float = 0.5
+    shear: float = 0.0
+    hsv_h: float = 0.015
+    hsv_s: float = 0.7
+    hsv_v: float = 0.4
+    fill: int = 114
+    min_box_pixels: float = 2.0
+    min_area_ratio: float = 0.1
+    max_aspect: float = 20.0
+
+
+def load_image(path: str, max_side: int, original_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """Decode an image as BGR with its longer side resized to ``max_side``.
+
+    With ``original_size`` (width, height) known, JPEGs are decoded directly at
+    1/2, 1/4 or 1/8 scale when that still leaves at least ``max_side`` pixels.
+    """
+    flags = cv2.IMREAD_COLOR
+    if original_size is not None and min(original_size) > 0:
+        longest = max(original_size)
+        for factor, reduced in _REDUCED_FLAGS:
+            if longest // factor >= max_side:
+                flags = reduced
+                break
+    image = cv2.imread(path, flags)
+    if image is None:
+        raise FileNotFoundError(f"Could not read image: {path}")
+    height, width = image.shape[:2]
+    ratio = max_side / max(height, width)
+    if ratio != 1:
+        interpolation = cv2.INTER_AREA if ratio < 1 else cv2.INTER_LINEAR
+        size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+        image = cv2.resize(image, size, interpolation=interpolation)
+    return image
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray, width: float, height: float) -> np.ndarray:
+    """Convert pixel (x0, y0, x1, y1) boxes to normalized (cx, cy, w, h)."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    out = np.empty_like(boxes)
+    out[:, 0] = (boxes[:, 0] + boxes[:, 2]) / (2 * width)
+    out[:, 1] = (boxes[:, 1] + boxes[:, 3]) / (2 * height)
+    out[:, 2] = (boxes[:, 2] - boxes[:, 0]) / width
+    out[:, 3] = (boxes[:, 3] - boxes[:, 1]) / height
+    return out
+
+
+def letterbox(image: np.ndarray, size: int, fill: int = 114) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize keeping the aspect ratio and pad to ``size`` x ``size``; returns (image, scale, (pad_x, pad_y))."""
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    if (new_w, new_h) != (width, height):
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(image, (new_w, new_h), interpolation=interpolation)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    canvas = np.full((size, size, 3), fill, dtype=np.uint8)
+    canvas[pad_y : pad_y + new_h, pad_x : pad_x + new_w] = image
+    return canvas, scale, (pad_x, pad_y)
+
+
+def augment_hsv(image: np.ndarray, rng: np.random.Generator, gains: Sequence[float]) -> None:
+    """Randomly scale hue, saturation and value in place using per-channel lookup tables."""
+    if not any(gains):
+        return
+    factors = rng.uniform(-1, 1, 3) * np.asarray(gains) + 1
+    hue, sat, val = cv2.split(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+    x = np.arange(256, dtype=np.float32)
+    lut_hue = ((x * factors[0]) % 180).astype(np.uint8)
+    lut_sat = np.clip(x * factors[1], 0, 255).astype(np.uint8)
+    lut_val = np.clip(x * factors[2], 0, 255).astype(np.uint8)
+    merged = cv2.merge((cv2.LUT(hue, lut_hue), cv2.LUT(sat, lut_sat), cv2.LUT(val, lut_val)))
+    cv2.cvtColor(merged, cv2.COLOR_HSV2BGR, dst=image)
+
+
+def transform_boxes(boxes: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Map pixel xyxy boxes through a 2x3 affine matrix; returns the enclosing xyxy boxes."""
+    if not len(boxes):
+        return boxes.reshape(0, 4)
+    x0, y0, x1, y1 = boxes.T
+    corners = np.stack([np.stack([x0, y0], 1), np.stack([x1, y0], 1), np.stack([x1, y1], 1), np.stack([x0, y1], 1)], 1)
+    mapped = corners @ matrix[:, :2].T + matrix[:, 2]  # (N, 4, 2)
+    return np.concatenate([mapped.min(axis=1), mapped.max(axis=1)], axis=1).astype(np.float32)
+
+
+def box_candidates(before: np.ndarray, after: np.ndarray, config: AugmentConfig, area_scale: float = 1.0) -> np.ndarray:
+    """Keep boxes that are still large enough, mostly visible and not degenerate after a transform."""
+    w0, h0 = before[:, 2] - before[:, 0], before[:, 3] - before[:, 1]
+    w1, h1 = after[:, 2] - after[:, 0], after[:, 3] - after[:, 1]
+    aspect = np.maximum(w1 / (h1 + 1e-9), h1 / (w1 + 1e-9))
+    return (
+        (w1 > config.min_box_pixels)
+        & (h1 > config.min_box_pixels)
+        & (w1 * h1 / (w0 * h0 * area_scale + 1e-9) > config.min_area_ratio)
+        & (aspect < config.max_aspect)
+    )
+
+
+def random_affine(
+    image: np.ndarray,
+    boxes: np.ndarray,
+    classes: np.ndarray,
+    rng: np.random.Generator,
+    size: int,
+    config: AugmentConfig,
+) -> Sample:
+    """Rotate, scale, shear and translate into a ``size`` x ``size`` output with one warpAffine.
+
+    The input may be larger than the output (a mosaic canvas); its centre is
+    mapped near the output centre.
+    """
+    height, width = image.shape[:2]
+    centre = np.eye(3)
+    centre[0, 2], centre[1, 2] = -width / 2, -height / 2
+
+    scale = rng.uniform(1 - config.scale, 1 + config.scale)
+    rotate = np.eye(3)
+    rotate[:2] = cv2.getRotationMatrix2D((0, 0), rng.uniform(-config.degrees, config.degrees), scale)
+
+    shear = np.eye(3)
+    shear[0, 1] = math.tan(math.radians(rng.uniform(-config.shear, config.shear)))
+    shear[1, 0] = math.tan(math.radians(rng.uniform(-config.shear, config.shear)))
+
+    translate = np.eye(3)
+    translate[0, 2] = rng.uniform(0.5 - config.translate, 0.5 + config.translate) * size
+    translate[1, 2] = rng.uniform(0.5 - config.translate, 0.5 + config.translate) * size
+
+    matrix = (translate @ shear @ rotate @ centre)[:2]
+    fill = (config.fill,) * 3
+    warped = cv2.warpAffine(image, matrix, (size, size), flags=cv2.INTER_LINEAR, borderValue=fill)
+
+    mapped = transform_boxes(boxes, matrix)
+    np.clip(mapped, 0, size, out=mapped)
+    keep = box_candidates(boxes, mapped, config, area_scale=scale * scale)
+    return warped, mapped[keep], classes[keep]
+
+
+def mosaic(samples: List[Sample], size: int, rng: np.random.Generator, fill: int = 114) -> Sample:
+    """Tile four samples around a random centre of a 2 * ``size`` canvas."""
+    canvas_size = 2 * size
+    canvas = np.full((canvas_size, canvas_size, 3), fill, dtype=np.uint8)
+    xc, yc = (int(v) for v in rng.uniform(0.5 * size, 1.5 * size, 2))
+    all_boxes, all_classes = [], []
+    for k, (image, boxes, classes) in enumerate(samples):
+        h, w = image.shape[:2]
+        if k == 0:  # top left
+            x0a, y0a, x1a, y1a = max(xc - w, 0), max(yc - h, 0), xc, yc
+            x0b, y0b = w - (x1a - x0a), h - (y1a - y0a)
+        elif k == 1:  # top right
+            x0a, y0a, x1a, y1a = xc, max(yc - h, 0), min(xc + w, canvas_size), yc
+            x0b, y0b = 0, h - (y1a - y0a)
+        elif k == 2:  # bottom left
+            x0a, y0a, x1a, y1a = max(xc - w, 0), yc, xc, min(canvas_size, yc + h)
+            x0b, y0b = w - (x1a - x0a), 0
+        else:  # bottom right
+            x0a, y0a, x1a, y1a = xc, yc, min(xc + w, canvas_size), min(canvas_size, yc + h)
+            x0b, y0b = 0, 0
+        canvas[y0a:y1a, x0a:x1a] = image[y0b : y0b + (y1a - y0a), x0b : x0b + (x1a - x0a)]
+        # Shift into the canvas and clip to the visible part of this tile
+        shifted = boxes + np.array([x0a - x0b, y0a - y0b] * 2, dtype=np.float32)
+        np.clip(shifted, [x0a, y0a, x0a, y0a], [x1a, y1a, x1a, y1a], out=shifted)
+        visible = (shifted[:, 2] > shifted[:, 0]) & (shifted[:, 3] > shifted[:, 1])
+        all_boxes.append(shifted[visible])
+        all_classes.append(classes[visible])
+    return canvas, np.concatenate(all_boxes), np.concatenate(all_classes)
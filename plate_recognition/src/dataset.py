@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+LABEL_EXTENSION = ".txt"
+CACHE_VERSION = 1
+
+# One row per box: owning image, class id and normalized (cx, cy, w, h).
+RECORD_DTYPE = np.dtype([("image", "<i4"), ("cls", "<i4"), ("box", "<f4", (4,))])
+
+
+def parse_label_file(path: str) -> np.ndarray:
+    """Parse a YOLO label file into an (N, 5) float32 array of class, cx, cy, w, h."""
+    with open(path, "rb") as handle:
+        tokens = handle.read().split()
+    if len(tokens) % 5:
+        raise ValueError(f"{path}: expected 5 values per row, found {len(tokens)} values")
+    try:
+        values = np.array(tokens, dtype=np.float32)
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from None
+    return values.reshape(-1, 5)
+
+
+def yolo_to_xyxy(boxes: np.ndarray, width: float, height: float) -> np.ndarray:
+    """Convert normalized (cx, cy, w, h) boxes to pixel (x0, y0, x1, y1)."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    half_w = boxes[:, 2] * (width / 2.0)
+    half_h = boxes[:, 3] * (height / 2.0)
+    cx = boxes[:, 0] * width
+    cy = boxes[:, 1] * height
+    return np.stack([cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1)
+
+
+def _scan(directory: Optional[str], extensions: Sequence[str]) -> Dict[str, Tuple[str, int, int]]:
+    """Map file stem -> (file name, mtime_ns, size) for matching files in a directory."""
+    found: Dict[str, Tuple[str, int, int]] = {}
+    if not directory or not os.path.isdir(directory):
+        return found
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() not in extensions or not entry.is_file():
+                continue
+            stat = entry.stat()
+            found[stem] = (entry.name, stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def _digest(labels: Dict[str, Tuple[str, int, int]], images: Dict[str, Tuple[str, int, int]]) -> str:
+    """Fingerprint of every label file's mtime and size plus the set of image files."""
+    sha = hashlib.sha1()
+    for stem in sorted(labels):
+        sha.update("{}\0{}\0{}\n".format(*labels[stem]).encode("utf-8"))
+    sha.update(b"--images--\n")
+    for stem in sorted(images):
+        sha.update(images[stem][0].encode("utf-8") + b"\n")
+    return sha.hexdigest()
+
+
+class LabelIndex:
+    """All boxes of a YOLO dataset in one contiguous array, queryable by image and class.
+
+    ``records`` is sorted by image, so the boxes of image ``i`` are the slice
+    ``records[offsets[i]:offsets[i + 1]]``. When loaded from the cache it is a
+    read-only memory map and slices are views into it.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        records: np.ndarray,
+        image_files: List[Optional[str]],
+        labeled: np.ndarray,
+        image_dir: Optional[str] = None,
+        label_dir: Optional[str] = None,
+    ) -> None:
+        self.names = names
+        self.records = records
+        self.image_files = image_files
+        self.labeled = np.asarray(labeled, dtype=bool)
+        self.image_dir = image_dir
+        self.label_dir = label_dir
+        self.offsets = np.searchsorted(records["image"], np.arange(len(names) + 1)).astype(np.int64)
+        self._name_to_index = {name: i for i, name in enumerate(names)}
+        self._class_order: Optional[np.ndarray] = None
+        self._class_offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_boxes(self) -> int:
+        return int(len(self.records))
+
+    @property
+    def num_classes(self) -> int:
+        return int(self.records["cls"].max()) + 1 if len(self.records) else 0
+
+    @property
+    def classes(self) -> np.ndarray:
+        return self.records["cls"]
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self.records["box"]
+
+    @property
+    def box_counts(self) -> np.ndarray:
+        """Number of boxes per image."""
+        return np.diff(self.offsets)
+
+    def index(self, name: str) -> int:
+        """Image index for a file stem or file name."""
+        stem = os.path.splitext(os.path.basename(name))[0]
+        try:
+            return self._name_to_index[stem]
+        except KeyError:
+            raise KeyError(f"No image or label named {name!r}") from None
+
+    def image_path(self, image: Union[int, str]) -> Optional[str]:
+        i = image if isinstance(image, (int, np.integer)) else self.index(image)
+        filename = self.image_files[i]
+        if filename is None or self.image_dir is None:
+            return None
+        return os.path.join(self.image_dir, filename)
+
+    def labels(self, image: Union[int, str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Class ids (N,) and normalized boxes (N, 4) of one image."""
+        i = image if isinstance(image, (int, np.integer)) else self.index(image)
+        rows = self.records[self.offsets[i] : self.offsets[i + 1]]
+        return rows["cls"], rows["box"]
+
+    def _build_class_index(self) -> None:
+        classes = self.records["cls"]
+        self._class_order = np.argsort(classes, kind="stable")
+        self._class_offsets = np.searchsorted(
+            classes[self._class_order], np.arange(self.num_classes + 1)
+        ).astype(np.int64)
+
+    def rows_of_class(self, cls: int) -> np.ndarray:
+        """Record indices of every box of ``cls``, in image order."""
+        if self._class_order is None:
+            self._build_class_index()
+        if cls < 0 or cls >= self.num_classes:
+            return np.empty(0, dtype=np.int64)
+        return self._class_order[self._class_offsets[cls] : self._class_offsets[cls + 1]]
+
+    def boxes_of_class(self, cls: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Image indices (N,) and normalized boxes (N, 4) of every box of ``cls``."""
+        rows = self.records[self.rows_of_class(cls)]
+        return rows["image"], rows["box"]
+
+    def images_with_class(self, cls: int) -> np.ndarray:
+        """Sorted indices of images containing at least one box of ``cls``."""
+        return np.unique(self.records["image"][self.rows_of_class(cls)])
+
+    def class_counts(self, minlength: int = 0) -> np.ndarray:
+        """Number of boxes per class id."""
+        return np.bincount(self.records["cls"], minlength=minlength)
+
+
+def _parse_all(label_dir: str, files: List[Optional[str]], workers: int) -> List[np.ndarray]:
+    empty = np.empty((0, 5), dtype=np.float32)
+
+    def parse(filename: Optional[str]) -> np.ndarray:
+        return empty if filename is None else parse_label_file(os.path.join(label_dir, filename))
+
+    if workers <= 1 or len(files) < 256:
+        return [parse(filename) for filename in files]
+    # Small files: the cost is open/read syscalls, which release the GIL.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse, files, chunksize=64))
+
+
+def build_records(parsed: Sequence[np.ndarray]) -> np.ndarray:
+    """Pack per-image (N, 5) label arrays into one image-sorted record array."""
+    counts = np.fromiter((len(rows) for rows in parsed), dtype=np.int64, count=len(parsed))
+    records = np.empty(int(counts.sum()), dtype=RECORD_DTYPE)
+    if len(records):
+        stacked = np.concatenate(parsed)
+        records["image"] = np.repeat(np.arange(len(parsed), dtype=np.int32), counts)
+        records["cls"] = stacked[:, 0].astype(np.int32)
+        records["box"] = stacked[:, 1:]
+    return records
+
+
+def default_cache_dir() -> str:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    return os.path.join(base_dir, "data", "label_cache")
+
+
+def _cache_paths(cache_dir: str, label_dir: str) -> Tuple[str, str]:
+    key = hashlib.sha1(os.path.abspath(label_dir).encode("utf-8")).hexdigest()[:12]
+    stem = os.path.join(cache_dir, f"labels-{key}")
+    return stem + ".npy", stem + ".json"
+
+
+def _write_cache(npy_path: str, manifest_path: str, records: np.ndarray, manifest: dict) -> None:
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    # Write to temporary files and rename so a concurrent reader never sees a partial cache.
+    # The manifest goes last: it is what marks the array as valid.
+    tmp_npy = f"{npy_path}.{os.getpid()}.tmp"
+    with open(tmp_npy, "wb") as handle:
+        np.save(handle, records)
+    os.replace(tmp_npy, npy_path)
+    tmp_manifest = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    os.replace(tmp_manifest, manifest_path)
+
+
+def _read_cache(npy_path: str, manifest_path: str, digest: str) -> Optional[Tuple[dict, np.ndarray]]:
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != CACHE_VERSION or manifest.get("digest") != digest:
+        return None
+    try:
+        records = np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if records.dtype != RECORD_DTYPE or len(records) != manifest.get("num_boxes"):
+        return None
+    return manifest, records
+
+
+def load_labels(
+    root: Optional[str] = None,
+    label_dir: Optional[str] = None,
+    image_dir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    use_cache: bool = True,
+    rebuild: bool = False,
+    workers: int = 8,
+) -> LabelIndex:
+    """Load a YOLO dataset's labels, from the memory-mapped cache when it is current.
+
+    ``root`` is a directory with ``labels/`` and (optionally) ``images/``, or
+    a directory of label files itself.
+    Every label file and every image is one entry; images without a label file
+    have no boxes and ``labeled`` False. The cache is rebuilt when any label
+    file's mtime or size changes, or images are added or removed.
+    """
+    if label_dir is None:
+        if root is None:
+            raise ValueError("Pass a dataset root or a label directory")
+        label_dir = os.path.join(root, "labels")
+        if not os.path.isdir(label_dir):
+            label_dir = root
+    if image_dir is None and root is not None and os.path.isdir(os.path.join(root, "images")):
+        image_dir = os.path.join(root, "images")
+    if not os.path.isdir(label_dir):
+        raise FileNotFoundError(f"Label directory not found: {label_dir}")
+
+    label_stamps = _scan(label_dir, (LABEL_EXTENSION,))
+    image_stamps = _scan(image_dir, IMAGE_EXTENSIONS)
+    digest = _digest(label_stamps, image_stamps)
+    npy_path, manifest_path = _cache_paths(cache_dir or default_cache_dir(), label_dir)
+
+    cached = _read_cache(npy_path, manifest_path, digest) if use_cache and not rebuild else None
+    if cached is not None:
+        manifest, records = cached
+        return LabelIndex(
+            manifest["names"], records, manifest["images"], manifest["labeled"], image_dir, label_dir
+        )
+
+    names = sorted(set(label_stamps) | set(image_stamps))
+    label_files = [label_stamps[name][0] if name in label_stamps else None for name in names]
+    image_files = [image_stamps[name][0] if name in image_stamps else None for name in names]
+    labeled = [filename is not None for filename in label_files]
+    records = build_records(_parse_all(label_dir, label_files, workers))
+
+    if use_cache:
+        manifest = {
+            "version": CACHE_VERSION,
+            "digest": digest,
+            "label_dir": os.path.abspath(label_dir),
+            "num_boxes": int(len(records)),
+            "names": names,
+            "images": image_files,
+            "labeled": labeled,
+        }
+        _write_cache(npy_path, manifest_path, records, manifest)
+        records = np.load(npy_path, mmap_mode="r")
+    return LabelIndex(names, records, image_files, np.array(labeled), image_dir, label_dir)
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    default_root = os.path.join(base_dir, "..", "NIYOBYOSEPaulin", "NIYOBYOSE_PAULIN")
+
+    parser = argparse.ArgumentParser(description="Index YOLO label files and print a summary.")
+    parser.add_argument("root", nargs="?", default=default_root, help="Dataset directory with labels/ and images/, or a label directory.")
+    parser.add_argument("--cache-dir", default=None, help="Where to keep the label cache.")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and re-parse every file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_labels(args.root, cache_dir=args.cache_dir, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(index)} images, {index.num_boxes} boxes, {index.num_classes} classes ({elapsed * 1000:.1f} ms)")
+    for cls, count in enumerate(index.class_counts()):
+        print(f"  class {cls:3d}: {count} boxes in {len(index.images_with_class(cls))} images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .augment import letterbox
+from .dataset import IMAGE_EXTENSIONS
+
+
+@dataclass
+class Detections:
+    """Detections for one image: pixel xyxy boxes (N, 4), scores (N,) and class ids (N,)."""
+
+    boxes: np.ndarray
+    scores: np.ndarray
+    classes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+@dataclass
+class PlateReading:
+    """A plate-level box with the character boxes inside it in reading order."""
+
+    box: List[float]
+    cls: int
+    score: float
+    char_boxes: np.ndarray
+    char_classes: List[int]
+    char_scores: List[float]
+    lines: int
+    text: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "box": [round(v, 1) for v in self.box],
+            "class": self.cls,
+            "score": round(self.score, 4),
+            "text": self.text,
+            "lines": self.lines,
+            "chars": [
+                {"class": c, "score": round(s, 4), "box": [round(float(v), 1) for v in b]}
+                for c, s, b in zip(self.char_classes, self.char_scores, self.char_boxes)
+            ],
+        }
+
+
+# Above this many boxes the pairwise IoU matrix gets too large; fall back to the greedy loop.
+MATRIX_NMS_LIMIT = 4096
+
+
+def pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every box in ``a`` (N, 4) with every box in ``b`` (M, 4), xyxy."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(np.clip(a[:, 2:] - a[:, :2], 0, None), axis=1)
+    area_b = np.prod(np.clip(b[:, 2:] - b[:, :2], 0, None), axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Non-maximum suppression; returns kept indices by descending score.
+
+    Computes the IoU matrix once and repeats "drop every box overlapping a kept,
+    higher-scoring box" until nothing changes (Cluster-NMS). This gives the same
+    result as greedy NMS in a few matrix passes instead of one pass per kept box.
+    """
+    if not len(boxes):
+        return np.empty(0, dtype=np.int64)
+    order = np.argsort(-scores, kind="stable")
+    boxes = boxes[order].astype(np.float32)
+    if len(boxes) > MATRIX_NMS_LIMIT:
+        return order[_greedy_nms(boxes, iou_threshold)]
+    overlaps = np.triu(pairwise_iou(boxes, boxes), k=1) > iou_threshold
+    keep = np.ones(len(boxes), dtype=bool)
+    while True:
+        suppressed = (overlaps & keep[:, None]).any(axis=0)
+        if np.array_equal(~suppressed, keep):
+            return order[keep]
+        keep = ~suppressed
+
+
+def _greedy_nms(boxes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy NMS over boxes already sorted by descending score."""
+    remaining = np.arange(len(boxes))
+    keep = []
+    while remaining.size:
+        best, rest = remaining[0], remaining[1:]
+        keep.append(best)
+        iou = pairwise_iou(boxes[best : best + 1], boxes[rest])[0]
+        remaining = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, groups: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """NMS within each group (e.g. image and class); returns kept indices by descending score.
+
+    Boxes of different groups never suppress each other. Each group gets its own
+    IoU matrix, which keeps the matrices small.
+    """
+    if not len(boxes):
+        return np.empty(0, dtype=np.int64)
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.flatnonzero(np.diff(groups[by_group])) + 1
+    kept = [members[nms(boxes[members], scores[members], iou_threshold)] for members in np.split(by_group, bounds)]
+    keep = np.concatenate(kept)
+    return keep[np.argsort(-scores[keep], kind="stable")]
+
+
+def decode_output(raw: np.ndarray, layout: str = "auto") -> Tuple[np.ndarray, np.ndarray]:
+    """Split a YOLO head output into (B, A, 4) cx, cy, w, h boxes and (B, A, C) class scores.
+
+    ``layout`` is "v8" for (B, 4 + C, A) without objectness, "v5" for
+    (B, A, 5 + C) with objectness, or "auto" to pick by which axis is shorter.
+    """
+    if raw.ndim != 3:
+        raise ValueError(f"Expected a (batch, ..., ...) detector output, got shape {raw.shape}")
+    if layout == "auto":
+        layout = "v8" if raw.shape[1] < raw.shape[2] else "v5"
+    if layout == "v8":
+        raw = raw.transpose(0, 2, 1)
+        return raw[..., :4], raw[..., 4:]
+    if layout == "v5":
+        return raw[..., :4], raw[..., 5:] * raw[..., 4:5]
+    raise ValueError(f"Unknown output layout: {layout}")
+
+
+def reading_order(boxes: np.ndarray, line_gap: float = 0.5) -> Tuple[np.ndarray, int]:
+    """Order character boxes top-to-bottom by line, then left-to-right; returns (order, lines).
+
+    A new line starts where consecutive centres, sorted by y, are more than
+    ``line_gap`` median character heights apart (two-row plates).
+    """
+    if not len(boxes):
+        return np.empty(0, dtype=np.int64), 0
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    by_y = np.argsort(cy, kind="stable")
+    height = np.median(boxes[:, 3] - boxes[:, 1])
+    breaks = np.diff(cy[by_y]) > line_gap * height
+    line = np.empty(len(boxes), dtype=np.int64)
+    line[by_y] = np.concatenate([[0], np.cumsum(breaks)])
+    return np.lexsort((cx, line)), int(line.max()) + 1
+
+
+def group_characters(
+    detections: Detections,
+    char_start: int = 2,
+    names: Optional[Sequence[str]] = None,
+) -> List[PlateReading]:
+    """Assign character boxes to plate-level boxes and read them in order.
+
+    Classes below ``char_start`` are plate-level boxes. Each character goes to the
+    smallest plate-level box containing its centre; characters outside every
+    plate-level box are dropped.
+    """
+    boxes, scores, classes = detections.boxes, detections.scores, detections.classes
+    plate_rows = np.flatnonzero(classes < char_start)
+    char_rows = np.flatnonzero(classes >= char_start)
+    if not len(plate_rows):
+        return []
+    plates = boxes[plate_rows]
+    centres = (boxes[char_rows, :2] + boxes[char_rows, 2:]) / 2
+    inside = (
+        (centres[:, None, 0] >= plates[None, :, 0])
+        & (centres[:, None, 0] <= plates[None, :, 2])
+        & (centres[:, None, 1] >= plates[None, :, 1])
+        & (centres[:, None, 1] <= plates[None, :, 3])
+    )
+    areas = (plates[:, 2] - plates[:, 0]) * (plates[:, 3] - plates[:, 1])
+    owner = np.argmin(np.where(inside, areas[None, :], np.inf), axis=1)
+    owned = inside.any(axis=1)
+
+    readings = []
+    for p, row in enumerate(plate_rows):
+        members = char_rows[owned & (owner == p)]
+        order, lines = reading_order(boxes[members])
+        members = members[order]
+        char_classes = [int(c) for c in classes[members]]
+        text = "".join(names[c] for c in char_classes) if names is not None else None
+        readings.append(PlateReading(
+            box=[float(v) for v in boxes[row]],
+            cls=int(classes[row]),
+            score=float(scores[row]),
+            char_boxes=boxes[members],
+            char_classes=char_classes,
+            char_scores=[float(s) for s in scores[members]],
+            lines=lines,
+            text=text,
+        ))
+    return readings
+
+
+@dataclass
+class PreparedBatch:
+    """Letterboxed input tensor plus what is needed to map boxes back to each image."""
+
+    tensor: np.ndarray
+    scales: np.ndarray
+    pads: np.ndarray
+    sizes: np.ndarray  # original (width, height)
+    paths: List[str] = field(default_factory=list)
+
+
+class PlateDetector:
+    """YOLO-style ONNX detector for plate and character boxes, running on CPU."""
+
+    def __init__(
+        self,
+        model_path: str,
+        img_size: Optional[int] = None,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.45,
+        max_det: int = 300,
+        max_candidates: int = 3000,
+        layout: str = "auto",
+        threads: int = 0,
+    ) -> None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.output_name = self.session.get_outputs()[0].name
+        batch_dim, _, height, width = model_input.shape
+        fixed_size = height if isinstance(height, int) and height == width else None
+        self.img_size = img_size or fixed_size or 640
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        self.max_candidates = max_candidates
+        self.layout = layout
+
+    def prepare(self, images: Sequence[np.ndarray]) -> PreparedBatch:
+        """Letterbox BGR images into one (B, 3, S, S) float32 RGB tensor in [0, 1]."""
+        size = self.img_size
+        tensor = np.empty((len(images), 3, size, size), dtype=np.float32)
+        scales = np.empty(len(images), dtype=np.float32)
+        pads = np.empty((len(images), 2), dtype=np.float32)
+        sizes = np.empty((len(images), 2), dtype=np.float32)
+        for i, image in enumerate(images):
+            canvas, scales[i], pads[i] = letterbox(image, size)
+            sizes[i] = image.shape[1], image.shape[0]
+            np.multiply(canvas[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=tensor[i], casting="unsafe")
+        return PreparedBatch(tensor, scales, pads, sizes)
+
+    def infer(self, tensor: np.ndarray) -> np.ndarray:
+        """Run the model, splitting the batch if the model's batch size is fixed."""
+        step = self.max_batch or len(tensor)
+        outputs = [
+            self.session.run([self.output_name], {self.input_name: tensor[start : start + step]})[0]
+            for start in range(0, len(tensor), step)
+        ]
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+    def postprocess(self, raw: np.ndarray, batch: PreparedBatch) -> List[Detections]:
+        """Threshold, NMS the whole batch at once and map boxes back to each original image."""
+        cxcywh, class_scores = decode_output(raw, self.layout)
+        num_classes = class_scores.shape[2]
+        classes = class_scores.argmax(axis=2)
+        scores = np.take_along_axis(class_scores, classes[..., None], axis=2)[..., 0]
+        image_ids, anchors = np.nonzero(scores >= self.conf_threshold)
+        scores = scores[image_ids, anchors]
+        # Keep at most max_candidates per image, highest scores first
+        by_score = np.lexsort((-scores, image_ids))
+        starts = np.searchsorted(image_ids[by_score], image_ids[by_score])
+        top = by_score[np.arange(len(by_score)) - starts < self.max_candidates]
+        image_ids, anchors, scores = image_ids[top], anchors[top], scores[top]
+        classes = classes[image_ids, anchors]
+        centre, half = cxcywh[image_ids, anchors, :2], cxcywh[image_ids, anchors, 2:] / 2
+        boxes = np.concatenate([centre - half, centre + half], axis=1)
+
+        keep = batched_nms(boxes, scores, image_ids * num_classes + classes, self.iou_threshold)
+        # batched_nms returns by descending score; regroup by image, keeping that order
+        keep = keep[np.argsort(image_ids[keep], kind="stable")]
+        image_ids, boxes, scores, classes = image_ids[keep], boxes[keep], scores[keep], classes[keep]
+
+        # Undo the letterbox and clip to each image
+        boxes = (boxes - np.tile(batch.pads[image_ids], 2)) / batch.scales[image_ids, None]
+        np.clip(boxes, 0, np.tile(batch.sizes[image_ids], 2), out=boxes)
+
+        bounds = np.searchsorted(image_ids, np.arange(len(batch.tensor) + 1))
+        results = []
+        for i in range(len(batch.tensor)):
+            rows = slice(bounds[i], min(bounds[i + 1], bounds[i] + self.max_det))
+            results.append(Detections(boxes[rows].astype(np.float32), scores[rows].astype(np.float32), classes[rows]))
+        return results
+
+    def detect(self, images: Sequence[np.ndarray]) -> List[Detections]:
+        """Detect boxes in a batch of BGR images."""
+        if not len(images):
+            return []
+        batch = self.prepare(images)
+        return self.postprocess(self.infer(batch.tensor), batch)
+
+    def read_plates(
+        self,
+        images: Sequence[np.ndarray],
+        char_start: int = 2,
+        names: Optional[Sequence[str]] = None,
+    ) -> List[List[PlateReading]]:
+        """Detect and group characters into plates for a batch of BGR images."""
+        return [group_characters(d, char_start, names) for d in self.detect(images)]
+
+
+def list_images(paths: Iterable[str]) -> List[str]:
+    """Expand files and folders into a sorted list of image files."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+
+def _prepared_batches(
+    detector: PlateDetector, paths: List[str], batch_size: int, workers: int
+) -> Iterator[Tuple[List[str], Optional[PreparedBatch]]]:
+    """Decode and letterbox batches on a thread pool, one batch ahead of inference."""
+
+    def prepare(chunk: List[str]) -> Tuple[List[str], Optional[PreparedBatch]]:
+        images = list(pool.map(cv2.imread, chunk))
+        readable = [p for p, image in zip(chunk, images) if image is not None]
+        if not readable:
+            return chunk, None
+        batch = detector.prepare([image for image in images if image is not None])
+        batch.paths = readable
+        return chunk, batch
+
+    chunks = [paths[start : start + batch_size] for start in range(0, len(paths), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=1) as ahead:
+        pending = ahead.submit(prepare, chunks[0]) if chunks else None
+        for k in range(len(chunks)):
+            current = pending.result()
+            pending = ahead.submit(prepare, chunks[k + 1]) if k + 1 < len(chunks) else None
+            yield current
+
+
+def load_names(path: Optional[str]) -> Optional[List[str]]:
+    """Class names, one per line (YOLO classes.txt)."""
+    if path is None:
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Detect plates and read characters in a folder of images.")
+    parser.add_argument("model", help="YOLO-style ONNX model.")
+    parser.add_argument("inputs", nargs="+", help="Image files or folders.")
+    parser.add_argument("--output", default=None, help="Write one JSON line per image here (default: stdout).")
+    parser.add_argument("--names", default=None, help="Class names file, one per line.")
+    parser.add_argument("--img-size", type=int, default=None, help="Input size (default: from the model, else 640).")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--layout", choices=["auto", "v8", "v5"], default="auto", help="Model output layout.")
+    parser.add_argument("--char-start", type=int, default=2, help="First character class id.")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime threads (0 = all cores).")
+    parser.add_argument("--workers", type=int, default=4, help="Threads for decoding images.")
+    args = parser.parse_args()
+
+    detector = PlateDetector(args.model, args.img_size, args.conf, args.iou, layout=args.layout, threads=args.threads)
+    names = load_names(args.names)
+    paths = list_images(args.inputs)
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    start = time.perf_counter()
+    plates_found = 0
+    try:
+        for chunk, batch in _prepared_batches(detector, paths, args.batch_size, args.workers):
+            results = {}
+            if batch is not None:
+                detections = detector.postprocess(detector.infer(batch.tensor), batch)
+                for path, found in zip(batch.paths, detections):
+                    results[path] = (found, group_characters(found, args.char_start, names))
+            for path in chunk:
+                if path not in results:
+                    record = {"image": path, "error": "unreadable"}
+                else:
+                    found, plates = results[path]
+                    plates_found += len(plates)
+                    record = {"image": path, "detections": len(found), "plates": [p.to_dict() for p in plates]}
+                line = json.dumps(record)
+                if output:
+                    output.write(line + "\n")
+                else:
+                    print(line)
+    finally:
+        if output:
+            output.close()
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else 0.0
+    print(f"{len(paths)} images, {plates_found} plate boxes in {elapsed:.2f}s ({rate:.1f} images/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
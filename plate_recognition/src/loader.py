@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import traceback
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .augment import AugmentConfig, Sample, augment_hsv, letterbox, load_image, mosaic, random_affine, xyxy_to_cxcywh
+from .dataset import LabelIndex, yolo_to_xyxy
+
+
+@dataclass
+class Batch:
+    """One batch: ``images`` is (B, 3, S, S) float32 RGB in [0, 1].
+
+    ``targets`` has one row per box: (index in batch, class, cx, cy, w, h), with
+    coordinates normalized to the S x S input. ``images`` lives in shared memory
+    and is reused once the next batch is requested; copy it to keep it longer.
+    """
+
+    images: np.ndarray
+    targets: np.ndarray
+    indices: np.ndarray
+
+
+class SampleSource:
+    """Builds augmented training samples (or letterboxed eval samples) from a LabelIndex."""
+
+    def __init__(
+        self,
+        index: LabelIndex,
+        img_size: int = 640,
+        augment: Optional[AugmentConfig] = None,
+        image_sizes: Optional[np.ndarray] = None,
+    ) -> None:
+        self.index = index
+        self.img_size = img_size
+        self.augment = augment
+        self.ids = np.array([i for i in range(len(index)) if index.image_files[i] is not None], dtype=np.int64)
+        # Original (width, height) from image headers let JPEGs be decoded at reduced scale
+        self.image_sizes = image_sizes
+
+    def load(self, i: int) -> Sample:
+        """Decode image ``i`` with its longer side at img_size; boxes in pixel xyxy."""
+        size = None if self.image_sizes is None else tuple(self.image_sizes[i, :2])
+        image = load_image(self.index.image_path(i), self.img_size, size)
+        classes, boxes = self.index.labels(i)
+        height, width = image.shape[:2]
+        return image, yolo_to_xyxy(boxes, width, height), np.array(classes, dtype=np.int64)
+
+    def sample(self, i: int, rng: np.random.Generator) -> Sample:
+        size = self.img_size
+        config = self.augment
+        if config is None:
+            image, boxes, classes = self.load(i)
+            canvas, scale, (pad_x, pad_y) = letterbox(image, size)
+            return canvas, boxes * scale + np.array([pad_x, pad_y] * 2, dtype=np.float32), classes
+
+        if rng.random() < config.mosaic:
+            others = rng.choice(self.ids, size=3)
+            tiles = [self.load(j) for j in (i, *others)]
+            image, boxes, classes = random_affine(*mosaic(tiles, size, rng, config.fill), rng, size, config)
+        else:
+            image, boxes, classes = self.load(i)
+            image, scale, (pad_x, pad_y) = letterbox(image, size, config.fill)
+            boxes = boxes * scale + np.array([pad_x, pad_y] * 2, dtype=np.float32)
+            image, boxes, classes = random_affine(image, boxes, classes, rng, size, config)
+        augment_hsv(image, rng, (config.hsv_h, config.hsv_s, config.hsv_v))
+        return image, boxes, classes
+
+    def fill_batch(self, out: np.ndarray, ids: Sequence[int], seed: Sequence[int]) -> np.ndarray:
+        """Write samples for ``ids`` into ``out`` (B, 3, S, S) float32; returns the targets array.
+
+        Each sample's random stream depends only on ``seed`` and its position, so
+        batches are identical whichever worker builds them.
+        """
+        targets = []
+        for slot, i in enumerate(ids):
+            rng = np.random.default_rng([*seed, slot])
+            image, boxes, classes = self.sample(int(i), rng)
+            # BGR HWC uint8 -> RGB CHW float32 in [0, 1], written straight into the batch
+            np.multiply(image[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=out[slot], casting="unsafe")
+            rows = np.empty((len(boxes), 6), dtype=np.float32)
+            rows[:, 0] = slot
+            rows[:, 1] = classes
+            rows[:, 2:] = xyxy_to_cxcywh(boxes, self.img_size, self.img_size)
+            targets.append(rows)
+        return np.concatenate(targets) if targets else np.zeros((0, 6), np.float32)
+
+
+def _worker(
+    source: SampleSource,
+    shm_name: str,
+    shape: Tuple[int, ...],
+    tasks: mp.Queue,
+    done: mp.Queue,
+) -> None:
+    import cv2
+
+    # One process per core already; OpenCV's own thread pool would oversubscribe
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        slots = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            batch_id, slot, ids, seed = task
+            try:
+                targets = source.fill_batch(slots[slot], ids, seed)
+                done.put((batch_id, slot, targets, None))
+            except Exception:
+                done.put((batch_id, slot, None, traceback.format_exc()))
+        del slots
+    finally:
+        shm.close()
+
+
+class BatchLoader:
+    """Iterates fixed-size NCHW batches built by worker processes into shared memory.
+
+    ``prefetch`` batch slots are allocated once. A slot is handed to a worker only
+    when it is free, so at most ``prefetch`` batches are in flight or waiting and
+    memory stays bounded. Batches are yielded in order. With ``workers=0``
+    samples are built in the calling process.
+    """
+
+    def __init__(
+        self,
+        source: SampleSource,
+        batch_size: int = 16,
+        shuffle: bool = True,
+        drop_last: bool = False,
+        workers: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        self.source = source
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.prefetch = prefetch or max(2, 2 * self.workers)
+        self.seed = seed
+        self.epoch = 0
+        size = source.img_size
+        self.shape = (self.prefetch if self.workers else 1, batch_size, 3, size, size)
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._slots: Optional[np.ndarray] = None
+        self._processes: List[mp.Process] = []
+        self._tasks: Optional[mp.Queue] = None
+        self._done: Optional[mp.Queue] = None
+        self._outstanding = 0
+
+    def __len__(self) -> int:
+        count = len(self.source.ids)
+        return count // self.batch_size if self.drop_last else -(-count // self.batch_size)
+
+    def _start(self) -> None:
+        if self._slots is not None:
+            return
+        if not self.workers:
+            self._slots = np.empty(self.shape, dtype=np.float32)
+            return
+        nbytes = int(np.prod(self.shape)) * 4
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._slots = np.ndarray(self.shape, dtype=np.float32, buffer=self._shm.buf)
+        self._tasks = mp.Queue()
+        self._done = mp.Queue()
+        for _ in range(self.workers):
+            process = mp.Process(
+                target=_worker,
+                args=(self.source, self._shm.name, self.shape, self._tasks, self._done),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def _epoch_batches(self, epoch: int) -> List[np.ndarray]:
+        ids = self.source.ids
+        if self.shuffle:
+            ids = np.random.default_rng([self.seed, epoch]).permutation(ids)
+        stop = len(self) * self.batch_size
+        return [ids[start : min(start + self.batch_size, stop)] for start in range(0, stop, self.batch_size)]
+
+    def _receive(self) -> tuple:
+        while True:
+            try:
+                message = self._done.get(timeout=1.0)
+                self._outstanding -= 1
+                return message
+            except queue.Empty:
+                dead = [p for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Loader worker exited with code {dead[0].exitcode}") from None
+
+    def __iter__(self) -> Iterator[Batch]:
+        self._start()
+        epoch = self.epoch
+        self.epoch += 1
+        batches = self._epoch_batches(epoch)
+        if not self.workers:
+            for batch_id, ids in enumerate(batches):
+                images = self._slots[0, : len(ids)]
+                targets = self.source.fill_batch(images, ids, (self.seed, epoch, batch_id))
+                yield Batch(images, targets, ids)
+            return
+
+        # Results still in flight from an epoch that was abandoned part-way
+        while self._outstanding:
+            self._receive()
+        free = list(range(self.prefetch))
+        submitted = 0
+        ready: Dict[int, Tuple[int, np.ndarray]] = {}
+
+        def submit() -> None:
+            nonlocal submitted
+            while free and submitted < len(batches):
+                slot = free.pop()
+                self._tasks.put((submitted, slot, batches[submitted], (self.seed, epoch, submitted)))
+                self._outstanding += 1
+                submitted += 1
+
+        submit()
+        for batch_id, ids in enumerate(batches):
+            while batch_id not in ready:
+                done_id, slot, targets, error = self._receive()
+                if error is not None:
+                    raise RuntimeError(f"Loader worker failed on batch {done_id}:\n{error}")
+                ready[done_id] = (slot, targets)
+            slot, targets = ready.pop(batch_id)
+            yield Batch(self._slots[slot, : len(ids)], targets, ids)
+            free.append(slot)
+            submit()
+
+    def close(self) -> None:
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._slots = None
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # a Batch still views the buffer; the mapping goes when it does
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "BatchLoader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .dataset import LabelIndex, load_labels
+
+# Box edges may overshoot [0, 1] by this much from rounding in labelling tools.
+EDGE_TOLERANCE = 1e-3
+# Boxes whose coordinates agree to this many decimals count as duplicates.
+DUPLICATE_DECIMALS = 4
+# Bins for box sizes: sqrt(area) in pixels, or in normalized units without image sizes.
+PIXEL_SIZE_BINS = (0, 8, 16, 32, 64, 128, 256, 512, np.inf)
+NORMALIZED_SIZE_BINS = (0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, np.inf)
+PERCENTILES = (5, 50, 95)
+
+
+@dataclass
+class ValidationConfig:
+    char_start: int = 2
+    num_classes: Optional[int] = None
+    min_pixels: float = 2.0
+    max_examples: int = 20
+
+
+def read_image_sizes(paths: Sequence[Optional[str]], workers: int = 16) -> np.ndarray:
+    """Read (width, height, EXIF orientation) from image headers; -1 where unreadable.
+
+    Only the header is parsed, so this costs a file open and a few KB of I/O per image.
+    Reads run on a thread pool because that I/O releases the GIL.
+    """
+    from PIL import Image
+
+    def read(path: Optional[str]) -> tuple:
+        if path is None:
+            return (-1, -1, -1)
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+                orientation = image.getexif().get(0x0112, 1)
+            return (width, height, orientation)
+        except (OSError, SyntaxError, ValueError):
+            return (-1, -1, -1)
+
+    if workers <= 1 or len(paths) < 64:
+        results = [read(path) for path in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(read, paths, chunksize=64))
+    return np.array(results, dtype=np.int64).reshape(-1, 3)
+
+
+def _examples(index: LabelIndex, rows: np.ndarray, limit: int) -> List[dict]:
+    """A few offending boxes as {image, row, class, box} for the report."""
+    samples = []
+    for row in rows[:limit]:
+        record = index.records[row]
+        image = int(record["image"])
+        samples.append({
+            "image": index.names[image],
+            "row": int(row - index.offsets[image]),
+            "class": int(record["cls"]),
+            "box": [round(float(v), 6) for v in record["box"]],
+        })
+    return samples
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    if not len(values):
+        return {}
+    points = np.percentile(values, PERCENTILES)
+    summary = {f"p{p}": round(float(v), 6) for p, v in zip(PERCENTILES, points)}
+    summary["mean"] = round(float(values.mean()), 6)
+    return summary
+
+
+def _distinct(values: np.ndarray) -> np.ndarray:
+    """Sorted distinct values of an int64 array (a plain sort beats np.unique's hashing here)."""
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def _mix(hashes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Fold int64 ``values`` into uint64 ``hashes`` (splitmix64 finalizer)."""
+    hashes = (hashes ^ values.astype(np.uint64)) * np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(31)
+    hashes *= np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(29))
+
+
+def find_duplicates(image: np.ndarray, cls: np.ndarray, boxes: np.ndarray, decimals: int = DUPLICATE_DECIMALS) -> np.ndarray:
+    """Indices of rows repeating an earlier (image, class, box) after rounding.
+
+    Rows are bucketed by a 64-bit hash of the key with one argsort; only rows
+    sharing a hash are compared exactly, so collisions cannot cause false positives.
+    """
+    if not len(image):
+        return np.empty(0, dtype=np.int64)
+    quantized = np.rint(np.clip(boxes, -1e3, 1e3).astype(np.float64) * 10**decimals).astype(np.int64)
+    keys = np.column_stack([image.astype(np.int64), cls.astype(np.int64), quantized])
+    hashes = np.zeros(len(keys), dtype=np.uint64)
+    for column in keys.T:
+        hashes = _mix(hashes, column)
+
+    order = np.argsort(hashes, kind="stable")
+    ordered = hashes[order]
+    shared = np.zeros(len(order), dtype=bool)
+    same = ordered[1:] == ordered[:-1]
+    shared[1:] |= same
+    shared[:-1] |= same
+    candidates = np.sort(order[shared])
+    if not len(candidates):
+        return candidates
+    # lexsort is stable, so the first of equal rows keeps its place and the rest are repeats
+    sub_order = candidates[np.lexsort(keys[candidates].T[::-1])]
+    sub_keys = keys[sub_order]
+    repeat = np.zeros(len(sub_order), dtype=bool)
+    repeat[1:] = (sub_keys[1:] == sub_keys[:-1]).all(axis=1)
+    return np.sort(sub_order[repeat])
+
+
+def chars_outside_plates(index: LabelIndex, char_start: int) -> np.ndarray:
+    """Rows of character boxes whose centre is not inside any plate-level box of their image."""
+    records = index.records
+    cls = records["cls"]
+    plate_rows = np.flatnonzero(cls < char_start)
+    char_rows = np.flatnonzero(cls >= char_start)
+    if not len(char_rows):
+        return char_rows
+    plate_image = records["image"][plate_rows]
+    char_image = records["image"][char_rows]
+
+    # Pair every character with every plate-level box of the same image
+    start = np.searchsorted(plate_image, char_image, side="left")
+    stop = np.searchsorted(plate_image, char_image, side="right")
+    counts = stop - start
+    pair_char = np.repeat(np.arange(len(char_rows)), counts)
+    within = np.arange(len(pair_char)) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_plate = plate_rows[np.repeat(start, counts) + within]
+
+    centres = records["box"][char_rows[pair_char], :2]
+    plates = records["box"][pair_plate]
+    half = plates[:, 2:] / 2
+    inside = np.all((centres >= plates[:, :2] - half) & (centres <= plates[:, :2] + half), axis=1)
+    contained = np.bincount(pair_char, weights=inside, minlength=len(char_rows)) > 0
+    return char_rows[~contained]
+
+
+def _size_histogram(cls: np.ndarray, sizes: np.ndarray, bins: Sequence[float], num_classes: int) -> Dict[str, List[int]]:
+    """Per-class counts of box sizes over ``bins``, from a single bincount."""
+    bucket = np.clip(np.digitize(sizes, bins[1:-1]), 0, len(bins) - 2)
+    valid = np.isfinite(sizes) & (cls >= 0)
+    flat = np.bincount(cls[valid] * (len(bins) - 1) + bucket[valid], minlength=num_classes * (len(bins) - 1))
+    table = flat.reshape(num_classes, len(bins) - 1)
+    return {str(c): table[c].tolist() for c in range(num_classes) if table[c].any()}
+
+
+def validate(index: LabelIndex, sizes: Optional[np.ndarray] = None, config: Optional[ValidationConfig] = None) -> dict:
+    """Check every box and summarize the label set; returns a JSON-serializable report.
+
+    ``sizes`` is the output of read_image_sizes() for ``index.image_path`` of every
+    image, or None to skip pixel-level checks and statistics.
+    """
+    config = config or ValidationConfig()
+    records = index.records
+    image = np.asarray(records["image"])
+    cls = np.asarray(records["cls"])
+    boxes = np.asarray(records["box"], dtype=np.float32)
+    cx, cy, w, h = boxes.T
+    num_classes = max(index.num_classes, config.num_classes or 0)
+    box_counts = index.box_counts
+
+    issues: Dict[str, np.ndarray] = {}
+    edges = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    issues["out_of_range"] = np.flatnonzero(
+        ~np.isfinite(boxes).all(axis=1)
+        | (edges < -EDGE_TOLERANCE).any(axis=1)
+        | (edges > 1 + EDGE_TOLERANCE).any(axis=1)
+    )
+    issues["zero_size"] = np.flatnonzero((w <= 0) | (h <= 0))
+    issues["duplicate"] = find_duplicates(image, cls, boxes)
+    bad_class = cls < 0
+    if config.num_classes is not None:
+        bad_class |= cls >= config.num_classes
+    issues["invalid_class"] = np.flatnonzero(bad_class)
+    issues["char_outside_plate"] = chars_outside_plates(index, config.char_start)
+
+    width = height = None
+    if sizes is not None:
+        width = sizes[:, 0][image].astype(np.float32)
+        height = sizes[:, 1][image].astype(np.float32)
+        known = width > 0
+        issues["tiny"] = np.flatnonzero(
+            known & (w > 0) & (h > 0) & ((w * width < config.min_pixels) | (h * height < config.min_pixels))
+        )
+
+    is_plate = (cls >= 0) & (cls < config.char_start)
+    plates_per_image = np.bincount(image[is_plate], minlength=len(index))
+    chars_per_image = box_counts - plates_per_image
+    missing_image = np.array([f is None for f in index.image_files], dtype=bool)
+    image_issues = {
+        "no_label_file": np.flatnonzero(~index.labeled),
+        "empty_label_file": np.flatnonzero(index.labeled & (box_counts == 0)),
+        "no_plate": np.flatnonzero((box_counts > 0) & (plates_per_image == 0)),
+        "plate_without_chars": np.flatnonzero((plates_per_image > 0) & (chars_per_image == 0)),
+        "missing_image": np.flatnonzero(missing_image),
+    }
+    if sizes is not None:
+        image_issues["unreadable_image"] = np.flatnonzero((sizes[:, 0] < 0) & ~missing_image)
+        image_issues["exif_rotated"] = np.flatnonzero(sizes[:, 2] > 1)
+
+    # Statistics cover valid class ids only; negative ones are reported above
+    known_class = cls >= 0
+    class_counts = np.bincount(cls[known_class], minlength=num_classes)
+    # Images per class: distinct (image, class) pairs
+    pairs = _distinct(image[known_class].astype(np.int64) * max(num_classes, 1) + cls[known_class])
+    images_per_class = np.bincount(pairs % max(num_classes, 1), minlength=num_classes)
+
+    per_class = {}
+    order = np.argsort(cls, kind="stable")
+    bounds = np.searchsorted(cls[order], np.arange(num_classes + 1))
+    for c in range(num_classes):
+        rows = order[bounds[c] : bounds[c + 1]]
+        if not len(rows):
+            continue
+        entry = {
+            "boxes": int(class_counts[c]),
+            "images": int(images_per_class[c]),
+            "width": _percentiles(w[rows]),
+            "height": _percentiles(h[rows]),
+        }
+        if width is not None:
+            known_rows = rows[width[rows] > 0]
+            entry["width_px"] = _percentiles(w[known_rows] * width[known_rows])
+            entry["height_px"] = _percentiles(h[known_rows] * height[known_rows])
+            entry["aspect"] = _percentiles(
+                (w[known_rows] * width[known_rows]) / np.maximum(h[known_rows] * height[known_rows], 1e-6)
+            )
+        per_class[str(c)] = entry
+
+    valid_size = (w > 0) & (h > 0)
+    if width is not None:
+        scale = np.sqrt(np.where(valid_size & (width > 0), w * width * h * height, np.nan))
+        size_bins, size_unit = PIXEL_SIZE_BINS, "sqrt_area_px"
+    else:
+        scale = np.sqrt(np.where(valid_size, w * h, np.nan))
+        size_bins, size_unit = NORMALIZED_SIZE_BINS, "sqrt_area"
+
+    report = {
+        "summary": {
+            "images": len(index),
+            "labeled_images": int(index.labeled.sum()),
+            "boxes": index.num_boxes,
+            "classes": num_classes,
+            "boxes_per_image": _percentiles(box_counts),
+            "chars_per_plate_image": _percentiles(chars_per_image[plates_per_image > 0]),
+        },
+        "box_issues": {
+            name: {"count": int(len(rows)), "examples": _examples(index, rows, config.max_examples)}
+            for name, rows in issues.items()
+        },
+        "image_issues": {
+            name: {"count": int(len(ids)), "examples": [index.names[i] for i in ids[: config.max_examples]]}
+            for name, ids in image_issues.items()
+        },
+        "classes": per_class,
+        "size_histogram": {
+            "unit": size_unit,
+            "bins": [float(b) for b in size_bins],
+            "counts": _size_histogram(cls, scale, size_bins, num_classes),
+        },
+    }
+    if sizes is not None:
+        readable = sizes[sizes[:, 0] > 0, :2]
+        packed, counts = np.unique(readable[:, 0] << 32 | readable[:, 1], return_counts=True)
+        top = np.argsort(counts, kind="stable")[::-1][:10]
+        report["resolutions"] = {
+            "distinct": int(len(packed)),
+            "width": _percentiles(readable[:, 0]),
+            "height": _percentiles(readable[:, 1]),
+            "most_common": [[f"{packed[i] >> 32}x{packed[i] & 0xFFFFFFFF}", int(counts[i])] for i in top],
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Human-readable summary of a validate() report."""
+    summary = report["summary"]
+    lines = [
+        f"{summary['images']} images ({summary['labeled_images']} labelled), "
+        f"{summary['boxes']} boxes, {summary['classes']} classes"
+    ]
+    lines.append("Issues:")
+    for group in ("box_issues", "image_issues"):
+        for name, issue in report[group].items():
+            if issue["count"]:
+                first = issue["examples"][0]
+                where = first if isinstance(first, str) else f"{first['image']} row {first['row']}"
+                lines.append(f"  {name:20s} {issue['count']:8d}   e.g. {where}")
+    if len(lines) == 2:
+        lines.append("  none")
+    lines.append("Classes:")
+    for cls, entry in report["classes"].items():
+        size = entry.get("height_px") or entry["height"]
+        lines.append(
+            f"  {int(cls):3d}: {entry['boxes']:8d} boxes in {entry['images']:7d} images, "
+            f"median height {size.get('p50', 0):g}{' px' if 'height_px' in entry else ''}"
+        )
+    if "resolutions" in report:
+        common = ", ".join(f"{res} ({n})" for res, n in report["resolutions"]["most_common"][:3])
+        lines.append(f"Resolutions: {report['resolutions']['distinct']} distinct; most common {common}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    default_root = os.path.join(base_dir, "..", "NIYOBYOSEPaulin", "NIYOBYOSE_PAULIN")
+
+    parser = argparse.ArgumentParser(description="Validate YOLO labels and report dataset statistics.")
+    parser.add_argument("root", nargs="?", default=default_root, help="Dataset directory with labels/ and images/.")
+    parser.add_argument("--output", default=None, help="Write the full report as JSON.")
+    parser.add_argument("--no-images", action="store_true", help="Skip reading image headers.")
+    parser.add_argument("--workers", type=int, default=16, help="Threads for parsing labels and reading headers.")
+    parser.add_argument("--num-classes", type=int, default=None, help="Flag class ids at or above this.")
+    parser.add_argument("--char-start", type=int, default=2, help="First character class; lower ids are plate-level.")
+    parser.add_argument("--min-pixels", type=float, default=2.0, help="Flag boxes narrower or shorter than this.")
+    parser.add_argument("--cache-dir", default=None, help="Where to keep the label cache.")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any box issue is found.")
+    args = parser.parse_args()
+
+    timings = {}
+    start = time.perf_counter()
+    index = load_labels(args.root, cache_dir=args.cache_dir, workers=args.workers)
+    timings["load_labels"] = time.perf_counter() - start
+
+    sizes = None
+    if not args.no_images and index.image_dir is not None:
+        start = time.perf_counter()
+        sizes = read_image_sizes([index.image_path(i) for i in range(len(index))], workers=args.workers)
+        timings["read_headers"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    config = ValidationConfig(char_start=args.char_start, num_classes=args.num_classes, min_pixels=args.min_pixels)
+    report = validate(index, sizes, config)
+    timings["validate"] = time.perf_counter() - start
+    report["timings_s"] = {name: round(seconds, 4) for name, seconds in timings.items()}
+
+    print(format_report(report))
+    print("Timings: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Report written to {args.output}")
+    if args.strict and any(issue["count"] for issue in report["box_issues"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
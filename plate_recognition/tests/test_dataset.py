@@ -0,0 +1,261 @@
+import os
+
+
+def _write_dataset(root) -> None:
+    (root / "labels").mkdir()
+    (root / "images").mkdir()
+    (root / "labels" / "a.txt").write_text("0 0.5 0.5 1.0 1.0\n1 0.25 0.5 0.1 0.2\n")
+    (root / "labels" / "b.txt").write_text("1 0.5 0.5 0.2 0.2\n")
+    (root / "labels" / "c.txt").write_text("")
+    (root / "labels" / ".DS_Store").write_text("junk")
+    for name in ("a.jpg", "b.png", "c.jpeg", "d.jpg"):
+        (root / "images" / name).write_bytes(b"")
+
+
+def test_label_index_queries(tmp_path) -> None:
+    import numpy as np
+
+    from src.dataset import load_labels, yolo_to_xyxy
+
+    _write_dataset(tmp_path)
+    index = load_labels(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+
+    assert index.names == ["a", "b", "c", "d"]
+    assert index.offsets.tolist() == [0, 2, 3, 3, 3]
+    assert index.labeled.tolist() == [True, True, True, False]
+    assert index.image_path("b.txt").endswith(os.path.join("images", "b.png"))
+
+    classes, boxes = index.labels("a")
+    assert classes.tolist() == [0, 1]
+    assert np.allclose(yolo_to_xyxy(boxes, 200, 100)[1], [40, 40, 60, 60])
+    assert index.labels(2)[0].size == 0
+
+    assert index.class_counts().tolist() == [1, 2]
+    assert index.images_with_class(1).tolist() == [0, 1]
+    image_ids, class_boxes = index.boxes_of_class(1)
+    assert image_ids.tolist() == [0, 1] and class_boxes.shape == (2, 4)
+    assert index.rows_of_class(7).size == 0
+
+
+def test_label_cache_reuse_and_invalidation(tmp_path, monkeypatch) -> None:
+    import numpy as np
+    import pytest
+
+    from src import dataset
+
+    _write_dataset(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    first = dataset.load_labels(str(tmp_path), cache_dir=cache_dir)
+    assert isinstance(first.records, np.memmap)
+
+    def fail(path):
+        raise AssertionError("label file re-parsed")
+
+    monkeypatch.setattr(dataset, "parse_label_file", fail)
+    cached = dataset.load_labels(str(tmp_path), cache_dir=cache_dir)
+    assert cached.num_boxes == 3 and cached.names == first.names
+
+    label = tmp_path / "labels" / "b.txt"
+    label.write_text("1 0.5 0.5 0.2 0.2\n2 0.1 0.1 0.1 0.1\n")
+    stat = label.stat()
+    os.utime(label, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with pytest.raises(AssertionError):
+        dataset.load_labels(str(tmp_path), cache_dir=cache_dir)
+
+    monkeypatch.undo()
+    updated = dataset.load_labels(str(tmp_path), cache_dir=cache_dir)
+    assert updated.class_counts().tolist() == [1, 2, 1]
+
+
+def test_malformed_label_file_is_reported(tmp_path) -> None:
+    import pytest
+
+    from src.dataset import load_labels
+
+    (tmp_path / "labels").mkdir()
+    (tmp_path / "labels" / "bad.txt").write_text("0 0.5 0.5 0.1\n")
+    with pytest.raises(ValueError, match="bad.txt"):
+        load_labels(str(tmp_path), use_cache=False)
+
+
+def test_validate_flags_label_problems(tmp_path) -> None:
+    from PIL import Image
+
+    from src.dataset import load_labels
+    from src.validate import ValidationConfig, read_image_sizes, validate
+
+    (tmp_path / "labels").mkdir()
+    (tmp_path / "images").mkdir()
+    (tmp_path / "labels" / "a.txt").write_text(
+        "1 0.5 0.5 0.5 0.2\n"
+        "2 0.4 0.5 0.05 0.1\n"
+        "2 0.4 0.5 0.05 0.1\n"  # duplicate
+        "3 0.9 0.9 0.05 0.1\n"  # character outside the plate
+        "2 0.5 0.5 0.0 0.1\n"  # zero width
+        "4 0.98 0.5 0.1 0.1\n"  # runs past the right edge
+        "5 0.45 0.5 0.001 0.1\n"  # under 2 px wide
+    )
+    (tmp_path / "labels" / "b.txt").write_text("2 0.5 0.5 0.1 0.1\n")
+    Image.new("RGB", (200, 100)).save(tmp_path / "images" / "a.png")
+    Image.new("RGB", (64, 48)).save(tmp_path / "images" / "c.jpg")
+    (tmp_path / "images" / "d.jpg").write_bytes(b"not an image")
+
+    index = load_labels(str(tmp_path), use_cache=False)
+    sizes = read_image_sizes([index.image_path(i) for i in range(len(index))], workers=1)
+    assert sizes[:, :2].tolist() == [[200, 100], [-1, -1], [64, 48], [-1, -1]]
+
+    report = validate(index, sizes, ValidationConfig(num_classes=5))
+    boxes = {name: [e["row"] for e in issue["examples"]] for name, issue in report["box_issues"].items()}
+    assert boxes["duplicate"] == [2]
+    assert boxes["zero_size"] == [4]
+    assert boxes["out_of_range"] == [5]
+    assert boxes["invalid_class"] == [6]
+    assert boxes["tiny"] == [6]
+    assert 3 in boxes["char_outside_plate"] and 1 not in boxes["char_outside_plate"]
+
+    images = {name: issue["examples"] for name, issue in report["image_issues"].items()}
+    assert images["no_label_file"] == ["c", "d"]
+    assert images["no_plate"] == ["b"]
+    assert images["missing_image"] == ["b"]
+    assert images["unreadable_image"] == ["d"]
+
+    assert (report["classes"]["2"]["boxes"], report["classes"]["2"]["images"]) == (4, 2)
+    assert report["resolutions"]["distinct"] == 2
+    assert sum(sum(counts) for counts in report["size_histogram"]["counts"].values()) == 6
+
+
+def _write_image_dataset(root, count: int = 4) -> None:
+    import cv2
+    import numpy as np
+
+    (root / "labels").mkdir()
+    (root / "images").mkdir()
+    for i in range(count):
+        image = np.full((120, 200, 3), 40 * i, dtype=np.uint8)
+        cv2.rectangle(image, (50, 30), (150, 90), (255, 255, 255), -1)
+        cv2.imwrite(str(root / "images" / f"img{i}.jpg"), image)
+        (root / "labels" / f"img{i}.txt").write_text("1 0.5 0.5 0.5 0.5\n2 0.4 0.5 0.05 0.2\n")
+
+
+def test_eval_loader_letterboxes_boxes(tmp_path) -> None:
+    import numpy as np
+
+    from src.dataset import load_labels
+    from src.loader import BatchLoader, SampleSource
+
+    _write_image_dataset(tmp_path, count=3)
+    source = SampleSource(load_labels(str(tmp_path), use_cache=False), img_size=100)
+    loader = BatchLoader(source, batch_size=2, shuffle=False, workers=0)
+    batches = list(loader)
+
+    assert len(loader) == 2 and [len(b.images) for b in batches] == [2, 1]
+    first = batches[0]
+    assert first.images.shape == (2, 3, 100, 100) and first.images.dtype == np.float32
+    assert first.images.max() <= 1.0
+    # 200x120 -> 100x60 letterboxed with 20 px of padding above and below
+    plate = first.targets[(first.targets[:, 0] == 0) & (first.targets[:, 1] == 1)][0]
+    assert np.allclose(plate[2:], [0.5, 0.5, 0.5, 0.3], atol=1e-3)
+
+
+def test_augmented_batches_do_not_depend_on_workers(tmp_path) -> None:
+    import numpy as np
+
+    from src.augment import AugmentConfig
+    from src.dataset import load_labels
+    from src.loader import BatchLoader, SampleSource
+
+    _write_image_dataset(tmp_path)
+    source = SampleSource(load_labels(str(tmp_path), use_cache=False), 96, AugmentConfig(degrees=10, shear=2))
+    results = []
+    for workers in (0, 2):
+        with BatchLoader(source, batch_size=2, workers=workers, prefetch=2, seed=3) as loader:
+            results.append([(batch.images.copy(), batch.targets.copy()) for batch in loader])
+
+    for (images_a, targets_a), (images_b, targets_b) in zip(*results):
+        assert np.array_equal(images_a, images_b) and np.array_equal(targets_a, targets_b)
+        boxes = targets_a[:, 2:]
+        assert len(boxes) and (boxes[:, 2:] > 0).all()
+        assert (boxes[:, :2] - boxes[:, 2:] / 2 >= -1e-4).all() and (boxes[:, :2] + boxes[:, 2:] / 2 <= 1 + 1e-4).all()
+
+
+def _tiny_detector(path, predictions) -> None:
+    """Write an ONNX model that returns fixed (4 + C, A) predictions for every image in the batch."""
+    import numpy as np
+    import pytest
+
+    onnx = pytest.importorskip("onnx")  # only needed to build the test model
+    from onnx import TensorProto, helper, numpy_helper
+
+    predictions = np.asarray(predictions, dtype=np.float32)[None]
+    graph = helper.make_graph(
+        [
+            helper.make_node("ReduceMean", ["images"], ["mean"], axes=[1, 2, 3], keepdims=1),
+            helper.make_node("Reshape", ["mean", "shape"], ["per_image"]),
+            helper.make_node("Mul", ["per_image", "zero"], ["zeros"]),
+            helper.make_node("Add", ["zeros", "predictions"], ["output"]),
+        ],
+        "tiny_detector",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, 64, 64])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", predictions.shape[1], predictions.shape[2]])],
+        [
+            numpy_helper.from_array(np.array([-1, 1, 1], np.int64), "shape"),
+            numpy_helper.from_array(np.zeros(1, np.float32), "zero"),
+            numpy_helper.from_array(predictions, "predictions"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def test_batched_nms_keeps_groups_apart() -> None:
+    import numpy as np
+
+    from src.detect import _greedy_nms, batched_nms, nms
+
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 10]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    assert nms(boxes, scores, 0.5).tolist() == [0, 2]
+    assert batched_nms(boxes, scores, np.array([0, 0, 0, 1]), 0.5).tolist() == [0, 2, 3]
+
+    # The matrix form must match greedy NMS, including chains of suppression
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, 100, (300, 2))
+    boxes = np.hstack([corners, corners + rng.uniform(5, 40, (300, 2))]).astype(np.float32)
+    scores = rng.random(300)
+    order = np.argsort(-scores, kind="stable")
+    assert nms(boxes, scores, 0.45).tolist() == order[_greedy_nms(boxes[order], 0.45)].tolist()
+
+
+def test_detector_reads_plates_in_order(tmp_path) -> None:
+    import numpy as np
+
+    from src.detect import PlateDetector
+
+    # Columns are anchors: (cx, cy, w, h) in the 64 px input, then 4 class scores.
+    # Class 1 is the plate; classes 2 and 3 are characters, on two lines.
+    anchors = [
+        ([32, 32, 40, 24], [0, 0.9, 0, 0]),  # plate
+        ([32, 32, 38, 22], [0, 0.5, 0, 0]),  # duplicate plate, suppressed
+        ([40, 26, 6, 8], [0, 0, 0.8, 0]),  # top line, right
+        ([24, 26, 6, 8], [0, 0, 0, 0.8]),  # top line, left
+        ([30, 38, 6, 8], [0, 0, 0.7, 0]),  # bottom line
+        ([5, 5, 4, 4], [0, 0, 0.9, 0]),  # outside the plate
+        ([50, 50, 4, 4], [0, 0, 0.1, 0]),  # below the threshold
+    ]
+    predictions = np.array([box + scores for box, scores in anchors], dtype=np.float32).T
+    model = tmp_path / "tiny.onnx"
+    _tiny_detector(model, predictions)
+
+    detector = PlateDetector(str(model), conf_threshold=0.25, layout="v8")
+    assert detector.img_size == 64
+    images = [np.zeros((64, 64, 3), np.uint8), np.zeros((64, 128, 3), np.uint8)]
+    square, wide = detector.detect(images)
+    assert len(square) == 5 and sorted(square.classes.tolist()) == [1, 2, 2, 2, 3]
+    # 128x64 is scaled by 0.5 and padded by 16 px vertically: x doubles, y = (y - 16) * 2
+    plate = wide.boxes[wide.classes == 1][0]
+    assert np.allclose(plate, [24, 8, 104, 56])
+
+    (reading,), _ = detector.read_plates(images, names=["vehicle", "plate", "A", "B"])
+    assert reading.cls == 1 and reading.lines == 2
+    assert reading.char_classes == [3, 2, 2] and reading.text == "BAA"